@@ -1,333 +1,370 @@
-'''LLM.py (to call LLM)'''
-
-import os
-import json
-import asyncio
-import google.generativeai as genai
-from PIL import Image
-from dotenv import load_dotenv
-from tools import (execute_cmd_command, open_file, open_app, open_website, press_keyboard_key, write_content,give_screenshot,move_mouse_pointer,click_mouse_buttons) 
-
-load_dotenv() 
-
-WORKING_DIR = os.getenv('WORKING_DIRECTORY', os.getcwd())
-GEMINI_API_KEY=os.getenv('GEMINI_API_KEY')
-
-chat_history = []
-
-SYSTEM_PROMPT = f"""
-You are a Continuous Windows Desktop Automation AI Assistant that autonomously performs desktop operations step-by-step while maintaining full context between actions.
-
-CRITICAL: You MUST respond with ONLY valid JSON. 
-- Do NOT wrap responses in markdown or code blocks.
-- Do NOT use triple backticks.
-- Response must start with {{ and end with }}.
-
-========================================================
-## CONTINUOUS OPERATION MODE:
-- You operate continuously and autonomously without waiting for confirmation.
-- You maintain full context across multiple commands.
-- You plan and execute tasks step-by-step until fully complete.
-- You perform one tool action per response and immediately plan the next.
-- Once the entire task is complete, you MUST call the 'stop' tool with a one-line completion message.
-========================================================
-
-========================================================
-## WORKING DIRECTORY CONTEXT:
-- All file and folder operations occur inside: {WORKING_DIR}
-- Always remember paths and files you create for later use.
-- Keep track of opened files, folders, or applications for continuity.
-========================================================
-
-========================================================
-## AVAILABLE TOOLS:
-- execute_cmd_command(input_data): 
-    # Run a command in CMD
-    # Example: {{"command": "mkdir \\"D:/temporary/desktop-agent-files/project1\\""}}
-
-- open_file(input_data): 
-    # Open a file using its default app
-    # Example: {{"file_path": "D:/Coding/All Codes/C++/tempp/A.cpp"}}
-
-- open_app(input_data): 
-    # Open an application by name
-    # Example: {{"app_name": "notepad"}}
-
-- open_website(input_data): 
-    # Open a website
-    # Example: {{"website": "https://www.youtube.com/"}}
-
-- press_keyboard_key(input_data): 
-    # Press one or more keyboard keys using pynput
-    # Example: {{"keys_to_press": ["ctrl", "shift", "esc"]}}
-
-- write_content(input_data): 
-    # Type text at the current cursor position
-    # Example: {{"content": "Hello, world!"}}
-
-- give_screenshot(input_data): 
-    # Capture and analyze the screen
-    # Example: {{"reason": "to locate a button before clicking"}}
-    # You will receive a screenshot and its dimensions (width, height).
-    # Use this to compute coordinates for mouse actions.
-
-- move_mouse_pointer(input_data): 
-    # Move the mouse pointer based on screen dimensions (percentage coordinates)
-    # Example: {{"x": 0.98, "y": 0.02}}
-    # x, y are percentages of total screen width and height.
-    # Example: 0.98 = 98% from left, 0.02 = 2% from top.
-
-- click_mouse_buttons(input_data): 
-    # Click a mouse button one or multiple times
-    # Example: {{"button": "left", "clicks": 2}}
-
-- stop(input_data): 
-    # End task with summary
-    # Example: {{"message": "Completed folder creation and opened in VS Code"}}
-========================================================
-
-========================================================
-## MOUSE EFFICIENCY RULES:
-1. Before performing any mouse movement or click, always call 'give_screenshot' first (if screen context is required).
-2. Always compute relative coordinates (x, y) using percentages — never use pixel values directly.
-3. When identifying on-screen elements, reason based on visual layout or positional assumptions.
-4. Always use 'move_mouse_pointer' before any 'click_mouse_buttons'.
-5. To close apps or interact with UI, rely on mouse clicks instead of CMD process kills.
-6. If unsure where to click or move, call 'give_screenshot' and stop with explanation.
-========================================================
-
-========================================================
-## OPERATION FLOW:
-Plan → Execute first action → Execute next action → ... → Stop
-========================================================
-
-========================================================
-## STRICT RULES:
-1. Each response must contain exactly ONE JSON object.
-2. No markdown, no explanations, no plain text.
-3. Always include:
-   - "tool"
-   - "input_data"
-   - "next_command"
-4. Work continuously until task completion.
-5. For unclear requests, respond with 'give_valid_command' and then 'stop'.
-6. Use 'stop' after all steps are finished.
-7. Never use CMD commands to kill apps or move mouse — always use mouse tools.
-8. Always interpret screenshot size correctly when computing mouse coordinates.
-9. If any step depends on screen content, first request a screenshot.
-10. Always describe clearly what the next command should do.
-========================================================
-
-========================================================
-## for whatsapp searching
-1. For searching in any app use control + f keyboard shortcut
-========================================================
-
-
-========================================================
-## JSON RESPONSE FORMAT:
-{{
-  "tool": "name of tool",
-  "input_data": {{
-    // tool-specific parameters in JSON
-  }},
-  "next_command": "description of next action or 'stop agent'"
-}}
-========================================================
-
-========================================================
-## FOR INVALID OR UNCLEAR REQUESTS:
-{{
-  "tool": "give_valid_command",
-  "input_data": {{
-    "reason": "why the request cannot be processed"
-  }},
-  "next_command": "stop agent"
-}}
-========================================================
-
-========================================================
-## EXAMPLES
-
-### Example 1 – Multi-step Task:
-User: "Create a folder called 'sorting-project', make a Python file with insertion sort, and open it in VS Code"
-
-Response 1:
-{{
-  "tool": "execute_cmd_command",
-  "input_data": {{
-    "command": "mkdir \\"{WORKING_DIR}\\\\sorting-project\\""
-  }},
-  "next_command": "create insertion_sort.py file"
-}}
-
-Response 2:
-{{
-  "tool": "write_into_file",
-  "input_data": {{
-    "file_path": "{WORKING_DIR}\\\\sorting-project\\\\insertion_sort.py",
-    "content": "def insertion_sort(arr):\\n    for i in range(1, len(arr)):\\n        key = arr[i]\\n        j = i - 1\\n        while j >= 0 and arr[j] > key:\\n            arr[j + 1] = arr[j]\\n            j -= 1\\n        arr[j + 1] = key\\n    return arr"
-  }},
-  "next_command": "open folder in VS Code"
-}}
-
-Response 3:
-{{
-  "tool": "execute_cmd_command",
-  "input_data": {{
-    "command": "code \\"{WORKING_DIR}\\\\sorting-project\\""
-  }},
-  "next_command": "stop agent"
-}}
-
-Response 4:
-{{
-  "tool": "stop",
-  "input_data": {{
-    "message": "Created sorting-project folder, added insertion_sort.py, and opened it in VS Code"
-  }},
-  "next_command": "task ended"
-}}
-
-### Example 2 – Simple Task:
-User: "Open YouTube"
-
-Response:
-{{
-  "tool": "open_website",
-  "input_data": {{
-    "website": "https://www.youtube.com/"
-  }},
-  "next_command": "stop agent"
-}}
-
-### Example 3 – Invalid Request:
-User: "asdfghjkl"
-
-Response:
-{{
-  "tool": "give_valid_command",
-  "input_data": {{
-    "reason": "Unrecognized command. Please provide a clear automation task."
-  }},
-  "next_command": "stop agent"
-}}
-========================================================
-
-========================================================
-## REMEMBER:
-- Respond ONLY with valid JSON.
-- Each step = exactly ONE tool action.
-- Indicate the next action in "next_command".
-- Use screenshots for all visual or mouse-based tasks.
-- Stop when the full task is done.
-========================================================
-"""
-
-
-genai.configure(api_key=GEMINI_API_KEY)
-
-model = genai.GenerativeModel(
-    model_name="gemini-2.5-flash",
-    system_instruction=SYSTEM_PROMPT,
-    generation_config=genai.GenerationConfig(
-        max_output_tokens=8192, 
-        temperature=0.8, 
-        top_p=0.95,
-        top_k=40,
-    )
-)
-
-def LLM_extraction(data):
-    # print(data)
-    response = data.text
-    if response.startswith("```json"):
-        response = response[7:]  # Remove ```json
-    if response.startswith("```"):
-        response = response[3:]  # Remove ```
-    if response.endswith("```"):
-        response = response[:-3]  # Remove trailing ```
-    response = json.loads(response)
-    # print("d=>",response)
-    return response
-
-
-async def call_LLM(prompt,times_called):
-    print("🤖 calling LLM => ")
-    chat = model.start_chat(history=chat_history)
-    res = chat.send_message(prompt)
-    # print(res)
-    response = LLM_extraction(res)
-    print("response:",response)
-    tool_res = await execute_tool(response["tool"], response["input_data"])
-    # print(tool_res,"\n")
-    if times_called == 0: 
-        chat_history.append({"role": "user", "parts": [prompt]})
-
-    if(len(chat_history) > 30): # if chat history gets very large
-        del chat_history[:2]
-
-    if tool_res != 'stop_agent':
-        # await asyncio.sleep(1)
-        tool_res = await call_LLM(response["next_command"],times_called+1)
-    return 'task done'
-
-
-async def execute_tool(tool, input_data):    
-    match tool:
-        case 'execute_cmd_command':
-            res = await execute_cmd_command(json.dumps(input_data))
-            chat_history.append({"role": "model", "parts": [res]})
-            return res
-        case 'open_file':
-            res = await open_file(json.dumps(input_data))
-            chat_history.append({"role": "model", "parts": [res]})
-            return res
-        case 'open_app':
-            res = await open_app(json.dumps(input_data))
-            chat_history.append({"role": "model", "parts": [res]})
-            return res
-        case 'open_website':
-            res = await open_website(json.dumps(input_data))
-            chat_history.append({"role": "model", "parts": [res]})
-            return res
-        case 'press_keyboard_key':
-            res = await press_keyboard_key(json.dumps(input_data))
-            chat_history.append({"role": "model", "parts": [res]})
-            return res
-        case 'write_content':
-            res = await write_content(json.dumps(input_data))
-            chat_history.append({"role": "model", "parts": [res]})
-            return res
-        case 'move_mouse_pointer':
-            res = await move_mouse_pointer(json.dumps(input_data))
-            print("respo ",res)
-            chat_history.append({"role": "model", "parts": [res]})
-            return res
-        case 'click_mouse_buttons':
-            res = await click_mouse_buttons(json.dumps(input_data))
-            chat_history.append({"role": "model", "parts": [res]})
-            return res
-        case 'give_screenshot':
-            res = await give_screenshot(json.dumps(input_data))
-            image_part = {
-                "inline_data": {
-                    "data": res["image_base64"],
-                    "mime_type": "image/png"
-                }
-            }
-            dimensions = f"Screen width: {res['width']}, height: {res['height']}"
-            chat_history.append({"role": "user", "parts": [image_part, {"text": dimensions}]})
-            return "screenshot captured successfully"
-        case 'give_valid_command':
-            print('Invalid command - please rephrase your request')
-            return 'Invalid command received'
-        case 'stop':
-            res = 'stop_agent' 
-            chat_history.append({"role": "model", "parts": [res]})
-            return res
-        case _:
-            return f'Error: Unknown tool: {tool}'
-
-
-                
\ No newline at end of file
+'''LLM.py (to call LLM)'''
+
+import os
+import json
+import asyncio
+from PIL import Image
+from dotenv import load_dotenv
+from agent_runner import AgentSession, AgentRunner
+from history_manager import HistoryManager
+from providers import create_provider
+from response_parser import action_schema, parse_action
+from plan_cache import PlanCache
+from tool_registry import tool, dispatch, schema_parameters, tool_docs, TOOLS
+import tools  # importing registers the desktop tools
+
+load_dotenv() 
+
+WORKING_DIR = os.getenv('WORKING_DIRECTORY', os.getcwd())
+GEMINI_API_KEY=os.getenv('GEMINI_API_KEY')
+LLM_PROVIDER = os.getenv('LLM_PROVIDER', 'gemini')
+LLM_MODEL = os.getenv('LLM_MODEL')
+LLM_BASE_URL = os.getenv('LLM_BASE_URL')
+LLM_API_KEY = os.getenv('LLM_API_KEY')
+
+MAX_AGENT_STEPS = int(os.getenv('MAX_AGENT_STEPS', 40))
+LLM_TIMEOUT = float(os.getenv('LLM_TIMEOUT', 60))
+LLM_STREAM = os.getenv('LLM_STREAM', '1') == '1'
+HISTORY_MAX_BYTES = int(os.getenv('HISTORY_MAX_BYTES', 2_000_000))
+HISTORY_MAX_TOKENS = int(os.getenv('HISTORY_MAX_TOKENS', 100_000))
+LLM_STRUCTURED_OUTPUT = os.getenv('LLM_STRUCTURED_OUTPUT', '1') == '1'
+PROMPT_CACHE = os.getenv('PROMPT_CACHE', '1') == '1'
+PROMPT_CACHE_TTL = int(os.getenv('PROMPT_CACHE_TTL', 3600))
+PLAN_CACHE = os.getenv('PLAN_CACHE', '1') == '1'
+PLAN_CACHE_TTL = int(os.getenv('PLAN_CACHE_TTL', 24 * 3600))
+PLAN_CACHE_SIZE = int(os.getenv('PLAN_CACHE_SIZE', 100))
+PLAN_CACHE_FILE = os.getenv('PLAN_CACHE_FILE') or None
+
+# tools whose outcome depends on what is on screen, so plans using them are not replayed
+SCREEN_DEPENDENT_TOOLS = ('give_screenshot', 'move_mouse_pointer', 'click_mouse_buttons', 'click_at', 'click_element', 'give_valid_command')
+
+chat_history = []
+history_manager = HistoryManager(max_bytes=HISTORY_MAX_BYTES, max_tokens=HISTORY_MAX_TOKENS)
+plan_cache = PlanCache(max_entries=PLAN_CACHE_SIZE, ttl=PLAN_CACHE_TTL, path=PLAN_CACHE_FILE) if PLAN_CACHE else None
+current_runner = None
+
+@tool(example={"reason": "Unrecognized command. Please provide a clear automation task."})
+async def give_valid_command(reason: str = ""):
+    """Report that the request is unclear or cannot be processed"""
+    print('Invalid command - please rephrase your request')
+    return 'Invalid command received'
+
+
+@tool(example={"actions": [{"tool": "open_app", "input_data": {"app_name": "notepad"}},
+                           {"tool": "write_content", "input_data": {"content": "Hello"}},
+                           {"tool": "press_keyboard_key", "input_data": {"keys_to_press": ["enter"]}}]})
+async def run_actions(actions: list):
+    """Run several tool actions in order within one response (for deterministic sequences)
+    The batch stops early when an action fails.
+    Mark an action with "needs_screen": true when you must see the screen after it before continuing;
+    the batch stops after that action (give_screenshot always ends the batch).
+    You receive the result of every action that ran.
+    """
+    return await execute_actions(actions)
+
+
+@tool(example={"message": "Completed folder creation and opened in VS Code"})
+async def stop(message: str = ""):
+    """End task with summary"""
+    return 'stop_agent'
+
+
+TOOL_DOCS = tool_docs()
+
+SYSTEM_PROMPT = f"""
+You are a Continuous Windows Desktop Automation AI Assistant that autonomously performs desktop operations step-by-step while maintaining full context between actions.
+
+CRITICAL: You MUST respond with ONLY valid JSON. 
+- Do NOT wrap responses in markdown or code blocks.
+- Do NOT use triple backticks.
+- Response must start with {{ and end with }}.
+
+========================================================
+## CONTINUOUS OPERATION MODE:
+- You operate continuously and autonomously without waiting for confirmation.
+- You maintain full context across multiple commands.
+- You plan and execute tasks step-by-step until fully complete.
+- You perform one tool action (or one batch of actions via 'run_actions') per response and immediately plan the next.
+- After each action you receive the tool result followed by your own "next_command".
+- Once the entire task is complete, you MUST call the 'stop' tool with a one-line completion message.
+========================================================
+
+========================================================
+## WORKING DIRECTORY CONTEXT:
+- All file and folder operations occur inside: {WORKING_DIR}
+- Always remember paths and files you create for later use.
+- Keep track of opened files, folders, or applications for continuity.
+========================================================
+
+========================================================
+## AVAILABLE TOOLS:
+{TOOL_DOCS}
+========================================================
+
+========================================================
+## MOUSE EFFICIENCY RULES:
+1. Before performing any mouse movement or click, always call 'give_screenshot' first (if screen context is required).
+2. Always compute relative coordinates (x, y) using percentages — never use pixel values directly.
+3. When identifying on-screen elements, reason based on visual layout or positional assumptions.
+4. To click something use 'click_at' (moves and clicks in one action); use 'move_mouse_pointer' + 'click_mouse_buttons' only when you need to hover first.
+5. If the target is in the UI element list of the last screenshot, prefer 'click_element' with its number over computing coordinates.
+6. To close apps or interact with UI, rely on mouse clicks instead of CMD process kills.
+7. If unsure where to click or move, call 'give_screenshot' and stop with explanation.
+========================================================
+
+========================================================
+## OPERATION FLOW:
+Plan → Execute first action → Execute next action → ... → Stop
+========================================================
+
+========================================================
+## STRICT RULES:
+1. Each response must contain exactly ONE JSON object (use 'run_actions' to chain several actions whose outcome you can predict without looking at the screen).
+2. No markdown, no explanations, no plain text.
+3. Always include:
+   - "tool"
+   - "input_data"
+   - "next_command"
+4. Work continuously until task completion.
+5. For unclear requests, respond with 'give_valid_command' and then 'stop'.
+6. Use 'stop' after all steps are finished.
+7. Never use CMD commands to kill apps or move mouse — always use mouse tools.
+8. Always interpret screenshot size correctly when computing mouse coordinates.
+9. If any step depends on screen content, first request a screenshot.
+10. Always describe clearly what the next command should do.
+11. When an app, page or file needs time to appear, use 'wait_until' instead of taking screenshots until it does.
+12. Create files with 'write_into_file' (one file) or 'write_files' (several files, e.g. a whole website or project) instead of opening an editor and typing.
+========================================================
+
+========================================================
+## for whatsapp searching
+1. For searching in any app use control + f keyboard shortcut
+========================================================
+
+
+========================================================
+## JSON RESPONSE FORMAT:
+{{
+  "tool": "name of tool",
+  "input_data": {{
+    // tool-specific parameters in JSON
+  }},
+  "next_command": "description of next action or 'stop agent'"
+}}
+========================================================
+
+========================================================
+## FOR INVALID OR UNCLEAR REQUESTS:
+{{
+  "tool": "give_valid_command",
+  "input_data": {{
+    "reason": "why the request cannot be processed"
+  }},
+  "next_command": "stop agent"
+}}
+========================================================
+
+========================================================
+## EXAMPLES
+
+### Example 1 – Multi-step Task:
+User: "Create a folder called 'sorting-project', make a Python file with insertion sort, and open it in VS Code"
+
+Response 1:
+{{
+  "tool": "execute_cmd_command",
+  "input_data": {{
+    "command": "mkdir \\"{WORKING_DIR}\\\\sorting-project\\""
+  }},
+  "next_command": "create insertion_sort.py file"
+}}
+
+Response 2:
+{{
+  "tool": "write_into_file",
+  "input_data": {{
+    "file_path": "{WORKING_DIR}\\\\sorting-project\\\\insertion_sort.py",
+    "content": "def insertion_sort(arr):\\n    for i in range(1, len(arr)):\\n        key = arr[i]\\n        j = i - 1\\n        while j >= 0 and arr[j] > key:\\n            arr[j + 1] = arr[j]\\n            j -= 1\\n        arr[j + 1] = key\\n    return arr"
+  }},
+  "next_command": "open folder in VS Code"
+}}
+
+Response 3:
+{{
+  "tool": "execute_cmd_command",
+  "input_data": {{
+    "command": "code \\"{WORKING_DIR}\\\\sorting-project\\""
+  }},
+  "next_command": "stop agent"
+}}
+
+Response 4:
+{{
+  "tool": "stop",
+  "input_data": {{
+    "message": "Created sorting-project folder, added insertion_sort.py, and opened it in VS Code"
+  }},
+  "next_command": "task ended"
+}}
+
+### Example 2 – Simple Task:
+User: "Open YouTube"
+
+Response:
+{{
+  "tool": "open_website",
+  "input_data": {{
+    "website": "https://www.youtube.com/"
+  }},
+  "next_command": "stop agent"
+}}
+
+### Example 3 – Batched Task:
+User: "Open notepad and write hello"
+
+Response:
+{{
+  "tool": "run_actions",
+  "input_data": {{
+    "actions": [
+      {{"tool": "open_app", "input_data": {{"app_name": "notepad"}}}},
+      {{"tool": "write_content", "input_data": {{"content": "hello"}}}}
+    ]
+  }},
+  "next_command": "stop agent"
+}}
+
+### Example 4 – Invalid Request:
+User: "asdfghjkl"
+
+Response:
+{{
+  "tool": "give_valid_command",
+  "input_data": {{
+    "reason": "Unrecognized command. Please provide a clear automation task."
+  }},
+  "next_command": "stop agent"
+}}
+========================================================
+
+========================================================
+## REMEMBER:
+- Respond ONLY with valid JSON.
+- Each step = exactly ONE tool action, or ONE 'run_actions' batch for predictable sequences.
+- Indicate the next action in "next_command".
+- Use screenshots for all visual or mouse-based tasks.
+- Stop when the full task is done.
+========================================================
+"""
+
+
+provider = create_provider(
+    LLM_PROVIDER,
+    SYSTEM_PROMPT,
+    model_name=LLM_MODEL,
+    base_url=LLM_BASE_URL,
+    api_key=LLM_API_KEY or (GEMINI_API_KEY if LLM_PROVIDER == 'gemini' else None),
+    prompt_cache=PROMPT_CACHE,
+    cache_ttl=PROMPT_CACHE_TTL,
+    response_schema=action_schema(list(TOOLS), schema_parameters()) if LLM_STRUCTURED_OUTPUT else None
+)
+
+async def call_LLM(prompt):
+    global current_runner
+    command = prompt  # the plan is remembered under what the user said, not the note added below
+    if plan_cache:
+        plan = plan_cache.get(prompt)
+        if plan:
+            outcome, failure = await replay_plan(prompt, plan)
+            if outcome:
+                return outcome
+            prompt = f"{prompt}\n(Note: a remembered plan for this command was replayed and failed: {failure})"
+
+    print("🤖 calling LLM => ")
+    tools.screen_capture.reset()  # the first screenshot of a task is always a full frame
+    session = AgentSession(await provider.get_model(), chat_history, timeout=LLM_TIMEOUT, history_manager=history_manager)
+    current_runner = AgentRunner(session, execute_tool, parse_action, max_steps=MAX_AGENT_STEPS, stream=LLM_STREAM)
+    try:
+        outcome = await current_runner.run(prompt)
+        if plan_cache and outcome == 'task done' and is_replayable(current_runner.actions):
+            plan_cache.record(command, [(tool, input_data) for tool, input_data, _ in current_runner.actions])
+        return outcome
+    finally:
+        current_runner = None
+
+
+def is_replayable(actions):
+    """A plan can be cached if every step succeeded and none depended on the screen"""
+    for tool, input_data, res in actions:
+        if tool in SCREEN_DEPENDENT_TOOLS or is_error_result(res):
+            return False
+        if tool == 'run_actions' and any(a.get("tool") in SCREEN_DEPENDENT_TOOLS for a in input_data.get("actions", [])):
+            return False
+    return True
+
+
+async def replay_plan(prompt, plan):
+    """Run a cached plan without the LLM; returns (outcome, None) or (None, failure) after invalidating it"""
+    print("♻️ replaying remembered plan =>", [tool for tool, _ in plan])
+    for tool, input_data in plan:
+        res = await execute_tool(tool, input_data)
+        if is_error_result(res):
+            print("⚠️ remembered plan failed, asking the LLM instead =>", res)
+            plan_cache.invalidate(prompt)
+            return None, f"{tool}: {res}"
+        if res == 'stop_agent':
+            break
+    chat_history.append({"role": "user", "parts": [prompt]})
+    chat_history.append({"role": "model", "parts": [json.dumps({"tool": "stop", "input_data": {"message": "replayed remembered plan"}, "next_command": "task ended"})]})
+    return 'task done (remembered plan)', None
+
+
+def cancel_task():
+    """Cancel the task that is currently running; False if no agent run was in progress"""
+    if current_runner:
+        current_runner.cancel()
+        return True
+    return False
+
+
+async def execute_tool(tool, input_data):
+    return await dispatch(tool, input_data)
+
+
+def is_error_result(res):
+    """True if a tool result reports a failure; a shell command's by its exit code"""
+    if isinstance(res, tools.CommandOutput):
+        return res.failed
+    return isinstance(res, str) and res.lower().startswith(("error", "invalid"))
+
+
+async def execute_actions(actions):
+    """Run a batch of actions in order, stopping on an error or after an action that needs fresh screen context"""
+    for i, action in enumerate(actions, 1):
+        if not isinstance(action, dict) or not isinstance(action.get("tool"), str):
+            return f"error in tool(run_actions) => action {i} must be an object with a \"tool\" name and \"input_data\"; nothing was run"
+    lines = []
+    parts = []
+    for i, action in enumerate(actions, 1):
+        tool = action.get("tool")
+        if tool == 'run_actions':
+            res = 'Error: run_actions cannot be nested'
+        else:
+            res = await execute_tool(tool, action.get("input_data", {}))
+        if res == 'stop_agent':
+            return res
+        if isinstance(res, list):  # screenshot parts
+            parts = res
+            res = "screenshot captured"
+        lines.append(f"{i}. {tool}: {res}")
+
+        skipped = len(actions) - i
+        if is_error_result(res):
+            lines.insert(0, f"error in tool(run_actions) => action {i} ({tool}) failed; {skipped} remaining action(s) skipped")
+            break
+        if skipped and (parts or action.get("needs_screen")):
+            lines.append(f"stopped for fresh screen context; {skipped} remaining action(s) skipped")
+            break
+    print("batch results:", lines)
+    summary = "\n".join(lines)
+    return [summary] + parts if parts else summary
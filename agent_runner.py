@@ -0,0 +1,254 @@
+'''agent_runner.py (iterative step loop for the agent)'''
+
+import time
+import asyncio
+from dataclasses import dataclass
+from response_parser import StreamingActionParser, normalize_action
+from history_manager import HistoryManager, payload_size
+
+
+REASK_PROMPT = ("Your previous response could not be parsed ({error}). "
+                "Reply again with only the JSON object for that step, with \"tool\", \"input_data\" and \"next_command\".")
+
+
+@dataclass
+class StepRecord:
+    """Timing of one agent step (all values in ms, measured from the start of the LLM request)"""
+    step: int
+    tool: str
+    llm_ms: float       # full response received
+    dispatch_ms: float  # tool started (before llm_ms when streaming)
+    tool_ms: float      # time spent in the tool itself
+    payload_bytes: int = 0
+    payload_tokens: int = 0
+    ttft_ms: float = 0    # first token received
+    input_tokens: int = 0  # billed input tokens (cached tokens excluded)
+    cached_tokens: int = 0
+
+
+class AgentSession:
+    """One chat session kept alive for a whole task
+
+    The history list is shared with the caller (LLM.chat_history) so context
+    carries over between voice commands.
+    """
+
+    def __init__(self, model, history, timeout=60, history_manager=None):
+        self.model = model
+        self.history = history
+        self.timeout = timeout
+        self.history_manager = history_manager or HistoryManager()
+        self.last_payload = (0, 0)
+        self.last_usage = (0, 0)
+        self.first_token_at = None
+
+    def _prepare(self, parts):
+        """Add the user turn, compact history to the budget and return the contents to send"""
+        user_turn = {"role": "user", "parts": parts}
+        self.history.append(user_turn)
+        self.history_manager.compact(self.history)
+        self.last_payload = payload_size(self.history)
+        return user_turn, list(self.history)
+
+    def _record_usage(self, res):
+        """Keep (billed input tokens, cached tokens) from the response usage metadata"""
+        usage = getattr(res, "usage_metadata", None)
+        if usage:
+            cached = getattr(usage, "cached_content_token_count", 0) or 0
+            self.last_usage = (usage.prompt_token_count - cached, cached)
+
+    def _discard(self, user_turn):
+        """Forget a user turn whose request failed"""
+        if self.history and self.history[-1] is user_turn:
+            self.history.pop()
+
+    async def send_message(self, parts):
+        """Send one user turn without blocking the event loop and record both sides of the exchange"""
+        user_turn, contents = self._prepare(parts)
+        self.first_token_at = None
+        try:
+            res = await asyncio.wait_for(
+                self.model.generate_content_async(contents, request_options={"timeout": self.timeout}),
+                timeout=self.timeout
+            )
+        except BaseException:
+            self._discard(user_turn)
+            raise
+        self.first_token_at = time.perf_counter()
+        self._record_usage(res)
+        self.history.append({"role": "model", "parts": [res.text]})
+        return res
+
+    async def stream_message(self, parts):
+        """Send one user turn and yield the reply text chunk by chunk as it arrives"""
+        user_turn, contents = self._prepare(parts)
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.timeout
+        self.first_token_at = None
+        chunks = []
+        try:
+            res = await asyncio.wait_for(
+                self.model.generate_content_async(contents, stream=True, request_options={"timeout": self.timeout}),
+                timeout=self.timeout
+            )
+            iterator = res.__aiter__()
+            while True:
+                try:
+                    chunk = await asyncio.wait_for(iterator.__anext__(), timeout=max(deadline - loop.time(), 0))
+                except StopAsyncIteration:
+                    break
+                self._record_usage(chunk)
+                if not chunk.parts:  # e.g. the final chunk carrying only the finish reason
+                    continue
+                if self.first_token_at is None:
+                    self.first_token_at = time.perf_counter()
+                chunks.append(chunk.text)
+                yield chunk.text
+        except BaseException:
+            self._discard(user_turn)
+            raise
+        self.history.append({"role": "model", "parts": ["".join(chunks)]})
+
+
+def tool_result_parts(tool, tool_res):
+    """Turn a tool result into message parts for the next step"""
+    if isinstance(tool_res, list):  # tools like give_screenshot return ready-made parts
+        return list(tool_res)
+    return [f"Result of {tool}: {tool_res}"]
+
+
+class AgentRunner:
+    """Drives the tool loop step by step until 'stop', the step budget or cancel()
+
+    With stream=True the response is parsed as it arrives and the tool starts
+    as soon as "tool" and "input_data" are complete, while "next_command" is
+    still being generated. A reply that parse_response rejects (ValueError) is
+    re-asked up to max_reasks times within the same step.
+    """
+
+    def __init__(self, session, execute_tool, parse_response, max_steps=40, stream=True, max_reasks=2):
+        self.session = session
+        self.execute_tool = execute_tool
+        self.parse_response = parse_response
+        self.max_steps = max_steps
+        self.stream = stream
+        self.max_reasks = max_reasks
+        self.steps = []
+        self.actions = []  # (tool, input_data, result) for every step that ran
+        self.cancelled = False
+        self.loop = None
+        self.request = None
+
+    def cancel(self):
+        """Stop the runner, aborting the in-flight step (safe to call from any thread)"""
+        self.cancelled = True
+        request = self.request
+        if self.loop and request:
+            self.loop.call_soon_threadsafe(request.cancel)
+
+    async def _request(self, step, message):
+        """Run one step as a cancellable task; returns None if cancel() interrupted it"""
+        self.request = asyncio.ensure_future(self._step(step, message))
+        try:
+            return await self.request
+        except asyncio.CancelledError:
+            if not self.cancelled:  # we were cancelled from outside, not by cancel()
+                raise
+            return None
+        finally:
+            self.request = None
+
+    async def _step(self, step, message):
+        """One LLM request (re-asked locally if the reply can't be parsed) plus its tool call; returns (response, tool_res)"""
+        started = time.perf_counter()
+        for attempt in range(self.max_reasks + 1):
+            try:
+                if self.stream:
+                    response, tool_task, dispatched = await self._stream_response(message)
+                else:
+                    res = await self.session.send_message(message)
+                    response, tool_task, dispatched = self.parse_response(res.text), None, None
+                break
+            except ValueError as err:
+                if attempt == self.max_reasks:
+                    raise
+                print(f"⚠️ could not parse LLM response, asking again => {err}")
+                message = [REASK_PROMPT.format(error=err)]
+        llm_done = time.perf_counter()
+        print("response:", response)
+
+        if tool_task is None:
+            dispatched = llm_done
+            tool_res, tool_ms = await self._timed_tool(response["tool"], response["input_data"])
+        else:
+            tool_res, tool_ms = await tool_task
+        self.actions.append((response["tool"], response["input_data"], tool_res))
+
+        payload_bytes, payload_tokens = self.session.last_payload
+        input_tokens, cached_tokens = self.session.last_usage
+        first_token_at = self.session.first_token_at or llm_done
+        record = StepRecord(step, response["tool"], (llm_done - started) * 1000,
+                            (dispatched - started) * 1000, tool_ms,
+                            payload_bytes, payload_tokens,
+                            (first_token_at - started) * 1000, input_tokens, cached_tokens)
+        self.steps.append(record)
+        print(f"⏱️ step {step} ({record.tool}): first token {record.ttft_ms:.0f} ms, llm {record.llm_ms:.0f} ms, "
+              f"tool started at {record.dispatch_ms:.0f} ms, tool {record.tool_ms:.0f} ms, "
+              f"payload {record.payload_bytes / 1024:.0f} KB, "
+              f"input tokens {record.input_tokens} billed / {record.cached_tokens} cached")
+        return response, tool_res
+
+    async def _timed_tool(self, tool, input_data):
+        started = time.perf_counter()
+        tool_res = await self.execute_tool(tool, input_data)
+        return tool_res, (time.perf_counter() - started) * 1000
+
+    async def _stream_response(self, message):
+        """Stream the reply, dispatching the tool early; returns (response, tool_task, dispatch_time)"""
+        parser = StreamingActionParser()
+        tool_task = None
+        dispatched = None
+        try:
+            async for chunk in self.session.stream_message(message):
+                parser.feed(chunk)
+                if tool_task is None and parser.has("tool", "input_data"):
+                    dispatched = time.perf_counter()
+                    tool_task = asyncio.ensure_future(self._timed_tool(parser.fields["tool"], parser.fields["input_data"]))
+            try:
+                response = parser.result()
+            except ValueError:
+                if tool_task is None:
+                    response = self.parse_response(parser.buffer)
+                else:  # the tool already started from complete fields, keep what was parsed
+                    response = normalize_action(dict(parser.fields))
+        except BaseException:
+            if tool_task:
+                tool_task.cancel()
+            raise
+        return response, tool_task, dispatched
+
+    async def run(self, prompt):
+        """Run the task described by prompt and return a one-line outcome"""
+        self.loop = asyncio.get_running_loop()
+        message = [prompt]
+        for step in range(1, self.max_steps + 1):
+            if self.cancelled:
+                print("⏹️ task cancelled")
+                return 'task cancelled'
+
+            try:
+                result = await self._request(step, message)
+            except asyncio.TimeoutError:
+                print(f"⚠️ LLM request timed out after {self.session.timeout}s")
+                return 'task stopped: LLM request timed out'
+            if result is None:
+                print("⏹️ task cancelled")
+                return 'task cancelled'
+
+            response, tool_res = result
+            if tool_res == 'stop_agent':
+                return 'task done'
+            message = tool_result_parts(response["tool"], tool_res) + [response["next_command"]]
+
+        print(f"⚠️ step budget of {self.max_steps} exhausted")
+        return f'task stopped after {self.max_steps} steps'
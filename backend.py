@@ -1,187 +1,251 @@
-'''backend.py (backend logic)'''
-
-import speech_recognition as sr
-import pyttsx3
-import threading
-import asyncio
-from typing import Callable, Optional, List
-from LLM import call_LLM
-
-
-class VoiceRecognitionBackend:
-    """Backend class for voice recognition and text-to-speech"""
-    
-    def __init__(self):
-        """Initialize the voice recognition backend"""
-        self.recognizer = sr.Recognizer()
-        self.engine = None
-        self.is_listening = False
-        self.listening_thread = None
-        self.loop = None
-        
-        # Callbacks
-        self.on_text_recognized: Optional[Callable[[str], None]] = None
-        self.on_status_update: Optional[Callable[[str, str], None]] = None
-        self.on_error: Optional[Callable[[str], None]] = None
-        
-        # Initialize TTS engine
-        self._init_tts_engine()
-        
-    def _init_tts_engine(self):
-        """Initialize text-to-speech engine with error handling"""
-        try:
-            self.engine = pyttsx3.init()
-            self.engine.setProperty('rate', 150)  # Speed
-            self.engine.setProperty('volume', 0.9)  # Volume
-        except Exception as e:
-            self.engine = None
-            print(f"TTS initialization error: {e}")
-            
-    def set_callbacks(self, 
-                     on_text_recognized: Optional[Callable[[str], None]] = None,
-                     on_status_update: Optional[Callable[[str, str], None]] = None,
-                     on_error: Optional[Callable[[str], None]] = None):
-        """Set callback functions for events"""
-        if on_text_recognized:
-            self.on_text_recognized = on_text_recognized
-        if on_status_update:
-            self.on_status_update = on_status_update
-        if on_error:
-            self.on_error = on_error
-            
-    def _emit_status(self, message: str, color: str = "#2196F3"):
-        """Emit status update"""
-        if self.on_status_update:
-            self.on_status_update(message, color)
-            
-    def _emit_text(self, text: str):
-        """Emit recognized text"""
-        if self.on_text_recognized:
-            self.on_text_recognized(text)
-            
-    def _emit_error(self, error: str):
-        """Emit error"""
-        if self.on_error:
-            self.on_error(error)
-            
-    def speak(self, text: str):
-        """Text to speech in a separate thread"""
-        if not self.engine:
-            print("TTS engine not available")
-            return
-            
-        def speak_thread():
-            try:
-                self.engine.say(text)
-                self.engine.runAndWait()
-            except Exception as e:
-                print(f"Speech error: {e}")
-        
-        thread = threading.Thread(target=speak_thread, daemon=True)
-        thread.start()
-        
-    async def _listen_continuous(self):
-        """Continuous listening with async event loop"""
-        while self.is_listening:
-            try:
-                mic = sr.Microphone()
-                    
-                with mic as source:
-                    self._emit_status("🎧 Listening... Speak now!", "#2196F3")
-                    self.recognizer.adjust_for_ambient_noise(source, duration=0.5)
-                    # Run blocking operation in executor
-                    audio = await self.loop.run_in_executor(
-                        None,
-                        lambda: self.recognizer.listen(source, timeout=2, phrase_time_limit=5)
-                    )
-                
-                # Recognize speech
-                self._emit_status("🔄 Processing your speech...", "#FF9800")
-                text = await self.loop.run_in_executor(
-                    None,
-                    lambda: self.recognizer.recognize_google(audio)
-                )
-                print(f"Recognized: {text}")
-                
-                # Calling LLM
-                res = ""
-                if text != "":
-                    res = await call_LLM(text,0)
-                
-                self._emit_text(text)
-                self._emit_text(res)
-                self._emit_status(f"✅ Recognized: {text}", "#4CAF50")
-                
-            except sr.WaitTimeoutError:
-                self._emit_status("⏱️ No speech detected, still listening...", "#FF9800")
-            except sr.UnknownValueError:
-                self._emit_status("❓ Could not understand, please speak clearly", "#FF5722")
-            except sr.RequestError as e:
-                self._emit_error(f"Network error: {str(e)}\n\nPlease check your internet connection.")
-                self.is_listening = False
-                break
-            except Exception as e:
-                self._emit_error(f"Error: {str(e)}")
-                self.is_listening = False
-                break
-                
-            # Small delay between iterations
-            await asyncio.sleep(0.1)
-    
-    def _run_async_loop(self):
-        """Create and run event loop in thread"""
-        self.loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(self.loop)
-        try:
-            self.loop.run_until_complete(self._listen_continuous())
-        finally:
-            self.loop.close()
-            self.loop = None
-                
-    def start_listening(self):
-        """Start listening for speech"""
-        if not self.is_listening:
-            self.is_listening = True
-            self.listening_thread = threading.Thread(
-                target=self._run_async_loop,
-                daemon=True
-            )
-            self.listening_thread.start()
-            return True
-        return False
-            
-    def stop_listening(self):
-        """Stop listening for speech"""
-        if self.is_listening:
-            self.is_listening = False
-            if self.loop:
-                # Stop the event loop from the main thread
-                self.loop.call_soon_threadsafe(self.loop.stop)
-            if self.listening_thread:
-                self.listening_thread.join(timeout=3)
-            self._emit_status("⏹️ Stopped listening", "#757575")
-            return True
-        return False
-        
-    def test_speech(self):
-        """Test text-to-speech functionality"""
-        if self.engine:
-            self.speak("Hello! This is a test of the text to speech system. The voice recognition is working properly.")
-            self._emit_status("🔊 Testing text-to-speech...", "#2196F3")
-            return True
-        else:
-            self._emit_error("Text-to-speech engine is not available.")
-            return False
-            
-    def is_tts_available(self) -> bool:
-        """Check if text-to-speech is available"""
-        return self.engine is not None
-        
-    def cleanup(self):
-        """Clean up resources"""
-        self.stop_listening()
-        if self.engine:
-            try:
-                self.engine.stop()
-            except:
+'''backend.py (backend logic)'''
+
+import os
+import pyttsx3
+import threading
+import asyncio
+import time
+import glob
+from typing import Callable, Optional, List
+from LLM import call_LLM, cancel_task
+from tools import shell_session
+from microphone import MicrophoneStream
+from vad import Segmenter, next_utterance
+from speech_engines import make_engine, SpeechEngineError
+from voice_pipeline import VoicePipeline, STOP_WORDS as DEFAULT_STOP_WORDS
+from wake_word import WakeWordDetector
+
+
+STT_ENGINE = os.getenv('STT_ENGINE', 'google')
+STT_FALLBACK = os.getenv('STT_FALLBACK', '')
+STT_LANGUAGE = os.getenv('STT_LANGUAGE', 'en-US')
+VOSK_MODEL = os.getenv('VOSK_MODEL', 'model')
+WHISPER_MODEL = os.getenv('WHISPER_MODEL', 'base.en')
+VAD_END_SILENCE = float(os.getenv('VAD_END_SILENCE', '0.5'))
+VAD_MAX_SECONDS = float(os.getenv('VAD_MAX_SECONDS', '30'))
+STOP_WORDS = tuple(w.strip().lower() for w in os.getenv('STOP_WORDS', ','.join(DEFAULT_STOP_WORDS)).split(',') if w.strip())
+WAKE_WORD_DIR = os.getenv('WAKE_WORD_DIR', 'wake_word')  # recordings of the wake phrase; none = no wake word
+WAKE_PHRASE = os.getenv('WAKE_PHRASE', 'hey agent')
+WAKE_THRESHOLD = float(os.getenv('WAKE_THRESHOLD')) if os.getenv('WAKE_THRESHOLD') else None
+WAKE_WINDOW = float(os.getenv('WAKE_WINDOW', '8'))
+
+
+class VoiceRecognitionBackend:
+    """Backend class for voice recognition and text-to-speech"""
+    
+    def __init__(self):
+        """Initialize the voice recognition backend"""
+        self.microphone = MicrophoneStream()
+        self.segmenter = None
+        self.stt = None
+        self.wake = None
+        self.pipeline = None
+        self.listen_task = None
+        self.engine = None
+        self.is_listening = False
+        self.listening_thread = None
+        self.loop = None
+        
+        # Callbacks
+        self.on_text_recognized: Optional[Callable[[str], None]] = None
+        self.on_status_update: Optional[Callable[[str, str], None]] = None
+        self.on_error: Optional[Callable[[str], None]] = None
+        
+        # Initialize TTS engine
+        self._init_tts_engine()
+        
+    def _init_tts_engine(self):
+        """Initialize text-to-speech engine with error handling"""
+        try:
+            self.engine = pyttsx3.init()
+            self.engine.setProperty('rate', 150)  # Speed
+            self.engine.setProperty('volume', 0.9)  # Volume
+        except Exception as e:
+            self.engine = None
+            print(f"TTS initialization error: {e}")
+            
+    def set_callbacks(self, 
+                     on_text_recognized: Optional[Callable[[str], None]] = None,
+                     on_status_update: Optional[Callable[[str, str], None]] = None,
+                     on_error: Optional[Callable[[str], None]] = None):
+        """Set callback functions for events"""
+        if on_text_recognized:
+            self.on_text_recognized = on_text_recognized
+        if on_status_update:
+            self.on_status_update = on_status_update
+        if on_error:
+            self.on_error = on_error
+            
+    def _emit_status(self, message: str, color: str = "#2196F3"):
+        """Emit status update"""
+        if self.on_status_update:
+            self.on_status_update(message, color)
+            
+    def _emit_text(self, text: str):
+        """Emit recognized text"""
+        if self.on_text_recognized:
+            self.on_text_recognized(text)
+            
+    def _emit_error(self, error: str):
+        """Emit error"""
+        if self.on_error:
+            self.on_error(error)
+            
+    def speak(self, text: str):
+        """Text to speech in a separate thread"""
+        if not self.engine:
+            print("TTS engine not available")
+            return
+            
+        def speak_thread():
+            try:
+                self.engine.say(text)
+                self.engine.runAndWait()
+            except Exception as e:
+                print(f"Speech error: {e}")
+        
+        thread = threading.Thread(target=speak_thread, daemon=True)
+        thread.start()
+        
+    async def _agent_status_ticker(self, text: str):
+        """Keep the status line updated while the agent works (runs alongside call_LLM)"""
+        started = time.monotonic()
+        while True:
+            self._emit_status(f"🤖 Working on: {text} ({int(time.monotonic() - started)}s)", "#9C27B0")
+            await asyncio.sleep(1)
+            
+    async def _run_command(self, text: str):
+        """Carry out one recognized command with the agent"""
+        ticker = asyncio.ensure_future(self._agent_status_ticker(text))
+        try:
+            return await call_LLM(text)
+        finally:
+            ticker.cancel()
+
+    def _on_result(self, text: str, res: str):
+        self._emit_text(text)
+        self._emit_text(res)
+        self._emit_status(f"✅ Recognized: {text}", "#4CAF50")
+
+    def _capture(self):
+        """Next utterance from the microphone (blocking); None after a couple of seconds without speech"""
+        utterance = next_utterance(self.microphone, self.segmenter, timeout=2)
+        if utterance is None and not self.microphone.running:
+            raise OSError(f"microphone stream stopped: {self.microphone.error}")
+        return utterance
+
+    async def _listen_continuous(self):
+        """Continuous listening: capture, recognition and the agent run as concurrent stages"""
+        try:
+            # Open and calibrate the microphone once; it then stays open for the whole session
+            self._emit_status("🎚️ Calibrating microphone, please stay quiet...", "#2196F3")
+            await self.loop.run_in_executor(None, self.microphone.start)
+            self.segmenter = Segmenter(self.microphone.source.SAMPLE_RATE,
+                                       lambda: self.microphone.noise_floor.threshold,
+                                       end_silence=VAD_END_SILENCE, max_seconds=VAD_MAX_SECONDS)
+            if self.stt is None:
+                self._emit_status(f"⏳ Loading {STT_ENGINE} speech engine...", "#2196F3")
+                self.stt = await self.loop.run_in_executor(
+                    None,
+                    lambda: make_engine(STT_ENGINE, STT_FALLBACK, STT_LANGUAGE, VOSK_MODEL, WHISPER_MODEL)
+                )
+            if self.wake is None and glob.glob(os.path.join(WAKE_WORD_DIR, "*.wav")):
+                self.wake = WakeWordDetector.from_folder(WAKE_WORD_DIR, self.microphone.source.SAMPLE_RATE, WAKE_THRESHOLD)
+                print(f"👂 wake phrase '{WAKE_PHRASE}': {len(self.wake.templates)} recordings, threshold {self.wake.threshold:.2f}")
+        except SpeechEngineError as e:  # the engine could not be set up (package or model missing)
+            self._emit_error(f"Speech recognition error: {str(e)}")
+            self.is_listening = False
+            return
+        except Exception as e:
+            self._emit_error(f"Error: {str(e)}")
+            self.is_listening = False
+            return
+
+        self.pipeline = VoicePipeline(
+            self._capture,
+            lambda utterance: self.stt.transcribe(utterance.pcm, utterance.sample_rate),
+            self._run_command,
+            cancel_task,
+            stop_words=STOP_WORDS,
+            on_status=self._emit_status,
+            on_result=self._on_result,
+            on_error=self._emit_error,
+            wake=self.wake,
+            wake_phrase=WAKE_PHRASE,
+            wake_window=WAKE_WINDOW
+        )
+        if self.wake is not None:
+            self._emit_status(f"🎧 Listening... Say '{WAKE_PHRASE}' first!", "#2196F3")
+        else:
+            self._emit_status("🎧 Listening... Speak now!", "#2196F3")
+        try:
+            await self.pipeline.run()  # returns only if the microphone is lost
+        finally:
+            self.pipeline = None
+        self.is_listening = False
+
+    def _run_async_loop(self):
+        """Create and run event loop in thread"""
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.listen_task = self.loop.create_task(self._listen_continuous())
+        try:
+            self.loop.run_until_complete(self.listen_task)
+        except asyncio.CancelledError:
+            pass
+        finally:
+            self.listen_task = None
+            self.loop.run_until_complete(shell_session.close())
+            self.microphone.close()
+            self.segmenter = None
+            self.loop.close()
+            self.loop = None
+                
+    def start_listening(self):
+        """Start listening for speech"""
+        if not self.is_listening:
+            self.is_listening = True
+            self.listening_thread = threading.Thread(
+                target=self._run_async_loop,
+                daemon=True
+            )
+            self.listening_thread.start()
+            return True
+        return False
+            
+    def stop_listening(self):
+        """Stop listening for speech"""
+        if self.is_listening:
+            self.is_listening = False
+            cancel_task()
+            if self.loop and self.listen_task:
+                # Cancel the pipeline from the main thread
+                self.loop.call_soon_threadsafe(self.listen_task.cancel)
+            if self.listening_thread:
+                self.listening_thread.join(timeout=3)
+            self._emit_status("⏹️ Stopped listening", "#757575")
+            return True
+        return False
+        
+    def test_speech(self):
+        """Test text-to-speech functionality"""
+        if self.engine:
+            self.speak("Hello! This is a test of the text to speech system. The voice recognition is working properly.")
+            self._emit_status("🔊 Testing text-to-speech...", "#2196F3")
+            return True
+        else:
+            self._emit_error("Text-to-speech engine is not available.")
+            return False
+            
+    def is_tts_available(self) -> bool:
+        """Check if text-to-speech is available"""
+        return self.engine is not None
+        
+    def cleanup(self):
+        """Clean up resources"""
+        self.stop_listening()
+        if self.engine:
+            try:
+                self.engine.stop()
+            except:
                 pass
\ No newline at end of file
@@ -0,0 +1,877 @@
+'''benchmark.py (offline benchmarks for the agent loop)
+
+usage: python benchmark.py <name>
+'''
+
+import os
+import sys
+import json
+import time
+import asyncio
+
+from agent_runner import AgentSession, AgentRunner
+from history_manager import HistoryManager
+from prompt_cache import PromptCache
+from providers import OpenAICompatibleProvider
+from response_parser import parse_action
+from fake_model import FakeModel, FakeCacheBackend, serve_openai_fixture
+from tool_registry import TOOLS, tool, dispatch
+from shell import CommandRunner, ShellSession
+from screen import ScreenCapture
+import waits
+from input_service import InputService
+import file_writer
+from microphone import MicrophoneStream, NoiseFloor, rms
+import speech_engines
+from vad import Segmenter
+from voice_pipeline import VoicePipeline, is_stop_command
+
+
+def fake_screen_image(width=1920, height=1080, wallpaper=False):
+    """A screen stand-in with some flat UI-like blocks, optionally over a textured wallpaper"""
+    from PIL import Image, ImageDraw
+
+    if wallpaper:
+        noise = Image.effect_noise((width // 8, height // 8), 60).resize((width, height), Image.Resampling.BICUBIC)
+        image = Image.merge("RGB", (noise, noise.rotate(180), Image.linear_gradient("L").resize((width, height))))
+    else:
+        image = Image.new("RGB", (width, height), "white")
+    draw = ImageDraw.Draw(image)
+    for i in range(40):
+        x, y = (i * 197) % width, (i * 89) % height
+        draw.rectangle([x, y, x + 180, y + 40], fill=((i * 50) % 255, (i * 80) % 255, (i * 30) % 255))
+        draw.text((x + 5, y + 5), f"button {i}", fill="black")
+    return image
+
+
+def fake_screenshot(width=1920, height=1080):
+    """A PNG screenshot stand-in, base64 encoded"""
+    import io
+    import base64
+
+    with io.BytesIO() as buffer:
+        fake_screen_image(width, height).save(buffer, format="PNG")
+        return base64.b64encode(buffer.getvalue()).decode("utf-8")
+
+
+SCREENSHOT = None
+
+
+async def fake_execute_tool(tool, input_data):
+    global SCREENSHOT
+    await asyncio.sleep(0 if tool == 'stop' else 0.1)  # pretend the desktop action takes 100 ms
+    if tool == 'give_screenshot':
+        SCREENSHOT = SCREENSHOT or fake_screenshot()
+        return [{"inline_data": {"data": SCREENSHOT, "mime_type": "image/png"}}, {"text": "Screen width: 1920, height: 1080"}]
+    return 'stop_agent' if tool == 'stop' else f"{tool} done"
+
+
+def fake_parse_response(text):
+    return json.loads(text)
+
+
+async def bench_event_loop(steps=5, latency=0.3, tick=0.02):
+    """Run a fake task and measure how late a 20 ms timer fires while completions are in flight"""
+    actions = [{"tool": "write_content", "input_data": {"content": "x"}, "next_command": "continue"}] * (steps - 1)
+    runner = AgentRunner(AgentSession(FakeModel(actions, latency), []), fake_execute_tool, fake_parse_response)
+
+    lags = []
+    async def ticker():
+        while True:
+            expected = time.perf_counter() + tick
+            await asyncio.sleep(tick)
+            lags.append(time.perf_counter() - expected)
+
+    ticker_task = asyncio.create_task(ticker())
+    started = time.perf_counter()
+    outcome = await runner.run("benchmark task")
+    total = time.perf_counter() - started
+    ticker_task.cancel()
+
+    print(f"outcome: {outcome} | {len(runner.steps)} steps in {total:.2f}s")
+    print(f"timer ticks: {len(lags)} | max lag {max(lags) * 1000:.1f} ms | avg lag {sum(lags) / len(lags) * 1000:.1f} ms")
+
+
+async def bench_cancel(latency=2.0):
+    """Cancel a task while a slow completion is in flight and measure how fast the runner returns"""
+    runner = AgentRunner(AgentSession(FakeModel([], latency), []), fake_execute_tool, fake_parse_response)
+    task = asyncio.create_task(runner.run("benchmark task"))
+    await asyncio.sleep(0.1)
+    started = time.perf_counter()
+    runner.cancel()
+    outcome = await task
+    print(f"outcome: {outcome} | returned {(time.perf_counter() - started) * 1000:.1f} ms after cancel()")
+
+
+async def bench_stream(steps=4, latency=0.3):
+    """Compare when the tool starts with and without streaming for actions with a long next_command"""
+    next_command = "then take a screenshot, find the search box near the top of the page and type the query " * 3
+    actions = [{"tool": "write_content", "input_data": {"content": "x"}, "next_command": next_command}] * (steps - 1)
+    for stream in (False, True):
+        runner = AgentRunner(AgentSession(FakeModel(actions, latency), []), fake_execute_tool,
+                             fake_parse_response, stream=stream)
+        started = time.perf_counter()
+        await runner.run("benchmark task")
+        total = time.perf_counter() - started
+        dispatch = sum(r.dispatch_ms for r in runner.steps) / len(runner.steps)
+        llm = sum(r.llm_ms for r in runner.steps) / len(runner.steps)
+        print(f"stream={stream}: tool started at {dispatch:.0f} ms avg | response done at {llm:.0f} ms avg | total {total:.2f}s")
+
+
+async def bench_history(steps=16):
+    """Payload per request for a screenshot-heavy task, with and without the history budget"""
+    actions = [{"tool": "give_screenshot", "input_data": {}, "next_command": "click the next button"}] * (steps - 1)
+    unlimited = HistoryManager(max_bytes=float("inf"), max_tokens=float("inf"), thumbnail_edge=10 ** 6)
+    for name, manager in (("unbudgeted", unlimited), ("budgeted", HistoryManager())):
+        runner = AgentRunner(AgentSession(FakeModel(actions, 0), [], history_manager=manager),
+                             fake_execute_tool, fake_parse_response)
+        await runner.run("benchmark task")
+        sizes = [r.payload_bytes for r in runner.steps]
+        print(f"{name}: last request {sizes[-1] / 1024:.0f} KB | total uploaded {sum(sizes) / 1024 / 1024:.1f} MB "
+              f"| ~{runner.steps[-1].payload_tokens} tokens in last request")
+
+
+async def bench_prompt_cache(steps=6, system_prompt="x" * 8000):
+    """Time to first token and billed input tokens per step with and without the cached system prompt"""
+    actions = [{"tool": "write_content", "input_data": {"content": "x"}, "next_command": "continue"}] * (steps - 1)
+    for cached in (False, True):
+        model = FakeModel(actions, latency=0.2, system_prompt=system_prompt, prefill_delay=0.0001)
+        if cached:
+            model = PromptCache(FakeCacheBackend(model), system_prompt).get_model()
+        runner = AgentRunner(AgentSession(model, []), fake_execute_tool, fake_parse_response)
+        await runner.run("benchmark task")
+        ttft = sum(r.ttft_ms for r in runner.steps) / len(runner.steps)
+        billed = sum(r.input_tokens for r in runner.steps) / len(runner.steps)
+        print(f"cached={cached}: first token {ttft:.0f} ms avg | {billed:.0f} billed input tokens per step")
+
+
+async def bench_openai_fixture(steps=5, latency=0.2):
+    """Run the agent loop against the OpenAI-compatible provider and a local fixture server"""
+    actions = [{"tool": "write_content", "input_data": {"content": "x"}, "next_command": "continue"}] * (steps - 1)
+    for stream in (False, True):
+        server = serve_openai_fixture(actions, latency)
+        try:
+            provider = OpenAICompatibleProvider("x" * 8000, base_url=f"http://127.0.0.1:{server.server_port}/v1")
+            runner = AgentRunner(AgentSession(await provider.get_model(), []), fake_execute_tool,
+                                 fake_parse_response, stream=stream)
+            outcome = await runner.run("benchmark task")
+        finally:
+            server.shutdown()
+        ttft = sum(r.ttft_ms for r in runner.steps) / len(runner.steps)
+        llm = sum(r.llm_ms for r in runner.steps) / len(runner.steps)
+        print(f"stream={stream}: {outcome} in {len(runner.steps)} steps | first token {ttft:.0f} ms avg "
+              f"| response {llm:.0f} ms avg | {runner.steps[-1].input_tokens} input tokens in last request")
+
+
+async def bench_repair():
+    """Glitchy model output: strict json.loads vs the repair parser with local re-ask"""
+    glitches = [
+        '```json\n{"tool": "write_content", "input_data": {"content": "a"}, "next_command": "continue"}\n```',
+        'Sure! {"tool": "write_content", "input_data": {"content": "b",}, "next_command": "continue",}',
+        "{'tool': 'write_content', 'input_data': {'content': 'c'}, 'next_command': 'continue'}",
+        'I will now type the text.',  # unusable, needs a re-ask
+        '{"tool": "write_content", "next_command": "continue"}',  # valid JSON without input_data
+        {"tool": "write_content", "input_data": {"content": "d"}, "next_command": "continue"},
+    ]
+    runs = (("json.loads, no re-ask", fake_parse_response, 0, False), ("parse_action + re-ask", parse_action, 2, False),
+            ("parse_action + re-ask, streamed", parse_action, 2, True))
+    for name, parse, reasks, stream in runs:
+        model = FakeModel(glitches, latency=0)
+        runner = AgentRunner(AgentSession(model, []), fake_execute_tool, parse, stream=stream, max_reasks=reasks)
+        try:
+            outcome = await runner.run("benchmark task")
+        except (ValueError, KeyError) as err:
+            outcome = f"aborted ({err.__class__.__name__})"
+        print(f"{name}: {outcome} | {len(runner.steps)} steps | {model.calls} model calls")
+
+
+async def bench_dispatch(calls=20000):
+    """Per-call dispatch overhead: JSON round trip of input_data vs registry validation and a direct call"""
+    @tool(example={"keys_to_press": ["ctrl", "c"]})
+    async def bench_keys(keys_to_press: list[str], delay: float = 0.05):
+        """Benchmark stand-in for press_keyboard_key"""
+        return f"{keys_to_press} pressed successfully"
+
+    input_data = {"keys_to_press": ["ctrl", "shift", "esc"], "delay": 0.05}
+
+    async def json_round_trip(tool_name, data):  # the old dispatch: serialize, re-parse, then call
+        args = json.loads(json.dumps(data))
+        return await bench_keys(args["keys_to_press"], args.get("delay", 0.05))
+
+    for name, call in (("json round trip", json_round_trip), ("registry dispatch", dispatch)):
+        start = time.perf_counter()
+        for _ in range(calls):
+            await call("bench_keys", input_data)
+        elapsed = time.perf_counter() - start
+        print(f"{name}: {elapsed / calls * 1e6:.1f} us per call")
+    del TOOLS["bench_keys"]
+
+
+async def bench_subprocess(commands=4, duration=0.3, tick=0.02):
+    """Blocking subprocess.run vs CommandRunner: wall time and event loop lag for parallel commands, plus a hung command"""
+    import subprocess
+    command = f'"{sys.executable}" -c "import time; print(1); time.sleep({duration})"'
+
+    async def blocking(cmd):  # what execute_cmd_command used to do
+        subprocess.run(cmd, shell=True, capture_output=True, text=True)
+
+    runner = CommandRunner(timeout=5, max_concurrent=2)
+    for name, run in (("subprocess.run", blocking), ("CommandRunner (cap 2)", runner.run)):
+        lags = []
+        async def ticker():
+            while True:
+                expected = time.perf_counter() + tick
+                await asyncio.sleep(tick)
+                lags.append(time.perf_counter() - expected)
+
+        ticker_task = asyncio.create_task(ticker())
+        started = time.perf_counter()
+        await asyncio.gather(*(run(command) for _ in range(commands)))
+        total = time.perf_counter() - started
+        ticker_task.cancel()
+        print(f"{name}: {commands} x {duration}s commands in {total:.2f}s | max loop lag {max(lags, default=total) * 1000:.0f} ms")
+
+    result = await runner.run(f'"{sys.executable}" -c "import time; time.sleep(30)"', timeout=1)
+    print(f"hung command: timed_out={result.timed_out} after {result.elapsed:.2f}s")
+
+
+async def bench_shell_session(commands=20):
+    """Scaffolding-style command sequence: a new shell per command vs one persistent shell session"""
+    import tempfile
+    script = ["mkdir project", "cd project", "mkdir src"] + [f"echo item {i} > src/file{i}.txt" for i in range(commands - 3)]
+    for name, runner_class in (("new shell per command", CommandRunner), ("persistent session", ShellSession)):
+        with tempfile.TemporaryDirectory() as workdir:
+            runner = runner_class(cwd=workdir)
+            started = time.perf_counter()
+            results = [await runner.run(command) for command in script]
+            total = time.perf_counter() - started
+            failed = sum(1 for r in results if r.returncode != 0)
+            kept_cd = os.path.isdir(os.path.join(workdir, "project", "src"))
+            print(f"{name}: {len(script)} commands in {total * 1000:.0f} ms ({total / len(script) * 1000:.1f} ms each) "
+                  f"| {failed} failed | files created inside project/: {kept_cd}")
+            if runner_class is ShellSession:
+                await runner.close()
+
+
+async def bench_screenshot(frames=5, width=3840, height=2160):
+    """Bytes and milliseconds per frame of a 4K screen for each capture setting"""
+    screen = fake_screen_image(width, height, wallpaper=True)
+    settings = [("PNG", 0, 0), ("PNG", 1920, 0), ("JPEG", 1920, 85), ("JPEG", 1600, 70), ("WEBP", 1920, 80), ("WEBP", 1280, 60)]
+    for format, max_edge, quality in settings:
+        capture = ScreenCapture(max_edge=max_edge, format=format, quality=quality, grab=lambda: screen, delta=False)
+        started = time.perf_counter()
+        for _ in range(frames):
+            frame = await capture.capture()
+        elapsed = (time.perf_counter() - started) / frames
+        size = f"{frame['image_width']}x{frame['image_height']}"
+        print(f"{format:4} max_edge={max_edge or 'full':<4} quality={quality or '-':<2} -> {size:9} "
+              f"{len(frame['image_base64']) / 1024:8.0f} KB base64 | {elapsed * 1000:6.0f} ms per frame")
+
+
+async def bench_screenshot_delta(width=1920, height=1080):
+    """Upload volume of a mouse-driven task's screenshots with and without unchanged/changed-region detection"""
+    from PIL import ImageDraw
+
+    # what happens on screen before each screenshot: nothing, a small change, or a large one
+    events = ["start", None, "hover", None, "type", "type", None, "dialog", None, "hover", "type", None]
+    for delta in (False, True):
+        screen = fake_screen_image(width, height, wallpaper=True)
+        draw = ImageDraw.Draw(screen)
+        capture = ScreenCapture(grab=lambda: screen, delta=delta)
+        sent, kinds, elapsed = 0, [], 0
+        for i, event in enumerate(events):
+            if event == "hover":
+                draw.rectangle([300 + i * 40, 500, 480 + i * 40, 540], outline="yellow", width=3)
+            elif event == "type":
+                draw.text((200 + i * 30, 800), "abc", fill="black")
+            elif event == "dialog":
+                draw.rectangle([500, 250, 1400, 800], fill="lightgray")
+            started = time.perf_counter()
+            frame = await capture.capture()
+            elapsed += time.perf_counter() - started
+            if isinstance(frame, str):
+                kinds.append("unchanged")
+            else:
+                sent += len(frame["image_base64"])
+                kinds.append("region" if "note" in frame else "full")
+        counts = ", ".join(f"{kinds.count(k)} {k}" for k in ("full", "region", "unchanged"))
+        print(f"delta={delta}: {len(events)} screenshots -> {counts} | {sent / 1024:.0f} KB uploaded "
+              f"| {elapsed / len(events) * 1000:.0f} ms per capture")
+
+
+async def bench_wait(delays=(0.3, 1.2, 3.0)):
+    """open_app-style launch on a fast and a slow machine: fixed sleeps vs waiting for the screen"""
+    from PIL import ImageDraw
+
+    async def fixed_sleeps(grab):  # what open_app used to do after each key press
+        await asyncio.sleep(1)
+        await asyncio.sleep(1)
+
+    async def event_waits(grab):
+        opened, _ = await waits.screen_changed(timeout=5, grab=grab)
+        if opened:
+            await waits.screen_stable(timeout=5, grab=grab)
+
+    for name, wait in (("fixed sleeps", fixed_sleeps), ("wait_until", event_waits)):
+        for delay in delays:
+            screen = fake_screen_image(1280, 720)
+            ready = []
+
+            async def launch():  # the app window shows up after delay and finishes drawing 0.2 s later
+                await asyncio.sleep(delay)
+                ImageDraw.Draw(screen).rectangle([200, 100, 1000, 600], fill="lightgray")
+                await asyncio.sleep(0.2)
+                ImageDraw.Draw(screen).text((220, 120), "Untitled - Notepad", fill="black")
+                ready.append(True)
+
+            launcher = asyncio.create_task(launch())
+            started = time.perf_counter()
+            await wait(lambda: screen.copy())
+            elapsed = time.perf_counter() - started
+            print(f"{name}: app ready after {delay:.1f}s -> tool returned after {elapsed:.2f}s, app ready: {bool(ready)}")
+            launcher.cancel()
+
+
+class FakeController:
+    """Records input events instead of sending them (stand-in for the pynput controllers)"""
+    sent = []
+
+    def __init__(self):
+        self.position = (0, 0)
+
+    def press(self, key):
+        self.sent.append(("press", key))
+
+    def release(self, key):
+        self.sent.append(("release", key))
+
+    def type(self, text):
+        self.sent.append(("type", text))
+
+    def click(self, button, clicks=1):
+        self.sent.append(("click", button))
+
+
+def fake_input_service():
+    from types import SimpleNamespace
+    backend = SimpleNamespace(KeyboardController=FakeController, MouseController=FakeController,
+                              Key=SimpleNamespace(ctrl="ctrl", shift="shift"), Button=SimpleNamespace(left="left"))
+    return InputService(backend)
+
+
+async def bench_input(callers=4, chords=50):
+    """Per-batch latency of the input service with several concurrent callers, and whether batches stay contiguous"""
+    import io
+    import contextlib
+    service = fake_input_service()
+    FakeController.sent = []
+    results = []
+
+    async def caller(i):
+        for _ in range(chords):
+            chord = ["ctrl", "shift", str(i)]
+            events = [("press", k) for k in chord] + [("release", k) for k in reversed(chord)]
+            results.append(await service.send(events))
+
+    with contextlib.redirect_stdout(io.StringIO()):  # one line per batch is too chatty here
+        started = time.perf_counter()
+        await asyncio.gather(*(caller(i) for i in range(callers)))
+        total = time.perf_counter() - started
+    batches = [FakeController.sent[i:i + 6] for i in range(0, len(FakeController.sent), 6)]
+    contiguous = all(len({key for _, key in batch if key not in ("ctrl", "shift")}) == 1 for batch in batches)
+    run = sorted(r.run_ms for r in results)
+    queued = sorted(r.queued_ms for r in results)
+    print(f"{len(results)} batches from {callers} callers in {total * 1000:.0f} ms | run p50 {run[len(run) // 2]:.3f} ms "
+          f"| queued p50 {queued[len(queued) // 2]:.3f} ms, max {queued[-1]:.3f} ms | batches contiguous: {contiguous}")
+
+
+async def bench_files(pages=6, latency=0.3):
+    """Creating a small website: editor + typing steps per file vs one write_files step, and the cost of the write itself"""
+    import tempfile
+    site = [(f"page{i}.html" if i % 3 == 0 else f"css/style{i}.css" if i % 3 == 1 else f"js/app{i}.js", "x = 1;\n" * 60)
+            for i in range(pages)]
+    typing = []
+    for path, content in site:
+        typing += [{"tool": "open_file", "input_data": {"file_path": path}, "next_command": "type the file"},
+                   {"tool": "write_content", "input_data": {"content": content}, "next_command": "save it"},
+                   {"tool": "press_keyboard_key", "input_data": {"keys_to_press": ["ctrl", "s"]}, "next_command": "next file"}]
+    bulk = [{"tool": "write_files", "input_data": {"files": [{"path": p, "content": c} for p, c in site]}, "next_command": "stop"}]
+    for name, actions in (("editor + typing", typing), ("write_files", bulk)):
+        runner = AgentRunner(AgentSession(FakeModel(actions, latency), []), fake_execute_tool, fake_parse_response, stream=False)
+        started = time.perf_counter()
+        outcome = await runner.run("make a website")
+        print(f"{name}: {outcome} in {len(runner.steps)} steps, {time.perf_counter() - started:.1f}s (fake {latency}s LLM)")
+
+    with tempfile.TemporaryDirectory() as workdir:
+        started = time.perf_counter()
+        file_writer.write_files(site, workdir)
+        size = sum(len(c) for _, c in site)
+        print(f"write_files itself: {len(site)} files, {size / 1024:.0f} KB in {(time.perf_counter() - started) * 1000:.1f} ms")
+
+
+async def bench_click(clicks=5, latency=0.3):
+    """Clicking points: move_mouse_pointer (0.5 s glide) + click_mouse_buttons vs one instant click_at"""
+    import io
+    import contextlib
+    service = fake_input_service()
+    old = [[[("move", 500, 400, 0.5)], [("click", "left", 1)]]] * clicks  # two LLM steps per click
+    new = [[[("move", 500, 400, 0), ("click", "left", 1)]]] * clicks       # one LLM step per click
+    for name, interactions in (("move + click", old), ("click_at", new)):
+        input_time = 0
+        with contextlib.redirect_stdout(io.StringIO()):
+            for steps in interactions:
+                for batch in steps:
+                    input_time += (await service.send(batch)).run_ms / 1000
+        steps = sum(len(s) for s in interactions)
+        print(f"{name}: {clicks} clicks -> {steps} LLM steps, {input_time * 1000:.1f} ms of input "
+              f"| ~{input_time + steps * latency:.1f}s with a {latency}s LLM")
+
+
+async def bench_ui_elements(runs=5):
+    """Element detection per frame: time, elements found, and how many of the fake buttons are found exactly"""
+    from ui_elements import ElementIndex
+    buttons = [((i * 197) % 1920, (i * 89) % 1080, (i * 197) % 1920 + 180, (i * 89) % 1080 + 40) for i in range(40)]
+
+    def overlaps(a, b):
+        return a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]
+
+    visible = [b for b in buttons if b[2] <= 1920 and b[3] <= 1080 and not any(o is not b and overlaps(b, o) for o in buttons)]
+    index = ElementIndex(max_elements=100)
+    for wallpaper in (False, True):
+        image = fake_screen_image(wallpaper=wallpaper)
+        started = time.perf_counter()
+        for _ in range(runs):
+            listing = index.update(image)
+        elapsed = (time.perf_counter() - started) / runs
+        found = sum(1 for b in visible if any(all(abs(e.box[k] - b[k]) <= 4 for k in range(4)) for e in index.elements))
+        print(f"{'wallpaper' if wallpaper else 'flat'} 1920x1080: {elapsed * 1000:.1f} ms, {len(index.elements)} elements, "
+              f"{found}/{len(visible)} buttons exact, listing {len(listing)} chars")
+
+
+def fake_speech(seconds, rate=16000, pitch=140, seed=0):
+    """Voiced speech stand-in: a harmonic tone with syllable-rate loudness and pitch changes, int16"""
+    import numpy as np
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * rate)) / rate
+    f0 = pitch * (1 + 0.1 * np.sin(2 * np.pi * 1.3 * t + rng.uniform(0, 6)))
+    phase = 2 * np.pi * np.cumsum(f0) / rate
+    voice = sum(np.sin(k * phase) / k for k in range(1, 8))
+    syllables = 0.55 + 0.45 * np.sin(2 * np.pi * 4 * t + rng.uniform(0, 6))
+    return (voice * syllables * 2500).astype(np.int16)
+
+
+class FakeMicrophone:
+    """sr.Microphone stand-in: quiet room noise plus fake_speech during the given (start, end) seconds, read in real time"""
+    SAMPLE_RATE = 16000
+    SAMPLE_WIDTH = 2
+    CHUNK = 1024
+    opens = 0
+
+    def __init__(self, epoch, speech=(), open_delay=0.05, noise=100):
+        self.epoch = epoch
+        self.speech = speech
+        self.open_delay = open_delay
+        self.noise = noise
+        self.voices = {}
+        self.stream = None
+
+    def __enter__(self):
+        time.sleep(self.open_delay)  # opening a sound device is not free
+        FakeMicrophone.opens += 1
+        self.stream = self
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stream = None
+
+    def read(self, size):
+        import numpy as np
+        first = int((time.perf_counter() - self.epoch) * self.SAMPLE_RATE)
+        time.sleep(size / self.SAMPLE_RATE)
+        samples = np.random.default_rng().normal(0, self.noise, size)
+        for begin, end in self.speech:
+            if (begin, end) not in self.voices:
+                self.voices[(begin, end)] = fake_speech(end - begin, self.SAMPLE_RATE)
+            voice = self.voices[(begin, end)]
+            offset = first - int(begin * self.SAMPLE_RATE)  # position of this chunk in the utterance
+            lo, hi = max(offset, 0), min(offset + size, len(voice))
+            if lo < hi:
+                samples[lo - offset:hi - offset] += voice[lo:hi]
+        return np.clip(samples, -32768, 32767).astype(np.int16).tobytes()
+
+
+def old_listen_cycle(open_source, timeout=2, calibration=0.5):
+    """One turn of the previous loop: open the device, calibrate, wait for speech; returns (when heard or None, deaf seconds)"""
+    started = time.perf_counter()
+    with open_source() as source:
+        floor = NoiseFloor()
+        floor.calibrate([rms(source.stream.read(source.CHUNK)) for _ in range(int(calibration * source.SAMPLE_RATE / source.CHUNK))])
+        deaf = time.perf_counter() - started
+        listened = 0
+        while listened < timeout:
+            if rms(source.stream.read(source.CHUNK)) > floor.threshold:
+                return time.perf_counter(), deaf
+            listened += source.CHUNK / source.SAMPLE_RATE
+    time.sleep(0.1)  # the loop's small delay between iterations
+    return None, deaf
+
+
+async def bench_microphone(idle=5.0, speak_after=0.2):
+    """Idle cost and time-to-first-word: reopening + recalibrating the mic every turn vs one persistent stream"""
+    def old():
+        FakeMicrophone.opens = 0
+        epoch = time.perf_counter()
+        cpu = time.process_time()
+        deaf = 0
+        while time.perf_counter() - epoch < idle:
+            deaf += old_listen_cycle(lambda: FakeMicrophone(epoch))[1]
+        idle_stats = (FakeMicrophone.opens, deaf, time.perf_counter() - epoch, time.process_time() - cpu)
+        # a task just finished; the next command starts speak_after seconds later
+        epoch = time.perf_counter()
+        heard, _ = old_listen_cycle(lambda: FakeMicrophone(epoch, speech=[(speak_after, speak_after + 1.0)]))
+        return idle_stats, heard - epoch - speak_after
+
+    def new():
+        FakeMicrophone.opens = 0
+        speech = []
+        epoch = time.perf_counter()
+        microphone = MicrophoneStream(lambda: FakeMicrophone(epoch, speech=speech))
+        cpu = time.process_time()
+        microphone.start()
+        deaf = time.perf_counter() - epoch
+        while time.perf_counter() - epoch < idle:
+            chunk = microphone.read(timeout=2)
+            rms(chunk)
+        idle_stats = (FakeMicrophone.opens, deaf, time.perf_counter() - epoch, time.process_time() - cpu)
+        now = time.perf_counter() - epoch
+        speech.append((now + speak_after, now + speak_after + 1.0))
+        microphone.clear()
+        while rms(microphone.read(timeout=2)) <= microphone.noise_floor.threshold:
+            pass
+        heard = time.perf_counter() - epoch - speech[0][0]
+        microphone.close()
+        return idle_stats, heard
+
+    import io
+    import contextlib
+    for name, run in (("reopen + calibrate each turn", old), ("persistent stream", new)):
+        with contextlib.redirect_stdout(io.StringIO()):
+            (opens, deaf, elapsed, cpu), first_word = await asyncio.to_thread(run)
+        print(f"{name}: {elapsed:.1f}s idle -> {opens} device opens, {deaf:.2f}s deaf, {cpu / elapsed * 1000:.1f} ms CPU per s "
+              f"| first word heard {first_word * 1000:.0f} ms after it starts")
+
+
+def load_corpus(folder):
+    """(wav path, transcript) pairs from folder/transcripts.tsv, leaving out recordings that are missing"""
+    entries = []
+    with open(os.path.join(folder, "transcripts.tsv"), encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                name, text = line.rstrip("\n").split("\t", 1)
+                entries.append((os.path.join(folder, name), text))
+    return [entry for entry in entries if os.path.exists(entry[0])], len(entries)
+
+
+def read_wav(path):
+    """(16-bit mono PCM bytes, sample rate) of a WAV file"""
+    import wave
+    with wave.open(path, "rb") as f:
+        if f.getsampwidth() != 2 or f.getnchannels() != 1:
+            raise ValueError(f"{path}: expected 16-bit mono, got {f.getsampwidth() * 8}-bit x{f.getnchannels()}")
+        return f.readframes(f.getnframes()), f.getframerate()
+
+
+async def bench_stt():
+    """Latency and word error rate of each speech engine on the WAV corpus (STT_CORPUS, default speech_corpus)"""
+    import statistics
+    folder = os.getenv("STT_CORPUS", "speech_corpus")
+    corpus, listed = load_corpus(folder)
+    if not corpus:
+        print(f"no recordings in {folder}: record the lines of transcripts.tsv as 16 kHz 16-bit mono WAV files")
+        return
+    clips = [(read_wav(path), reference) for path, reference in corpus]
+    audio = sum(len(pcm) / 2 / rate for (pcm, rate), _ in clips)
+    print(f"{len(clips)}/{listed} recordings, {audio:.1f}s of audio")
+    for name in os.getenv("STT_BENCH_ENGINES", ",".join(speech_engines.ENGINES)).split(","):
+        try:
+            started = time.perf_counter()
+            engine = speech_engines.make_engine(name, vosk_model=os.getenv("VOSK_MODEL", "model"),
+                                                whisper_model=os.getenv("WHISPER_MODEL", "base.en"))
+            load = time.perf_counter() - started
+        except speech_engines.SpeechEngineError as err:
+            print(f"{name}: skipped ({err})")
+            continue
+        latencies, errors, words = [], 0, 0
+        try:
+            for (pcm, rate), reference in clips:
+                started = time.perf_counter()
+                hypothesis = engine.transcribe(pcm, rate)
+                latencies.append(time.perf_counter() - started)
+                wrong, total = speech_engines.word_errors(reference, hypothesis)
+                errors, words = errors + wrong, words + total
+        except speech_engines.SpeechEngineError as err:
+            print(f"{name}: failed after {len(latencies)} files ({err})")
+            continue
+        latencies.sort()
+        print(f"{name}: load {load:.1f}s | latency mean {statistics.mean(latencies) * 1000:.0f} ms, "
+              f"p95 {latencies[int(0.95 * (len(latencies) - 1))] * 1000:.0f} ms, "
+              f"real-time factor {sum(latencies) / audio:.2f} | WER {errors / words * 100:.1f}% ({errors}/{words} words)")
+
+
+def fake_dictation(words, word=0.45, gap=0.25, rate=16000, seed=0):
+    """Speech of several words separated by short pauses, int16"""
+    import numpy as np
+    parts = []
+    for i in range(words):
+        parts.append(fake_speech(word, rate, seed=seed + i))
+        parts.append(np.zeros(int(gap * rate), dtype=np.int16))
+    return np.concatenate(parts[:-1])
+
+
+def old_listen_endpoint(samples, threshold, chunk=1024, rate=16000, pause=0.8, phrase_limit=5):
+    """Where Recognizer.listen(timeout=2, phrase_time_limit=5) returns: (sample index, seconds of audio captured)"""
+    pause_chunks = -(-pause * rate // chunk)
+    start, quiet = None, 0
+    for i in range(0, len(samples) - chunk + 1, chunk):
+        loud = rms(samples[i:i + chunk].tobytes()) > threshold
+        if start is None:
+            start = i if loud else None
+            continue
+        quiet = 0 if loud else quiet + 1
+        if quiet > pause_chunks or i + chunk - start > phrase_limit * rate:
+            return i + chunk, (i + chunk - start) / rate
+    return len(samples), (len(samples) - (start or 0)) / rate
+
+
+async def bench_vad(rate=16000):
+    """Endpoint delay and truncation: Recognizer.listen (0.8 s pause, 5 s limit) vs the streaming VAD segmenter"""
+    import numpy as np
+    rng = np.random.default_rng(0)
+    threshold = 150.0  # NoiseFloor threshold for the room noise below
+    for name, speech in (("short command", fake_speech(1.0, rate)), ("dictated task (14 words)", fake_dictation(14))):
+        samples = np.concatenate((np.zeros(rate // 2), speech, np.zeros(3 * rate))).astype(float)
+        samples = np.clip(samples + rng.normal(0, 100, len(samples)), -32768, 32767).astype(np.int16)
+        speech_end = (rate // 2 + len(speech)) / rate
+        old_end, old_captured = old_listen_endpoint(samples, threshold)
+        segmenter = Segmenter(rate, threshold)
+        new_end, new_captured = None, 0
+        for i in range(0, len(samples), 1024):
+            for utterance in segmenter.feed(samples[i:i + 1024].tobytes()):
+                if new_end is None:
+                    new_end, new_captured = (i + 1024) / rate, len(utterance.pcm) / 2 / rate
+        if old_end / rate < speech_end:
+            old = f"listen cuts off {speech_end - old_end / rate:.1f}s before speech ends ({old_captured:.1f}s captured)"
+        else:
+            old = f"listen returns {(old_end / rate - speech_end) * 1000:.0f} ms after speech ends ({old_captured:.1f}s captured)"
+        print(f"{name}, {len(speech) / rate:.1f}s: {old} | VAD returns {(new_end - speech_end) * 1000:.0f} ms after "
+              f"({new_captured:.1f}s captured)")
+
+    import time
+    minute = np.resize(samples, 60 * rate)  # the dictation and its trailing silence, repeated
+    segmenter = Segmenter(rate, threshold)
+    started = time.process_time()
+    for i in range(0, len(minute), 1024):
+        segmenter.feed(minute[i:i + 1024].tobytes())
+    print(f"VAD CPU: {(time.process_time() - started) / 60 * 1000:.2f} ms per second of audio")
+
+
+async def bench_pipeline(scale=0.2, recognize=0.3, step=0.5):
+    """Spoken commands while the agent works: sequential listen/recognize/act loop vs the pipelined stages
+
+    Timeline (seconds, run scale times faster): commands at 0, 1.0 and 4.5 s, "stop" at 6.8 s;
+    recognition takes 0.3 s and each agent step 0.5 s.
+    """
+    script = [(0.0, "open notepad", 3), (1.0, "open youtube", 4), (4.5, "write an essay about rivers", 12), (6.8, "stop", 0)]
+    steps = {text: n for _, text, n in script}
+
+    async def run(pipelined):
+        loop = asyncio.get_running_loop()
+        epoch = time.perf_counter()
+        now = lambda: (time.perf_counter() - epoch) / scale
+        pending = list(script)
+        log = {"done": [], "lost": [], "stop_latency": None}
+        cancelled = False
+
+        def capture():
+            if not pending:
+                time.sleep(0.5 * scale)
+                return None
+            at, text, _ = pending[0]
+            if now() > at + 0.5 and not pipelined:  # said while the loop was busy: never heard
+                pending.pop(0)
+                log["lost"].append(text)
+                return None
+            time.sleep(max(0, at - now()) * scale)
+            pending.pop(0)
+            return text
+
+        def transcribe(text):
+            time.sleep(recognize * scale)
+            return text
+
+        async def run_command(text):
+            nonlocal cancelled
+            cancelled = False
+            for _ in range(steps[text]):
+                if cancelled:
+                    if log["stop_latency"] is None:
+                        log["stop_latency"] = now() - script[-1][0]
+                    return "task cancelled"
+                await asyncio.sleep(step * scale)
+            return "task done"
+
+        def cancel_command():
+            nonlocal cancelled
+            cancelled = True
+            return True
+
+        async def sequential():
+            while pending:
+                text = await loop.run_in_executor(None, capture)
+                if text is None:
+                    continue
+                text = await loop.run_in_executor(None, transcribe, text)
+                if is_stop_command(text):
+                    continue  # nothing is running while the loop listens
+                log["done"].append((text, await run_command(text)))
+
+        async def concurrent():
+            pipeline = VoicePipeline(capture, transcribe, run_command, cancel_command,
+                                     on_result=lambda text, res: log["done"].append((text, res)))
+            runner = asyncio.ensure_future(pipeline.run())
+            while pending or pipeline.busy or not pipeline.commands.empty() or not pipeline.utterances.empty():
+                await asyncio.sleep(0.05 * scale)
+            runner.cancel()
+            await asyncio.gather(runner, return_exceptions=True)
+
+        import io
+        import contextlib
+        with contextlib.redirect_stdout(io.StringIO()):
+            await (concurrent() if pipelined else sequential())
+        log["total"] = now()
+        return log
+
+    for name, pipelined in (("sequential", False), ("pipelined", True)):
+        log = await run(pipelined)
+        done = ", ".join(f"{text} ({res})" for text, res in log["done"])
+        stop = f"stopped the task {log['stop_latency']:.1f}s after \"stop\"" if log["stop_latency"] is not None else "\"stop\" had no effect"
+        print(f"{name}: ran {done} | lost: {', '.join(log['lost']) or 'none'} | {stop} | all idle after {log['total']:.1f}s")
+
+
+VOWELS = {"a": (800, 1200), "e": (500, 1900), "i": (300, 2300), "o": (500, 900), "u": (320, 800), "ae": (660, 1700), "er": (500, 1400)}
+
+
+def fake_word(vowels, pitch=140, speed=1.0, rate=16000, seed=0):
+    """Voiced vowels (names from VOWELS, 140 ms each at speed 1) with their two formants, float samples"""
+    import numpy as np
+    rng = np.random.default_rng(seed)
+    parts = []
+    for vowel in vowels:
+        t = np.arange(int(0.14 / speed * rate)) / rate
+        f0 = pitch * (1 + 0.05 * np.sin(2 * np.pi * 3 * t + rng.uniform(0, 6)))
+        phase = 2 * np.pi * np.cumsum(f0) / rate
+        f1, f2 = VOWELS[vowel]
+        voice = sum((np.exp(-((k * pitch - f1) / 150) ** 2) + 0.6 * np.exp(-((k * pitch - f2) / 200) ** 2) + 0.02) * np.sin(k * phase)
+                    for k in range(1, int(rate / 2 / pitch)))
+        fade = np.minimum(1, np.minimum(np.arange(len(t)), np.arange(len(t))[::-1]) / (0.01 * rate))
+        parts.append(voice * fade)
+    samples = np.concatenate(parts)
+    return samples / np.abs(samples).max() * 6000
+
+
+async def bench_wake_word():
+    """Wake word gate: false rejects / accepts and CPU on synthetic phrases, then on recordings if there are any
+
+    Synthetic: the phrase is a fixed vowel sequence, 3 templates at different pitch and
+    speed; 40 utterances start with it (then a random tail), 200 never contain it.
+    Recorded: leave-one-out acceptance of the WAKE_WORD_DIR recordings and false accepts
+    on the command corpus (STT_CORPUS), which never says the wake phrase.
+    """
+    import numpy as np
+    from wake_word import WakeWordDetector
+    rng = np.random.default_rng(0)
+
+    def noisy(samples, lead=0.3, gain=1.0):
+        samples = np.concatenate((np.zeros(int(lead * 16000)), samples * gain))
+        return np.clip(samples + rng.normal(0, 100, len(samples)), -32768, 32767).astype(np.int16)
+
+    def score(detector, positives, negatives):
+        started = time.process_time()
+        accepted = [detector.distance(x) <= detector.threshold for x in positives]
+        false = [detector.distance(x) <= detector.threshold for x in negatives]
+        cpu = time.process_time() - started
+        audio = sum(min(len(x), detector.window) for x in positives + negatives) / 16000
+        return accepted, false, cpu, audio
+
+    phrase = ["e", "i", "a", "e", "er"]
+    names = list(VOWELS)
+    templates = [noisy(fake_word(phrase, pitch, speed, seed=i), 0.2) for i, (pitch, speed) in enumerate(((120, 0.95), (140, 1.0), (160, 1.05)))]
+    detector = WakeWordDetector(templates)
+    positives, negatives = [], []
+    for i in range(40):
+        tail = [names[j] for j in rng.integers(0, len(names), rng.integers(3, 10))]
+        positives.append(noisy(fake_word(phrase + tail, rng.uniform(110, 180), rng.uniform(0.85, 1.15), seed=100 + i), gain=rng.uniform(0.3, 1.5)))
+    while len(negatives) < 200:
+        vowels = [names[j] for j in rng.integers(0, len(names), rng.integers(3, 15))]
+        if any(vowels[k:k + len(phrase)] == phrase for k in range(len(vowels))):
+            continue
+        negatives.append(noisy(fake_word(vowels, rng.uniform(110, 180), rng.uniform(0.85, 1.15), seed=1000 + len(negatives)), gain=rng.uniform(0.3, 1.5)))
+    accepted, false, cpu, audio = score(detector, positives, negatives)
+    print(f"synthetic: threshold {detector.threshold:.2f} | false rejects {accepted.count(False)}/{len(accepted)}, "
+          f"false accepts {sum(false)}/{len(false)} | {cpu / audio * 1000:.1f} ms CPU per s of audio checked, "
+          f"{cpu / len(accepted + false) * 1000:.1f} ms per utterance")
+
+    folder = os.getenv("WAKE_WORD_DIR", "wake_word")
+    import glob
+    paths = sorted(glob.glob(os.path.join(folder, "*.wav")))
+    if len(paths) < 2:
+        print(f"no recordings in {folder}: record the wake phrase 3-5 times as 16 kHz 16-bit mono WAV files")
+        return
+    recordings = [np.frombuffer(read_wav(path)[0], dtype=np.int16) for path in paths]
+    corpus, _ = load_corpus(os.getenv("STT_CORPUS", "speech_corpus"))
+    commands = [np.frombuffer(read_wav(path)[0], dtype=np.int16) for path, _ in corpus]
+    threshold = float(os.getenv("WAKE_THRESHOLD")) if os.getenv("WAKE_THRESHOLD") else None
+    accepted = []
+    for i in range(len(recordings)):  # each recording against a detector built from the others
+        others = recordings[:i] + recordings[i + 1:]
+        held_out = WakeWordDetector(others, threshold=threshold) if len(others) >= 2 or threshold else None
+        if held_out is not None:
+            accepted.append(held_out.distance(recordings[i]) <= held_out.threshold)
+    detector = WakeWordDetector(recordings, threshold=threshold)
+    _, false, cpu, audio = score(detector, [], commands)
+    print(f"recorded: {len(recordings)} recordings, threshold {detector.threshold:.2f} | held-out recordings accepted "
+          f"{sum(accepted)}/{len(accepted)} | false accepts on {len(commands)} commands {sum(false)}/{len(false)}"
+          + (f" | {cpu / audio * 1000:.1f} ms CPU per s of audio checked" if commands else ""))
+
+
+BENCHMARKS = {
+    "event_loop": bench_event_loop,
+    "cancel": bench_cancel,
+    "stream": bench_stream,
+    "history": bench_history,
+    "prompt_cache": bench_prompt_cache,
+    "openai_fixture": bench_openai_fixture,
+    "repair": bench_repair,
+    "dispatch": bench_dispatch,
+    "subprocess": bench_subprocess,
+    "shell_session": bench_shell_session,
+    "screenshot": bench_screenshot,
+    "screenshot_delta": bench_screenshot_delta,
+    "wait": bench_wait,
+    "input": bench_input,
+    "files": bench_files,
+    "click": bench_click,
+    "ui_elements": bench_ui_elements,
+    "microphone": bench_microphone,
+    "stt": bench_stt,
+    "vad": bench_vad,
+    "pipeline": bench_pipeline,
+    "wake_word": bench_wake_word,
+}
+
+
+if __name__ == "__main__":
+    names = sys.argv[1:] or list(BENCHMARKS)
+    for name in names:
+        print(f"== {name} ==")
+        asyncio.run(BENCHMARKS[name]())
@@ -0,0 +1,108 @@
+'''clipboard.py (plain-text clipboard access for the paste fast path of write_content)
+
+Windows uses the Win32 clipboard through ctypes; macOS uses pbcopy/pbpaste and
+Linux wl-copy/wl-paste or xclip. All calls block, run them off the event loop.
+'''
+
+import sys
+import time
+import shutil
+import ctypes
+import subprocess
+
+
+class ClipboardError(Exception):
+    pass
+
+
+CF_UNICODETEXT = 13
+GMEM_MOVEABLE = 0x0002
+
+if sys.platform == "win32":
+    from ctypes import wintypes
+
+    user32 = ctypes.WinDLL("user32", use_last_error=True)
+    kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+    user32.OpenClipboard.argtypes = [wintypes.HWND]
+    user32.GetClipboardData.restype = ctypes.c_void_p
+    user32.SetClipboardData.argtypes = [wintypes.UINT, ctypes.c_void_p]
+    user32.SetClipboardData.restype = ctypes.c_void_p
+    kernel32.GlobalAlloc.argtypes = [wintypes.UINT, ctypes.c_size_t]
+    kernel32.GlobalAlloc.restype = ctypes.c_void_p
+    kernel32.GlobalLock.argtypes = [ctypes.c_void_p]
+    kernel32.GlobalLock.restype = ctypes.c_void_p
+    kernel32.GlobalUnlock.argtypes = [ctypes.c_void_p]
+
+
+def _win_open():
+    for _ in range(20):  # another app may hold the clipboard for a moment
+        if user32.OpenClipboard(None):
+            return
+        time.sleep(0.01)
+    raise ClipboardError("clipboard is busy")
+
+
+def _win_get():
+    _win_open()
+    try:
+        handle = user32.GetClipboardData(CF_UNICODETEXT)
+        if not handle:
+            return None
+        pointer = kernel32.GlobalLock(handle)
+        try:
+            return ctypes.wstring_at(pointer).replace("\r\n", "\n")
+        finally:
+            kernel32.GlobalUnlock(handle)
+    finally:
+        user32.CloseClipboard()
+
+
+def _win_set(text):
+    data = text.replace("\r\n", "\n").replace("\n", "\r\n").encode("utf-16-le") + b"\0\0"
+    _win_open()
+    try:
+        user32.EmptyClipboard()
+        handle = kernel32.GlobalAlloc(GMEM_MOVEABLE, len(data))
+        if not handle:
+            raise ClipboardError("out of memory")
+        ctypes.memmove(kernel32.GlobalLock(handle), data, len(data))
+        kernel32.GlobalUnlock(handle)
+        if not user32.SetClipboardData(CF_UNICODETEXT, handle):  # the clipboard owns handle from here on
+            raise ClipboardError(f"SetClipboardData failed ({ctypes.get_last_error()})")
+    finally:
+        user32.CloseClipboard()
+
+
+def _commands():
+    """(copy command, paste command) for this platform, or None"""
+    if sys.platform == "darwin":
+        return ["pbcopy"], ["pbpaste"]
+    if shutil.which("wl-copy"):
+        return ["wl-copy"], ["wl-paste", "--no-newline"]
+    if shutil.which("xclip"):
+        return ["xclip", "-selection", "clipboard"], ["xclip", "-selection", "clipboard", "-o"]
+    return None
+
+
+def get_text():
+    """Current clipboard text, or None if it holds no text"""
+    if sys.platform == "win32":
+        return _win_get()
+    commands = _commands()
+    if commands is None:
+        raise ClipboardError("no clipboard tool found (install wl-clipboard or xclip)")
+    res = subprocess.run(commands[1], capture_output=True, timeout=5)
+    return res.stdout.decode("utf-8", errors="replace") if res.returncode == 0 else None
+
+
+def set_text(text, verify=True):
+    """Put text on the clipboard; with verify, read it back and raise ClipboardError if it did not stick"""
+    if sys.platform == "win32":
+        _win_set(text)
+    else:
+        commands = _commands()
+        if commands is None:
+            raise ClipboardError("no clipboard tool found (install wl-clipboard or xclip)")
+        subprocess.run(commands[0], input=text.encode("utf-8"), check=True, timeout=5)
+    if verify and get_text() not in (text, text.replace("\r\n", "\n")):
+        raise ClipboardError("clipboard did not keep the text")
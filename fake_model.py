@@ -0,0 +1,142 @@
+'''fake_model.py (offline stand-ins for the LLM, used by benchmark.py)'''
+
+import json
+import time
+import asyncio
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from history_manager import payload_size
+from providers import ModelResponse, Usage
+
+STOP_ACTION = {"tool": "stop", "input_data": {"message": "done"}, "next_command": "task ended"}
+
+
+class FakeStream:
+    """Async iterator over response chunks, delivered chunk_delay seconds apart"""
+    def __init__(self, text, chunk_size, chunk_delay, usage_metadata=None):
+        self.chunks = [text[i:i + chunk_size] for i in range(0, len(text), chunk_size)]
+        self.chunk_delay = chunk_delay
+        self.usage_metadata = usage_metadata
+
+    async def __aiter__(self):
+        for i, chunk in enumerate(self.chunks):
+            if i:
+                await asyncio.sleep(self.chunk_delay)
+            yield ModelResponse(chunk, self.usage_metadata)
+
+
+class FakeModel:
+    """Replays scripted JSON actions with an injected network latency
+
+    responses is a list of action dicts (or raw strings, to simulate malformed
+    output); once it runs out the model answers 'stop'.
+    latency is the time to the first token, plus prefill_delay for every input
+    token that is not covered by cached content; when streaming, the rest of the
+    text arrives in chunk_size pieces every chunk_delay seconds.
+    """
+
+    def __init__(self, responses=None, latency=0.5, chunk_size=16, chunk_delay=0.02,
+                 system_prompt="", prefill_delay=0.0):
+        self.responses = list(responses or [])
+        self.latency = latency
+        self.chunk_size = chunk_size
+        self.chunk_delay = chunk_delay
+        self.system_prompt = system_prompt
+        self.prefill_delay = prefill_delay
+        self.cached_content = None
+        self.calls = 0
+
+    def _next_action(self):
+        if self.calls < len(self.responses):
+            action = self.responses[self.calls]
+        else:
+            action = STOP_ACTION
+        self.calls += 1
+        return action if isinstance(action, str) else json.dumps(action)  # strings are replayed verbatim
+
+    def _usage(self, contents):
+        system_tokens = len(self.system_prompt) // 4
+        cached = system_tokens if self.cached_content is not None else 0
+        return Usage(system_tokens + payload_size(contents)[1], cached)
+
+    async def generate_content_async(self, contents, stream=False, request_options=None):
+        usage = self._usage(contents)
+        billed = usage.prompt_token_count - usage.cached_content_token_count
+        await asyncio.sleep(self.latency + billed * self.prefill_delay)
+        text = self._next_action()
+        if stream:
+            return FakeStream(text, self.chunk_size, self.chunk_delay, usage)
+        # without streaming the whole generation has to finish first
+        await asyncio.sleep(self.chunk_delay * (len(text) // self.chunk_size))
+        return ModelResponse(text, usage)
+
+
+class FakeCacheBackend:
+    """Local stand-in for Gemini's cached content API (see prompt_cache.PromptCache)"""
+
+    def __init__(self, model):
+        self.model = model
+        self.caches = {}
+
+    def create(self, name, system_prompt, ttl):
+        self.caches[name] = system_prompt
+        return name
+
+    def extend(self, handle, ttl):
+        if handle not in self.caches:
+            raise KeyError(f"cached content {handle} not found")
+
+    def bind(self, handle):
+        self.model.system_prompt = self.caches[handle]
+        self.model.cached_content = handle
+        return self.model
+
+
+def serve_openai_fixture(responses=None, latency=0.2, chunk_size=16, chunk_delay=0.02, port=0):
+    """Start a local OpenAI-compatible /v1/chat/completions server that replays scripted actions
+
+    Returns the running server; its base URL is f"http://127.0.0.1:{server.server_port}/v1".
+    Call server.shutdown() when done.
+    """
+    script = list(responses or [])
+    calls = [0]
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            prompt_tokens = sum(len(json.dumps(m["content"])) for m in body["messages"]) // 4
+            action = script[calls[0]] if calls[0] < len(script) else STOP_ACTION
+            calls[0] += 1
+            text = json.dumps(action)
+            usage = {"prompt_tokens": prompt_tokens, "completion_tokens": len(text) // 4}
+            time.sleep(latency)
+
+            if not body.get("stream"):
+                time.sleep(chunk_delay * (len(text) // chunk_size))
+                payload = json.dumps({"choices": [{"message": {"role": "assistant", "content": text}}], "usage": usage}).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+                return
+
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.end_headers()
+            for i in range(0, len(text), chunk_size):
+                if i:
+                    time.sleep(chunk_delay)
+                event = {"choices": [{"delta": {"content": text[i:i + chunk_size]}}]}
+                self.wfile.write(f"data: {json.dumps(event)}\n\n".encode("utf-8"))
+                self.wfile.flush()
+            self.wfile.write(f"data: {json.dumps({'choices': [], 'usage': usage})}\n\n".encode("utf-8"))
+            self.wfile.write(b"data: [DONE]\n\n")
+            self.close_connection = True
+
+    server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
@@ -0,0 +1,87 @@
+'''file_writer.py (atomic file writes for write_into_file and write_files)'''
+
+import os
+import shutil
+import tempfile
+
+
+BUFFER_SIZE = 1 << 20
+UMASK = os.umask(0)  # read once at import (reading it means setting it), then put back
+os.umask(UMASK)
+
+
+def _write_temp(path, content):
+    """Write content to a temp file next to path and return the temp file's name
+
+    mkstemp makes the file owner-only; it gets the mode of the file it will
+    replace, or the mode a new file would get from open(), before the rename.
+    """
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=f".{os.path.basename(path)}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8', buffering=BUFFER_SIZE) as f:
+            f.write(content)
+        if os.path.exists(path):
+            shutil.copymode(path, temp_path)
+        else:
+            os.chmod(temp_path, 0o666 & ~UMASK)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+    return temp_path
+
+
+def _make_dirs(path, created):
+    """Create the missing parent folders of path, remembering them (outermost first) in created"""
+    missing = []
+    parent = os.path.dirname(path)
+    while parent and not os.path.isdir(parent):
+        missing.append(parent)
+        parent = os.path.dirname(parent)
+    for folder in reversed(missing):
+        os.mkdir(folder)
+        created.append(folder)
+
+
+def write_files(files, base_dir=""):
+    """Write {path: content} (or (path, content) pairs) so that either every file is written or none is
+
+    Relative paths are taken from base_dir. All contents go to temp files first;
+    only when every one of them is on disk are they renamed over their targets
+    (os.replace is atomic per file). On failure the temp files and any folders
+    created here are removed. Returns the absolute paths written.
+    """
+    targets = {}
+    for path, content in (files.items() if isinstance(files, dict) else files):
+        target = os.path.abspath(os.path.join(base_dir, path))
+        if target in targets:
+            raise ValueError(f"{path} is given twice")
+        if os.path.isdir(target):
+            raise IsADirectoryError(f"{path} is a folder")
+        targets[target] = content
+
+    created = []
+    temps = []
+    try:
+        for target, content in targets.items():
+            _make_dirs(target, created)
+            temps.append((_write_temp(target, content), target))
+    except BaseException:
+        for temp_path, _ in temps:
+            os.remove(temp_path)
+        for folder in reversed(created):
+            try:
+                os.rmdir(folder)
+            except OSError:
+                pass
+        raise
+
+    written = []
+    try:
+        for temp_path, target in temps:
+            os.replace(temp_path, target)
+            written.append(target)
+    except OSError as err:  # e.g. a target locked by another program on Windows
+        for temp_path, _ in temps[len(written):]:
+            os.remove(temp_path)
+        raise OSError(f"{err} (files already replaced: {written or 'none'})") from err
+    return written
@@ -0,0 +1,130 @@
+'''history_manager.py (keeps chat history under a byte/token budget)'''
+
+import io
+import base64
+from PIL import Image
+
+from screen import REGION_NOTE
+from ui_elements import LISTING
+
+
+IMAGE_TILE = 768          # Gemini bills images per 768x768 tile
+IMAGE_TILE_TOKENS = 258
+PLACEHOLDER = "[older screenshot removed to save space]"
+STALE_LISTING = f"[{LISTING} of an older screenshot removed]"
+
+
+def _is_image(part):
+    return isinstance(part, dict) and "inline_data" in part
+
+
+def _is_region(turn, i):
+    """True if the image at turn["parts"][i] is a changed-region crop (see screen.ScreenCapture)"""
+    parts = turn["parts"]
+    return i + 1 < len(parts) and _part_text(parts[i + 1]).startswith(REGION_NOTE)
+
+
+def _part_text(part):
+    if isinstance(part, str):
+        return part
+    if isinstance(part, dict):
+        return part.get("text", "")
+    return ""
+
+
+def _drop_listing(turn, i):
+    """Replace the UI element listing after the image at turn["parts"][i], if any, by a short note"""
+    parts = turn["parts"]
+    text = _part_text(parts[i + 1]) if i + 1 < len(parts) else ""
+    head, found, _ = text.partition(f"\n{LISTING}")
+    if found:
+        parts[i + 1] = {"text": f"{head}\n{STALE_LISTING}"}
+
+
+def image_tokens(data):
+    """Approximate token cost of one base64 image (only the header is decoded)"""
+    try:
+        width, height = Image.open(io.BytesIO(base64.b64decode(data[:65536]))).size
+    except Exception:
+        return IMAGE_TILE_TOKENS
+    return -(-width // IMAGE_TILE) * -(-height // IMAGE_TILE) * IMAGE_TILE_TOKENS
+
+
+def payload_size(history):
+    """Return (bytes, approx tokens) of a list of chat turns as they would be sent"""
+    total_bytes = 0
+    total_tokens = 0
+    for turn in history:
+        for part in turn["parts"]:
+            if _is_image(part):
+                data = part["inline_data"]["data"]
+                total_bytes += len(data)
+                total_tokens += image_tokens(data)
+            else:
+                text = _part_text(part)
+                total_bytes += len(text.encode("utf-8"))
+                total_tokens += len(text) // 4 + 1
+    return total_bytes, total_tokens
+
+
+class HistoryManager:
+    """Compacts chat history in place so every request stays under max_bytes and max_tokens
+
+    The newest screenshot is always kept as-is (if it is a changed-region crop, so are
+    the crops before it and the full frame they apply to). Older ones are first downscaled to
+    thumbnail_edge JPEGs, then replaced by a text placeholder, and only then are
+    the oldest turns dropped. The UI element listing of every screenshot but the newest
+    is dropped right away, since its numbers only apply until the next screenshot.
+    """
+
+    def __init__(self, max_bytes=2_000_000, max_tokens=100_000, thumbnail_edge=512, thumbnail_quality=60):
+        self.max_bytes = max_bytes
+        self.max_tokens = max_tokens
+        self.thumbnail_edge = thumbnail_edge
+        self.thumbnail_quality = thumbnail_quality
+
+    def _over_budget(self, history):
+        size, tokens = payload_size(history)
+        return size > self.max_bytes or tokens > self.max_tokens
+
+    def _thumbnail(self, data):
+        image = Image.open(io.BytesIO(base64.b64decode(data)))
+        if max(image.size) <= self.thumbnail_edge:
+            return None
+        image = image.convert("RGB")
+        image.thumbnail((self.thumbnail_edge, self.thumbnail_edge))
+        with io.BytesIO() as buffer:
+            image.save(buffer, format="JPEG", quality=self.thumbnail_quality)
+            return base64.b64encode(buffer.getvalue()).decode("utf-8")
+
+    def compact(self, history):
+        """Shrink history in place; returns the list for convenience"""
+        images = [(turn, i) for turn in history for i, part in enumerate(turn["parts"]) if _is_image(part)]
+        keep = 1  # the newest frame stays at full fidelity, with the full frame its region crops build on
+        while keep < len(images) and _is_region(*images[-keep]):
+            keep += 1
+        older = images[:-keep]
+
+        for turn, i in images[:-1]:
+            _drop_listing(turn, i)
+
+        for turn, i in older:
+            inline_data = turn["parts"][i]["inline_data"]
+            try:
+                thumbnail = self._thumbnail(inline_data["data"])
+            except Exception as err:
+                print("⚠️ could not downscale screenshot =>", err)
+                thumbnail = None
+            if thumbnail:
+                turn["parts"][i] = {"inline_data": {"data": thumbnail, "mime_type": "image/jpeg"}}
+
+        for turn, i in older:
+            if not self._over_budget(history):
+                break
+            turn["parts"][i] = {"text": PLACEHOLDER}
+
+        while len(history) > 1 and self._over_budget(history):
+            del history[0]
+            while len(history) > 1 and history[0]["role"] != "user":  # history must start with a user turn
+                del history[0]
+        return history
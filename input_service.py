@@ -0,0 +1,135 @@
+'''input_service.py (one long-lived owner of the keyboard and mouse)'''
+
+import time
+import queue
+import asyncio
+import threading
+from types import SimpleNamespace
+from dataclasses import dataclass
+
+
+@dataclass
+class BatchResult:
+    """Timing of one batch: queued_ms waiting behind earlier batches, run_ms sending the events"""
+    events: int
+    queued_ms: float
+    run_ms: float
+    position: tuple  # mouse position after the batch
+
+
+def pynput_backend():
+    from pynput.keyboard import Controller as KeyboardController, Key
+    from pynput.mouse import Controller as MouseController, Button
+    return SimpleNamespace(KeyboardController=KeyboardController, MouseController=MouseController, Key=Key, Button=Button)
+
+
+def _resolve(future, result, err):
+    if future.cancelled():
+        return
+    if err is not None:
+        future.set_exception(err)
+    else:
+        future.set_result(result)
+
+
+class InputService:
+    """Owns one keyboard and one mouse controller and sends batches of events from a worker thread
+
+    A batch is a list of events sent back to back, never interleaved with another batch:
+        ("press", key) / ("release", key)   key name such as "ctrl" or "enter", or a character
+        ("type", text)
+        ("click", button, clicks)           button is "left", "right" or "middle"
+        ("move", x, y, duration)            pixels; duration > 0 glides there in small steps
+        ("scroll", dx, dy)
+    backend provides KeyboardController, MouseController, Key and Button (pynput by default).
+    send() gives up after timeout seconds (the batch may still be sent later).
+    """
+
+    def __init__(self, backend=None, timeout=60):
+        self.backend = backend
+        self.timeout = timeout
+        self.keyboard = None
+        self.mouse = None
+        self.queue = queue.Queue()
+        self.thread = None
+        self.lock = threading.Lock()
+        self.batches = 0
+        self.last = None
+
+    def _start(self):
+        with self.lock:
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self._worker, name="input-service", daemon=True)
+                self.thread.start()
+
+    def _controllers(self):
+        if self.keyboard is None:
+            self.backend = self.backend or pynput_backend()
+            self.keyboard = self.backend.KeyboardController()
+            self.mouse = self.backend.MouseController()
+
+    def key(self, name):
+        return getattr(self.backend.Key, name, name)
+
+    def _glide(self, x, y, duration):
+        start_x, start_y = self.mouse.position
+        steps = max(1, int(duration / 0.01))
+        for i in range(1, steps + 1):
+            self.mouse.position = (round(start_x + (x - start_x) * i / steps), round(start_y + (y - start_y) * i / steps))
+            time.sleep(duration / steps)
+
+    def _send(self, event):
+        match event:
+            case ("press", key):
+                self.keyboard.press(self.key(key))
+            case ("release", key):
+                self.keyboard.release(self.key(key))
+            case ("type", text):
+                self.keyboard.type(text)
+            case ("click", button, clicks):
+                self.mouse.click(getattr(self.backend.Button, button), clicks)
+            case ("move", x, y, duration):
+                if duration > 0:
+                    self._glide(x, y, duration)
+                else:
+                    self.mouse.position = (x, y)
+            case ("scroll", dx, dy):
+                self.mouse.scroll(dx, dy)
+            case _:
+                raise ValueError(f"unknown input event: {event}")
+
+    def _worker(self):
+        while True:
+            loop, future, events, submitted = self.queue.get()
+            started = time.perf_counter()
+            result, error = None, None
+            try:
+                self._controllers()
+                for event in events:
+                    self._send(event)
+                result = BatchResult(len(events), (started - submitted) * 1000, (time.perf_counter() - started) * 1000,
+                                     tuple(self.mouse.position))
+            except Exception as err:
+                error = err
+            try:
+                loop.call_soon_threadsafe(_resolve, future, result, error)
+            except RuntimeError:  # the caller's event loop closed meanwhile (listening stopped); nobody is waiting
+                pass
+
+    async def send(self, events):
+        """Queue one batch and wait until it has been sent; returns its BatchResult
+
+        A batch that has started is always sent completely, even if the caller is cancelled.
+        """
+        self._start()
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self.queue.put((loop, future, list(events), time.perf_counter()))
+        try:
+            result = await asyncio.wait_for(future, self.timeout)
+        except asyncio.TimeoutError:
+            raise TimeoutError(f"input service did not send the batch within {self.timeout:g}s") from None
+        self.batches += 1
+        self.last = result
+        print(f"🖱️ input batch: {result.events} events in {result.run_ms:.1f} ms (queued {result.queued_ms:.1f} ms)")
+        return result
@@ -0,0 +1,141 @@
+'''microphone.py (one persistent microphone stream for the voice loop)
+
+The device is opened and calibrated once. A reader thread then keeps pulling
+chunks into a bounded buffer, so nothing is lost between utterances, and folds
+the ambient noise level of each chunk into the speech energy threshold.
+'''
+
+import queue
+import threading
+import numpy as np
+
+try:
+    import speech_recognition as sr
+except ImportError:  # only needed for the default source
+    sr = None
+
+
+def rms(chunk):
+    """Root mean square energy of a chunk of 16-bit mono PCM"""
+    samples = np.frombuffer(chunk, dtype=np.int16).astype(np.float32)
+    return float(np.sqrt(np.mean(samples * samples))) if samples.size else 0.0
+
+
+class NoiseFloor:
+    """Speech energy threshold that follows the ambient noise level
+
+    calibrate() sets the level from a stretch of quiet audio; update() then
+    moves it a little towards every chunk, far more slowly for chunks above the
+    threshold, so speech barely shifts it but a fan that keeps running does.
+    """
+
+    def __init__(self, ratio=1.5, minimum=50.0, adapt=0.05, adapt_loud=0.002):
+        self.ratio = ratio
+        self.minimum = minimum
+        self.adapt = adapt
+        self.adapt_loud = adapt_loud
+        self.level = minimum / ratio
+
+    @property
+    def threshold(self):
+        return max(self.minimum, self.level * self.ratio)
+
+    def calibrate(self, energies):
+        self.level = float(np.mean(energies))
+
+    def update(self, energy):
+        rate = self.adapt if energy < self.threshold else self.adapt_loud
+        self.level += rate * (energy - self.level)
+
+
+class MicrophoneStream:
+    """Owns the microphone: opened and calibrated once, then read continuously by a worker thread
+
+    open_source returns an unopened speech_recognition-style source (sr.Microphone
+    at 16 kHz by default) with SAMPLE_RATE, SAMPLE_WIDTH, CHUNK and, once entered,
+    stream.read(). Chunks wait in a buffer of buffer_seconds (oldest dropped first)
+    until read().
+    """
+
+    def __init__(self, open_source=None, calibration=0.5, buffer_seconds=30, noise_floor=None):
+        self.open_source = open_source or (lambda: sr.Microphone(sample_rate=16000))
+        self.calibration = calibration
+        self.buffer_seconds = buffer_seconds
+        self.noise_floor = noise_floor or NoiseFloor()
+        self.source = None
+        self.chunks = None
+        self.thread = None
+        self.running = False
+        self.error = None
+        self.opens = 0
+        self.dropped = 0
+
+    def start(self):
+        """Open and calibrate the microphone (blocks for about calibration seconds) and start the reader"""
+        if self.running:
+            return
+        self.source = self.open_source()
+        self.source.__enter__()
+        self.opens += 1
+        if self.source.SAMPLE_WIDTH != 2:
+            raise ValueError(f"expected 16-bit audio, got {self.source.SAMPLE_WIDTH * 8}-bit")
+        size = self.source.CHUNK
+        calibration_chunks = max(1, int(self.calibration * self.source.SAMPLE_RATE / size))
+        self.noise_floor.calibrate([rms(self.source.stream.read(size)) for _ in range(calibration_chunks)])
+        self.chunks = queue.Queue(maxsize=max(1, int(self.buffer_seconds * self.source.SAMPLE_RATE / size)))
+        self.error = None
+        self.running = True
+        self.thread = threading.Thread(target=self._reader, name="microphone", daemon=True)
+        self.thread.start()
+        print(f"🎙️ microphone open, noise threshold {self.noise_floor.threshold:.0f}")
+
+    def _reader(self):
+        while self.running:
+            try:
+                chunk = self.source.stream.read(self.source.CHUNK)
+            except Exception as err:  # e.g. the device was unplugged
+                self.error = err
+                self.running = False
+                break
+            self.noise_floor.update(rms(chunk))
+            while True:
+                try:
+                    self.chunks.put_nowait(chunk)
+                    break
+                except queue.Full:
+                    try:
+                        self.chunks.get_nowait()
+                        self.dropped += 1
+                    except queue.Empty:
+                        pass
+
+    def read(self, timeout=None):
+        """Next chunk of PCM bytes; None if nothing arrived within timeout or the stream has stopped"""
+        while True:
+            try:
+                return self.chunks.get(timeout=0.1 if timeout is None else min(timeout, 0.1))
+            except queue.Empty:
+                if not self.running:
+                    return None
+                if timeout is not None:
+                    timeout -= 0.1
+                    if timeout <= 0:
+                        return None
+
+    def clear(self):
+        """Drop everything buffered so far"""
+        while True:
+            try:
+                self.chunks.get_nowait()
+            except queue.Empty:
+                return
+
+    def close(self):
+        self.running = False
+        if self.thread is not None:
+            self.thread.join(timeout=2)
+            self.thread = None
+        if self.source is not None:
+            self.source.__exit__(None, None, None)
+            self.source = None
+
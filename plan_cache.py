@@ -0,0 +1,76 @@
+'''plan_cache.py (memoized tool sequences for repeated voice commands)'''
+
+import os
+import re
+import json
+import time
+from collections import OrderedDict
+
+
+def normalize_transcript(text):
+    """Lowercase, drop punctuation and polite filler so "Open YouTube." and "please open youtube" match"""
+    text = re.sub(r"[^a-z0-9 ]+", " ", text.lower())
+    words = [w for w in text.split() if w not in ("please", "can", "you", "could", "hey")]
+    return " ".join(words)
+
+
+class PlanCache:
+    """LRU cache of successful tool sequences keyed by the normalized transcript
+
+    Entries expire after ttl seconds; the least recently used entry is evicted
+    once max_entries is reached. If path is given the cache is kept in that
+    JSON file between runs.
+    """
+
+    def __init__(self, max_entries=100, ttl=24 * 3600, path=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.path = path
+        self.entries = OrderedDict()  # key -> {"plan": [[tool, input_data], ...], "created": ts}
+        self._load()
+
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.entries = OrderedDict(json.load(f))
+        except Exception as err:
+            print("⚠️ could not load plan cache =>", err)
+
+    def _save(self):
+        if not self.path:
+            return
+        try:
+            with open(self.path, 'w', encoding='utf-8') as f:
+                json.dump(self.entries, f)
+        except Exception as err:
+            print("⚠️ could not save plan cache =>", err)
+
+    def get(self, transcript):
+        """Return the cached plan for transcript, or None"""
+        key = normalize_transcript(transcript)
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        if time.time() - entry["created"] > self.ttl:
+            del self.entries[key]
+            self._save()
+            return None
+        self.entries.move_to_end(key)
+        return entry["plan"]
+
+    def record(self, transcript, plan):
+        """Store a successful plan as a list of (tool, input_data) pairs"""
+        key = normalize_transcript(transcript)
+        if not key or not plan:
+            return
+        self.entries[key] = {"plan": [[tool, input_data] for tool, input_data in plan], "created": time.time()}
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+        self._save()
+
+    def invalidate(self, transcript):
+        if self.entries.pop(normalize_transcript(transcript), None) is not None:
+            self._save()
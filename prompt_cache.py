@@ -0,0 +1,51 @@
+'''prompt_cache.py (registers the static system prompt once as cached context)'''
+
+import time
+import hashlib
+
+
+class PromptCache:
+    """Keeps one cached-context handle for the system prompt and hands out a model bound to it
+
+    backend must provide:
+        create(name, system_prompt, ttl) -> handle   (register the prefix, ttl in seconds)
+        extend(handle, ttl)                          (push the expiry back)
+        bind(handle) -> model                        (a model whose requests reference the handle)
+    The handle is extended shortly before it expires and re-created if that fails.
+    """
+
+    def __init__(self, backend, system_prompt, ttl=3600, refresh_margin=300):
+        self.backend = backend
+        self.system_prompt = system_prompt
+        self.ttl = ttl
+        self.refresh_margin = refresh_margin
+        self.name = "desktop-agent-" + hashlib.sha256(system_prompt.encode("utf-8")).hexdigest()[:12]
+        self.handle = None
+        self.model = None
+        self.expires_at = 0
+        self.hits = 0
+        self.misses = 0
+
+    def _create(self):
+        self.handle = self.backend.create(self.name, self.system_prompt, self.ttl)
+        self.model = self.backend.bind(self.handle)
+        self.expires_at = time.time() + self.ttl
+        self.misses += 1
+        print(f"🗄️ system prompt cached as {self.name}")
+
+    def get_model(self):
+        """Return a model bound to the cached system prompt, creating or extending the cache if needed"""
+        now = time.time()
+        if self.handle is None or now >= self.expires_at:
+            self._create()
+            return self.model
+        if self.expires_at - now < self.refresh_margin:
+            try:
+                self.backend.extend(self.handle, self.ttl)
+                self.expires_at = now + self.ttl
+            except Exception as err:
+                print("⚠️ could not extend prompt cache, re-creating =>", err)
+                self._create()
+                return self.model
+        self.hits += 1
+        return self.model
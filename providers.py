@@ -0,0 +1,243 @@
+'''providers.py (LLM backends behind call_LLM)
+
+Every provider hands out a "model" with the same interface the agent loop uses:
+    await model.generate_content_async(contents, stream=False, request_options=None)
+returning an object with .text, .parts and .usage_metadata (or, with stream=True,
+an async iterator of such chunks). contents is the chat history in the
+{"role": ..., "parts": [...]} format used by LLM.chat_history.
+'''
+
+import json
+import asyncio
+import datetime
+import threading
+import urllib.request
+
+from prompt_cache import PromptCache
+
+
+GENERATION_SETTINGS = {
+    "max_output_tokens": 8192,
+    "temperature": 0.8,
+    "top_p": 0.95,
+    "top_k": 40,
+}
+
+
+class Usage:
+    """Token usage with the same field names as Gemini's usage_metadata"""
+    def __init__(self, prompt_token_count=0, cached_content_token_count=0):
+        self.prompt_token_count = prompt_token_count
+        self.cached_content_token_count = cached_content_token_count
+
+
+class ModelResponse:
+    """A complete response or one streamed chunk"""
+    def __init__(self, text, usage_metadata=None):
+        self.text = text
+        self.parts = [text] if text else []
+        self.usage_metadata = usage_metadata
+
+
+def ordered_schema(schema):
+    """Copy of a JSON schema where every object lists its properties in their dict order
+
+    Gemini writes the keys of a schema-constrained reply alphabetically unless
+    property_ordering is set, which would put "tool" after "input_data" and hold
+    back the early dispatch of streamed replies.
+    """
+    schema = dict(schema)
+    if "items" in schema:
+        schema["items"] = ordered_schema(schema["items"])
+    if "properties" in schema:
+        schema["properties"] = {name: ordered_schema(value) for name, value in schema["properties"].items()}
+        schema["property_ordering"] = list(schema["properties"])
+    return schema
+
+
+class GeminiProvider:
+    """Google Gemini through google.generativeai, with the system prompt kept as cached content"""
+
+    def __init__(self, system_prompt, model_name="gemini-2.5-flash", api_key=None, prompt_cache=True, cache_ttl=3600,
+                 response_schema=None):
+        import google.generativeai as genai
+        from google.generativeai import caching
+
+        self.genai = genai
+        self.caching = caching
+        self.model_name = model_name if model_name.startswith("models/") else f"models/{model_name}"
+        genai.configure(api_key=api_key)
+        if response_schema:  # constrain replies to the agent's JSON action format
+            json_settings = {"response_mime_type": "application/json"}
+            if "property_ordering" in genai.protos.Schema.meta.fields:
+                json_settings["response_schema"] = ordered_schema(response_schema)
+            else:
+                # the google-ai-generativelanguage that google-generativeai pins cannot set the key
+                # order, and without it a schema makes "tool" arrive last, after input_data. Plain
+                # JSON mode follows the prompt's examples (tool first); parse_action repairs or
+                # re-asks the rest
+                print("ℹ️ Gemini replies requested as JSON without a schema (key order not supported)")
+            self.generation_config = genai.GenerationConfig(**GENERATION_SETTINGS, **json_settings)
+        else:
+            self.generation_config = genai.GenerationConfig(**GENERATION_SETTINGS)
+        self.model = genai.GenerativeModel(
+            model_name=self.model_name,
+            system_instruction=system_prompt,
+            generation_config=self.generation_config
+        )
+        self.prompt_cache = PromptCache(self, system_prompt, ttl=cache_ttl) if prompt_cache else None
+
+    # prompt_cache.PromptCache backend
+    def create(self, name, system_prompt, ttl):
+        return self.caching.CachedContent.create(
+            model=self.model_name,
+            display_name=name,
+            system_instruction=system_prompt,
+            ttl=datetime.timedelta(seconds=ttl)
+        )
+
+    def extend(self, handle, ttl):
+        handle.update(ttl=datetime.timedelta(seconds=ttl))
+
+    def bind(self, handle):
+        return self.genai.GenerativeModel.from_cached_content(cached_content=handle, generation_config=self.generation_config)
+
+    async def get_model(self):
+        """Model for the next task: bound to the cached system prompt when caching is available"""
+        if self.prompt_cache is None:
+            return self.model
+        try:
+            return await asyncio.to_thread(self.prompt_cache.get_model)
+        except Exception as err:
+            print("⚠️ prompt cache unavailable, sending the full system prompt =>", err)
+            self.prompt_cache = None
+            return self.model
+
+
+def to_openai_messages(system_prompt, contents):
+    """Convert chat history turns to OpenAI chat messages (screenshots become data-URL image parts)"""
+    messages = [{"role": "system", "content": system_prompt}]
+    for turn in contents:
+        content = []
+        for part in turn["parts"]:
+            if isinstance(part, dict) and "inline_data" in part:
+                inline_data = part["inline_data"]
+                url = f"data:{inline_data['mime_type']};base64,{inline_data['data']}"
+                content.append({"type": "image_url", "image_url": {"url": url}})
+            else:
+                text = part.get("text", "") if isinstance(part, dict) else str(part)
+                content.append({"type": "text", "text": text})
+        if all(c["type"] == "text" for c in content):
+            content = "\n".join(c["text"] for c in content)
+        messages.append({"role": "assistant" if turn["role"] == "model" else "user", "content": content})
+    return messages
+
+
+def _openai_usage(usage):
+    if not usage:
+        return None
+    cached = (usage.get("prompt_tokens_details") or {}).get("cached_tokens", 0)
+    return Usage(usage.get("prompt_tokens", 0), cached or 0)
+
+
+class OpenAIStream:
+    """Async iterator over a server-sent-events chat completion read on a worker thread"""
+
+    def __init__(self, request, timeout):
+        self.request = request
+        self.timeout = timeout
+        self.closed = False
+
+    def _read(self, loop, queue):
+        try:
+            with urllib.request.urlopen(self.request, timeout=self.timeout) as res:
+                for raw in res:
+                    if self.closed:
+                        break
+                    line = raw.decode("utf-8").strip()
+                    if not line.startswith("data:"):
+                        continue
+                    data = line[5:].strip()
+                    if data == "[DONE]":
+                        break
+                    loop.call_soon_threadsafe(queue.put_nowait, json.loads(data))
+        except Exception as err:
+            loop.call_soon_threadsafe(queue.put_nowait, err)
+        loop.call_soon_threadsafe(queue.put_nowait, None)
+
+    async def __aiter__(self):
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue()
+        threading.Thread(target=self._read, args=(loop, queue), daemon=True).start()
+        try:
+            while True:
+                event = await queue.get()
+                if event is None:
+                    break
+                if isinstance(event, Exception):
+                    raise event
+                choices = event.get("choices") or [{}]
+                text = (choices[0].get("delta") or {}).get("content") or ""
+                yield ModelResponse(text, _openai_usage(event.get("usage")))
+        finally:
+            self.closed = True
+
+
+class OpenAICompatibleProvider:
+    """Any OpenAI-compatible /chat/completions server (llama.cpp, Ollama, vLLM, or fake_model's fixture server)"""
+
+    def __init__(self, system_prompt, base_url="http://localhost:8080/v1", model_name="local", api_key=None, timeout=60,
+                 response_schema=None):
+        self.system_prompt = system_prompt
+        self.response_schema = response_schema
+        self.url = base_url.rstrip("/") + "/chat/completions"
+        self.model_name = model_name
+        self.api_key = api_key
+        self.timeout = timeout
+
+    async def get_model(self):
+        return self
+
+    def _request(self, contents, stream):
+        body = {
+            "model": self.model_name,
+            "messages": to_openai_messages(self.system_prompt, contents),
+            "max_tokens": GENERATION_SETTINGS["max_output_tokens"],
+            "temperature": GENERATION_SETTINGS["temperature"],
+            "top_p": GENERATION_SETTINGS["top_p"],
+            "stream": stream,
+        }
+        if stream:
+            body["stream_options"] = {"include_usage": True}
+        if self.response_schema:
+            body["response_format"] = {"type": "json_schema", "json_schema": {"name": "agent_action", "schema": self.response_schema}}
+        headers = {"Content-Type": "application/json"}
+        if self.api_key:
+            headers["Authorization"] = f"Bearer {self.api_key}"
+        return urllib.request.Request(self.url, data=json.dumps(body).encode("utf-8"), headers=headers, method="POST")
+
+    def _post(self, request, timeout):
+        with urllib.request.urlopen(request, timeout=timeout) as res:
+            return json.loads(res.read().decode("utf-8"))
+
+    async def generate_content_async(self, contents, stream=False, request_options=None):
+        timeout = (request_options or {}).get("timeout", self.timeout)
+        request = self._request(contents, stream)
+        if stream:
+            return OpenAIStream(request, timeout)
+        data = await asyncio.to_thread(self._post, request, timeout)
+        return ModelResponse(data["choices"][0]["message"]["content"] or "", _openai_usage(data.get("usage")))
+
+
+def create_provider(name, system_prompt, model_name=None, base_url=None, api_key=None, prompt_cache=True, cache_ttl=3600,
+                    response_schema=None):
+    """Build the provider selected by LLM_PROVIDER ('gemini' or 'openai')"""
+    match name:
+        case 'gemini':
+            return GeminiProvider(system_prompt, model_name or "gemini-2.5-flash", api_key, prompt_cache, cache_ttl,
+                                  response_schema)
+        case 'openai':
+            return OpenAICompatibleProvider(system_prompt, base_url or "http://localhost:8080/v1", model_name or "local",
+                                            api_key, response_schema=response_schema)
+        case _:
+            raise ValueError(f"Unknown LLM provider: {name}")
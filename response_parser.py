@@ -0,0 +1,250 @@
+'''response_parser.py (parsing of LLM responses)'''
+
+import re
+import ast
+import json
+
+
+def action_schema(tool_names, parameters):
+    """JSON schema for one agent response, used to constrain the model's output
+
+    parameters maps every input_data field used by any tool to its JSON schema;
+    all of them are optional since each tool uses only a few. The run_actions
+    batch format is described here, so an "actions" entry in parameters is ignored.
+    """
+    parameters = {name: schema for name, schema in parameters.items() if name != "actions"}
+    single_tools = [name for name in tool_names if name != "run_actions"]
+    input_data = {"type": "object", "properties": dict(parameters)}
+    action_item = {
+        "type": "object",
+        "properties": {
+            "tool": {"type": "string", "enum": single_tools},
+            "input_data": input_data,
+            "needs_screen": {"type": "boolean"},
+        },
+        "required": ["tool", "input_data"],
+    }
+    batch_input_data = {
+        "type": "object",
+        "properties": {**parameters, "actions": {"type": "array", "items": action_item}},
+    }
+    return {
+        "type": "object",
+        "properties": {
+            "tool": {"type": "string", "enum": single_tools + ["run_actions"]},
+            "input_data": batch_input_data,
+            "next_command": {"type": "string"},
+        },
+        "required": ["tool", "input_data", "next_command"],
+    }
+
+
+def _outer_object(text):
+    """Slice from the first '{' to its matching '}' (or to the end if the object was cut off)"""
+    start = text.find("{")
+    if start == -1:
+        raise ValueError(f"no JSON object in response: {text[:200]!r}")
+    depth = 0
+    in_string = False
+    escape = False
+    for i in range(start, len(text)):
+        c = text[i]
+        if in_string:
+            if escape:
+                escape = False
+            elif c == "\\":
+                escape = True
+            elif c == '"':
+                in_string = False
+        elif c == '"':
+            in_string = True
+        elif c in "{[":
+            depth += 1
+        elif c in "}]":
+            depth -= 1
+            if depth == 0:
+                return text[start:i + 1]
+    return text[start:]
+
+
+def _close_truncated(text):
+    """Close the open brackets of a cut-off object (a cut-off string is left alone; its content is incomplete)"""
+    stack = []
+    in_string = False
+    escape = False
+    for c in text:
+        if in_string:
+            if escape:
+                escape = False
+            elif c == "\\":
+                escape = True
+            elif c == '"':
+                in_string = False
+        elif c == '"':
+            in_string = True
+        elif c in "{[":
+            stack.append("}" if c == "{" else "]")
+        elif c in "}]" and stack:
+            stack.pop()
+    if in_string:
+        return text
+    return text + "".join(reversed(stack))
+
+
+def _repairs(text):
+    """Yield progressively more aggressive repairs of a JSON-ish object"""
+    yield text
+    text = text.replace("\u201c", '"').replace("\u201d", '"').replace("\u2018", "'").replace("\u2019", "'")
+    text = re.sub(r",\s*([}\]])", r"\1", text)  # trailing commas
+    yield text
+    yield _close_truncated(text)
+
+
+def parse_action(text):
+    """Parse one agent response, repairing common glitches (fences, prose around the object,
+    trailing commas, smart quotes, Python-style literals, missing closing brackets); raises ValueError if it can't"""
+    text = text.strip()
+    response = None
+    for attempt in _repairs(_outer_object(text)):
+        try:
+            response = json.loads(attempt)
+            break
+        except ValueError:
+            pass
+        try:  # single-quoted keys/strings and True/False/None
+            response = ast.literal_eval(attempt)
+            break
+        except (ValueError, SyntaxError):
+            pass
+    if not isinstance(response, dict):
+        raise ValueError(f"could not parse response as a JSON object: {text[:200]!r}")
+    return normalize_action(response, text)
+
+
+def normalize_action(response, text=""):
+    """Check a decoded response has a "tool" and fill in a missing input_data / next_command"""
+    if not isinstance(response.get("tool"), str):
+        raise ValueError(f'response has no "tool": {text[:200]!r}')
+    if not isinstance(response.get("input_data"), dict):
+        response["input_data"] = {}
+    if not isinstance(response.get("next_command"), str):
+        response["next_command"] = ""
+    return response
+
+
+class StreamingActionParser:
+    """Incrementally scans a streamed JSON object and decodes each top-level field as soon as it closes
+
+    Anything before the first '{' (like a ```json fence) is skipped. Fields are
+    available in .fields while the rest of the object is still streaming in.
+    On malformed input the parser stops in the 'failed' state and only keeps
+    buffering, so the full text can still go through parse_action().
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self.pos = 0
+        self.depth = 0
+        self.in_string = False
+        self.escape = False
+        self.state = 'start'      # start -> key -> colon -> value -> after -> key ... -> done
+        self.key_start = None
+        self.key = None
+        self.value_start = None
+        self.object_start = None
+        self.object_end = None
+        self.fields = {}
+
+    @property
+    def failed(self):
+        return self.state == 'failed'
+
+    @property
+    def done(self):
+        return self.state == 'done'
+
+    def has(self, *names):
+        """True once all the given top-level fields are complete"""
+        return all(name in self.fields for name in names)
+
+    def feed(self, chunk):
+        """Consume the next chunk of text; returns the names of fields completed by it"""
+        self.buffer += chunk
+        completed = []
+        while self.pos < len(self.buffer) and not (self.done or self.failed):
+            i = self.pos
+            c = self.buffer[i]
+            self.pos += 1
+
+            if self.state == 'start':
+                if c == '{':
+                    self.depth = 1
+                    self.object_start = i
+                    self.state = 'key'
+                continue
+
+            if self.in_string:
+                if self.escape:
+                    self.escape = False
+                elif c == '\\':
+                    self.escape = True
+                elif c == '"':
+                    self.in_string = False
+                    if self.depth == 1 and self.state == 'key':
+                        try:
+                            self.key = json.loads(self.buffer[self.key_start:i + 1])
+                            self.state = 'colon'
+                        except ValueError:
+                            self.state = 'failed'
+                    elif self.depth == 1 and self.state == 'value':
+                        completed.append(self._complete(i + 1))
+                continue
+
+            if c == '"':
+                self.in_string = True
+                if self.depth == 1 and self.state == 'key':
+                    self.key_start = i
+                elif self.depth == 1 and self.state == 'value' and self.value_start is None:
+                    self.value_start = i
+            elif c == ':' and self.depth == 1 and self.state == 'colon':
+                self.state = 'value'
+                self.value_start = None
+            elif c in '{[':
+                if self.depth == 1 and self.state == 'value' and self.value_start is None:
+                    self.value_start = i
+                self.depth += 1
+            elif c in '}]':
+                self.depth -= 1
+                if self.depth == 1 and self.state == 'value':
+                    completed.append(self._complete(i + 1))
+                elif self.depth == 0 and not self.failed:
+                    if self.state == 'value' and self.value_start is not None:  # trailing number/true/false/null
+                        completed.append(self._complete(i))
+                    self.object_end = i + 1
+                    self.state = 'done'
+            elif c == ',' and self.depth == 1:
+                if self.state == 'value' and self.value_start is not None:
+                    completed.append(self._complete(i))
+                self.state = 'key'
+            elif not c.isspace() and self.depth == 1 and self.state == 'value' and self.value_start is None:
+                self.value_start = i
+        return [name for name in completed if name is not None]
+
+    def _complete(self, end):
+        try:
+            self.fields[self.key] = json.loads(self.buffer[self.value_start:end])
+        except ValueError:  # not strict JSON; leave it to parse_action on the full text
+            self.state = 'failed'
+            return None
+        self.state = 'after'
+        self.value_start = None
+        return self.key
+
+    def result(self):
+        """Decode the whole object once the stream has finished, checked like parse_action"""
+        if not self.done:
+            raise ValueError(f"incomplete JSON object in response: {self.buffer!r}")
+        response = json.loads(self.buffer[self.object_start:self.object_end])
+        if not isinstance(response, dict):
+            raise ValueError(f"could not parse response as a JSON object: {self.buffer[:200]!r}")
+        return normalize_action(response, self.buffer)
@@ -0,0 +1,194 @@
+'''screen.py (screen capture and screenshot encoding for give_screenshot)'''
+
+import io
+import time
+import base64
+import asyncio
+import numpy as np
+from PIL import Image, ImageGrab
+
+
+MIME_TYPES = {"PNG": "image/png", "JPEG": "image/jpeg", "WEBP": "image/webp"}
+UNCHANGED = "Screen unchanged since the last screenshot"
+REGION_NOTE = "Only the changed part of the screen is shown"  # history_manager keeps these crops and their base frame
+
+
+def encode_image(image, max_edge=0, format="JPEG", quality=80):
+    """Downscale image so its long edge is at most max_edge (0 keeps full size) and encode it
+
+    Returns (encoded bytes, mime type, (width, height) of the encoded image).
+    quality is ignored for PNG.
+    """
+    format = "JPEG" if format.upper() == "JPG" else format.upper()
+    if format not in MIME_TYPES:
+        raise ValueError(f"unsupported screenshot format: {format}")
+    if max_edge and max(image.size) > max_edge:
+        factor = max(image.size) // max_edge
+        if factor > 1:  # box-average by a whole factor first; much cheaper than resampling 4K directly
+            image = image.reduce(factor)
+        if max(image.size) > max_edge:
+            scale = max_edge / max(image.size)
+            image = image.resize((round(image.width * scale), round(image.height * scale)), Image.Resampling.BILINEAR)
+    if format != "PNG" and image.mode not in ("RGB", "L"):
+        image = image.convert("RGB")
+    with io.BytesIO() as buffer:
+        if format == "PNG":
+            image.save(buffer, format="PNG")
+        elif format == "WEBP":
+            image.save(buffer, format="WEBP", quality=quality, method=2)
+        else:
+            image.save(buffer, format="JPEG", quality=quality)
+        return buffer.getvalue(), MIME_TYPES[format], image.size
+
+
+def block_signature(image, block=16):
+    """Mean brightness of every block x block tile as a NumPy array (a cheap perceptual fingerprint)"""
+    return np.asarray(image.convert("L").reduce(block), dtype=np.int16)
+
+
+def changed_box(previous, current, block=16, threshold=2):
+    """Pixel bounding box (left, top, right, bottom) of the tiles whose brightness moved by more than threshold, or None"""
+    changed = np.abs(current - previous) > threshold
+    if not changed.any():
+        return None
+    rows = np.flatnonzero(changed.any(axis=1))
+    cols = np.flatnonzero(changed.any(axis=0))
+    return int(cols[0]) * block, int(rows[0]) * block, (int(cols[-1]) + 1) * block, (int(rows[-1]) + 1) * block
+
+
+class ScreenGeometry:
+    """Cached size of the mouse coordinate space
+
+    read_size() (e.g. pyautogui.size) is called again only after ttl seconds, or
+    right away when a screenshot comes back with a new size (the display changed).
+    """
+
+    def __init__(self, read_size, ttl=5.0):
+        self.read_size = read_size
+        self.ttl = ttl
+        self.size = None
+        self.frame_size = None
+        self.read_at = 0
+
+    def refresh(self):
+        self.size = tuple(self.read_size())
+        self.read_at = time.monotonic()
+        return self.size
+
+    def get(self):
+        """(width, height) of the mouse coordinate space"""
+        if self.size is None or time.monotonic() - self.read_at > self.ttl:
+            return self.refresh()
+        return self.size
+
+    def frame_seen(self, frame_size):
+        """Called with the pixel size of every screenshot"""
+        if frame_size != self.frame_size:
+            self.frame_size = frame_size
+            self.refresh()
+
+    def to_point(self, x, y):
+        """Mouse position in pixels for x, y given as fractions of the screen"""
+        width, height = self.get()
+        return min(int(width * x), width - 1), min(int(height * y), height - 1)
+
+
+class ScreenCapture:
+    """Grabs the screen and encodes it on a worker thread so the event loop keeps running
+
+    The encoded image is at most max_edge pixels on its long side; the result
+    still reports the real screen size so coordinates can be scaled back.
+
+    With delta on, the block signature of the last frame sent is kept. If no
+    tile changed since then the capture returns UNCHANGED instead of an image;
+    if the changed tiles cover less than max_region of the screen only that
+    region is sent (at most max_deltas times in a row before a full frame).
+
+    With an elements index (ui_elements.ElementIndex) every frame sent is also
+    scanned for UI elements and their numbered listing goes with the image.
+    """
+
+    def __init__(self, max_edge=1920, format="JPEG", quality=80, grab=None, delta=True, block=16, threshold=2,
+                 max_region=0.5, max_deltas=5, geometry=None, elements=None):
+        self.max_edge = max_edge
+        self.format = format
+        self.quality = quality
+        self.grab = grab or ImageGrab.grab
+        self.delta = delta
+        self.block = block
+        self.threshold = threshold
+        self.max_region = max_region
+        self.max_deltas = max_deltas
+        self.geometry = geometry
+        self.elements = elements
+        self.previous = None  # block signature of the last frame the model received
+        self.deltas = 0
+
+    def reset(self):
+        """Make the next capture a full frame (e.g. at the start of a task)"""
+        self.previous = None
+        self.deltas = 0
+
+    def _changed_region(self, image, signature):
+        if self.previous is None or self.previous.shape != signature.shape:
+            return None, True
+        box = changed_box(self.previous, signature, self.block, self.threshold)
+        if box is None:
+            return None, False
+        width, height = image.size
+        left, top, right, bottom = (max(box[0] - self.block, 0), max(box[1] - self.block, 0),
+                                    min(box[2] + self.block, width), min(box[3] + self.block, height))
+        if self.deltas >= self.max_deltas or (right - left) * (bottom - top) > self.max_region * width * height:
+            return None, True
+        return (left, top, right, bottom), True
+
+    def capture_sync(self, full=False):
+        image = self.grab()
+        if self.geometry is not None:
+            self.geometry.frame_seen(image.size)
+        region = None
+        if self.delta:
+            signature = block_signature(image, self.block)
+            if not full:
+                region, changed = self._changed_region(image, signature)
+                if not changed:
+                    return UNCHANGED
+            self.previous = signature
+        result = self._encode(image, region)
+        if self.elements is not None:
+            result["elements"] = self.elements.update(image)
+        return result
+
+    def _encode(self, image, region):
+        width, height = image.size
+        if region is None:
+            self.deltas = 0
+            data, mime_type, (image_width, image_height) = encode_image(image, self.max_edge, self.format, self.quality)
+            return {
+                "image_base64": base64.b64encode(data).decode("utf-8"),
+                "mime_type": mime_type,
+                "width": width,
+                "height": height,
+                "image_width": image_width,
+                "image_height": image_height
+            }
+
+        self.deltas += 1
+        left, top, right, bottom = region
+        crop = image.crop(region)
+        scale = min(1, self.max_edge / max(width, height)) if self.max_edge else 1  # same detail as a full frame
+        data, mime_type, (image_width, image_height) = encode_image(crop, round(max(crop.size) * scale), self.format, self.quality)
+        return {
+            "image_base64": base64.b64encode(data).decode("utf-8"),
+            "mime_type": mime_type,
+            "width": width,
+            "height": height,
+            "image_width": image_width,
+            "image_height": image_height,
+            "note": (f"{REGION_NOTE}: x {left / width:.3f}-{right / width:.3f}, y {top / height:.3f}-{bottom / height:.3f} "
+                     f"of the screen (pixels {left},{top} to {right},{bottom}); the rest is unchanged since the last screenshot")
+        }
+
+    async def capture(self, full=False):
+        """Screenshot dict for tool_registry.to_result, or UNCHANGED"""
+        return await asyncio.to_thread(self.capture_sync, full)
@@ -0,0 +1,307 @@
+'''shell.py (asyncio subprocess engine behind execute_cmd_command)'''
+
+import os
+import re
+import sys
+import signal
+import asyncio
+import locale
+import secrets
+import tempfile
+import contextlib
+from dataclasses import dataclass
+
+
+@dataclass
+class CommandResult:
+    """Outcome of one command: exit code (None if killed), bounded output and timing"""
+    command: str
+    returncode: int
+    output: str
+    timed_out: bool
+    truncated: int   # bytes of output dropped from the middle
+    elapsed: float
+
+    def summary(self):
+        """Text sent back to the LLM as the tool result"""
+        if self.timed_out:
+            status = f"{self.command} timed out after {self.elapsed:.1f}s and was killed"
+        elif self.returncode is None:
+            status = f"{self.command} ended the shell"
+        else:
+            status = f"{self.command} exited with code {self.returncode}"
+        output = self.output.strip()
+        return f"{status}\n{output}" if output else f"{status} (no output)"
+
+
+class BoundedOutput:
+    """Keeps the first and last limit/2 bytes of a stream and counts what was dropped in between"""
+
+    def __init__(self, limit):
+        self.head_limit = limit // 2
+        self.tail_limit = limit - self.head_limit
+        self.head = bytearray()
+        self.tail = bytearray()
+        self.dropped = 0
+
+    def write(self, data):
+        room = self.head_limit - len(self.head)
+        if room > 0:
+            self.head += data[:room]
+            data = data[room:]
+        self.tail += data
+        extra = len(self.tail) - self.tail_limit
+        if extra > 0:
+            del self.tail[:extra]
+            self.dropped += extra
+
+    def text(self):
+        encoding = locale.getpreferredencoding(False)
+        head = self.head.decode(encoding, errors="replace")
+        tail = self.tail.decode(encoding, errors="replace")
+        if self.dropped:
+            return f"{head}\n[... {self.dropped} bytes omitted ...]\n{tail}"
+        return head + tail
+
+
+async def _kill_tree(process):
+    """Kill the shell and everything it started"""
+    if process.returncode is not None:
+        return
+    try:
+        if sys.platform == "win32":
+            killer = await asyncio.create_subprocess_exec(
+                "taskkill", "/T", "/F", "/PID", str(process.pid),
+                stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.DEVNULL
+            )
+            await killer.wait()
+        else:
+            os.killpg(process.pid, signal.SIGKILL)
+    except (ProcessLookupError, OSError):
+        pass
+    if process.returncode is None:
+        try:
+            process.kill()
+        except ProcessLookupError:
+            pass
+
+
+class CommandRunner:
+    """Runs shell commands without blocking the event loop
+
+    At most max_concurrent commands run at once (the rest wait their turn),
+    each is killed after timeout seconds, and only max_output bytes of the
+    combined stdout/stderr are kept (head and tail).
+    """
+
+    def __init__(self, cwd=None, timeout=60, max_output=8000, max_concurrent=2):
+        self.cwd = cwd
+        self.timeout = timeout
+        self.max_output = max_output
+        self.max_concurrent = max_concurrent
+        self._semaphores = {}  # event loop -> semaphore (backend.py starts a new loop per listening session)
+
+    def _semaphore(self):
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            self._semaphores = {l: s for l, s in self._semaphores.items() if not l.is_closed()}
+            semaphore = self._semaphores[loop] = asyncio.Semaphore(self.max_concurrent)
+        return semaphore
+
+    async def _read(self, stream, output):
+        while True:
+            data = await stream.read(4096)
+            if not data:
+                return
+            output.write(data)
+
+    async def run(self, command, timeout=None):
+        """Run command in a shell and return a CommandResult; raises only if the shell cannot start"""
+        timeout = timeout or self.timeout
+        async with self._semaphore():
+            loop = asyncio.get_running_loop()
+            started = loop.time()
+            process = await asyncio.create_subprocess_shell(
+                command,
+                cwd=self.cwd,
+                stdin=asyncio.subprocess.DEVNULL,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.STDOUT,
+                start_new_session=sys.platform != "win32"
+            )
+            output = BoundedOutput(self.max_output)
+            reader = asyncio.create_task(self._read(process.stdout, output))
+            timed_out = False
+            try:
+                timed_out = not await self._wait(process, reader, started + timeout)
+            finally:
+                if process.returncode is None:  # timed out or cancelled
+                    await _kill_tree(process)
+                if not reader.done():
+                    reader.cancel()
+                    await asyncio.gather(reader, return_exceptions=True)
+                    process._transport.close()  # release the pipe still held by an app the command started
+            return CommandResult(command, None if timed_out else process.returncode, output.text(), timed_out,
+                                 output.dropped, loop.time() - started)
+
+    async def _wait(self, process, reader, deadline):
+        """Wait for the shell to exit and its output to drain; False on timeout
+
+        process.wait() also waits for every inherited pipe to close, so a GUI app
+        started by the command (start notepad, code file) would hold it open; the
+        exit code is polled instead and the output gets a short grace period.
+        """
+        loop = asyncio.get_running_loop()
+        while not reader.done():
+            if process.returncode is not None:
+                await asyncio.wait({reader}, timeout=0.2)
+                return True
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                return False
+            await asyncio.wait({reader}, timeout=min(0.05, remaining))
+        while process.returncode is None:  # output closed, the shell is exiting
+            if loop.time() >= deadline:
+                return False
+            await asyncio.sleep(0.01)
+        return True
+
+
+_FOR_VARIABLE = re.compile(r"(?i)\bfor\b[^\r\n%]*?%([a-z])\s+in\b")
+
+
+def batch_text(command):
+    """command as the body of a .cmd file: for-loop variables typed as %i (the command line form) become %%i"""
+    for letter in set(_FOR_VARIABLE.findall(command)):
+        command = re.sub(rf"(?<!%)%(~[a-z$:]*?)?{letter}(?![\w%])", rf"%%\1{letter}", command)
+    return command
+
+
+class ShellSession:
+    """One long-lived shell that runs commands in turn, so cd and set/export carry over between steps
+
+    Each command is written to the shell's stdin followed by an echo of a
+    unique marker and the exit code; output up to the marker is the command's
+    output. A command that times out (or is cancelled) kills the shell and the
+    next command starts a fresh one in cwd. A new event loop (backend.py starts
+    one per listening session) also gets a fresh shell.
+    """
+
+    def __init__(self, cwd=None, timeout=60, max_output=8000):
+        self.cwd = cwd
+        self.timeout = timeout
+        self.max_output = max_output
+        self.encoding = locale.getpreferredencoding(False)
+        self.process = None
+        self.loop = None
+        self.lock = None
+        self.pending = bytearray()
+        self.token = secrets.token_hex(8)
+        self.count = 0
+        self.shells_started = 0
+        self.script = os.path.join(tempfile.gettempdir(), f"agent_shell_{self.token}.cmd")
+
+    def _marker(self):
+        self.count += 1
+        return f"__agent_{self.token}_{self.count}__"
+
+    def _wrap(self, command, marker):
+        # an empty stdin stops the command (pause, set /p, an overwrite prompt) reading the marker line
+        if sys.platform == "win32":
+            # a called batch file runs in the session, so cd/set carry over, and unlike a
+            # parenthesised block it is not ended early by a ")" in the command
+            with open(self.script, "w", encoding=self.encoding, newline="\r\n") as f:
+                f.write(batch_text(command) + "\n")
+            return f'call "{self.script}" <NUL\r\necho {marker} %errorlevel%\r\n'
+        # the group (not a subshell) keeps cd/export
+        return f"{{ {command}\n}} </dev/null\necho \"{marker} $?\"\n"
+
+    async def _send(self, text):
+        self.process.stdin.write(text.encode(self.encoding))
+        await self.process.stdin.drain()
+
+    async def _start(self, deadline):
+        shell = ("cmd.exe", "/D", "/Q") if sys.platform == "win32" else ("/bin/sh",)
+        self.process = await asyncio.create_subprocess_exec(
+            *shell,
+            cwd=self.cwd,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.STDOUT,
+            start_new_session=sys.platform != "win32"
+        )
+        self.pending.clear()
+        self.shells_started += 1
+        marker = self._marker()
+        newline = "\r\n" if sys.platform == "win32" else "\n"
+        await self._send(f"echo {marker} 0{newline}")
+        await self._read_until(marker, BoundedOutput(self.max_output), deadline)  # skips the cmd.exe banner
+
+    async def _read_until(self, marker, output, deadline):
+        """Move output into output until marker; returns the exit code echoed after it"""
+        marker = marker.encode()
+        loop = asyncio.get_running_loop()
+        while True:
+            index = self.pending.find(marker)
+            if index >= 0:
+                end = self.pending.find(b"\n", index)
+                if end >= 0:
+                    output.write(bytes(self.pending[:index]))
+                    code = self.pending[index + len(marker):end].strip()
+                    del self.pending[:end + 1]
+                    return int(code) if code.lstrip(b"-").isdigit() else None
+            elif len(self.pending) > len(marker):  # hold back what could be the start of the marker
+                output.write(bytes(self.pending[:-len(marker)]))
+                del self.pending[:-len(marker)]
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                raise asyncio.TimeoutError
+            data = await asyncio.wait_for(self.process.stdout.read(4096), remaining)
+            if not data:
+                raise EOFError("shell exited")
+            self.pending += data
+
+    async def run(self, command, timeout=None):
+        """Run command in the session shell and return a CommandResult; raises only if the shell cannot start"""
+        timeout = timeout or self.timeout
+        loop = asyncio.get_running_loop()
+        if self.loop is not loop:
+            self.loop = loop
+            self.lock = asyncio.Lock()
+            self.process = None
+        async with self.lock:
+            started = loop.time()
+            deadline = started + timeout
+            output = BoundedOutput(self.max_output)
+            returncode = None
+            timed_out = False
+            finished = False
+            try:
+                if self.process is None or self.process.returncode is not None:
+                    await self._start(deadline)
+                marker = self._marker()
+                await self._send(self._wrap(command, marker))
+                returncode = await self._read_until(marker, output, deadline)
+                finished = True
+            except asyncio.TimeoutError:
+                timed_out = True
+            except (EOFError, ConnectionResetError, BrokenPipeError):  # the command ran exit
+                output.write(bytes(self.pending))
+            finally:
+                if not finished:  # timed out, shell gone or cancelled: the next command gets a new shell
+                    await self.close()
+            result = CommandResult(command, returncode, output.text(), timed_out, output.dropped, loop.time() - started)
+            if not finished:
+                result.output += "\n(the next command starts a new shell in the default working directory)"
+            return result
+
+    async def close(self):
+        """Kill the shell; call from the event loop it was started on"""
+        process, self.process = self.process, None
+        if process is None:
+            return
+        await _kill_tree(process)
+        process._transport.close()
+        with contextlib.suppress(OSError):
+            os.remove(self.script)
@@ -0,0 +1,144 @@
+'''speech_engines.py (interchangeable speech-to-text engines for the voice loop)
+
+Every engine takes 16-bit mono PCM and returns the recognized text, "" when
+nothing was understood, and raises SpeechEngineError when it cannot run at all
+(no network, model missing). Engine packages are only imported when used.
+'''
+
+import re
+import json
+import time
+import numpy as np
+
+try:
+    import speech_recognition as sr
+except ImportError:
+    sr = None
+
+
+class SpeechEngineError(Exception):
+    pass
+
+
+def resample(pcm, sample_rate, target_rate):
+    """16-bit PCM at sample_rate converted to target_rate by linear interpolation"""
+    if sample_rate == target_rate:
+        return pcm
+    samples = np.frombuffer(pcm, dtype=np.int16).astype(np.float32)
+    positions = np.arange(int(len(samples) * target_rate / sample_rate)) * sample_rate / target_rate
+    return np.interp(positions, np.arange(len(samples)), samples).astype(np.int16).tobytes()
+
+
+class GoogleEngine:
+    """Google Web Speech API through speech_recognition (needs the network)"""
+    name = "google"
+
+    def __init__(self, language="en-US"):
+        if sr is None:
+            raise SpeechEngineError("speech_recognition is not installed (pip install SpeechRecognition)")
+        self.language = language
+        self.recognizer = sr.Recognizer()
+
+    def transcribe(self, pcm, sample_rate):
+        try:
+            return self.recognizer.recognize_google(sr.AudioData(pcm, sample_rate, 2), language=self.language)
+        except sr.UnknownValueError:
+            return ""
+        except sr.RequestError as err:
+            raise SpeechEngineError(f"Google speech API unreachable: {err}") from err
+
+
+class VoskEngine:
+    """Offline Kaldi recognizer (pip install vosk, plus a model folder from alphacephei.com/vosk/models)"""
+    name = "vosk"
+
+    def __init__(self, model_path="model"):
+        try:
+            from vosk import Model, KaldiRecognizer, SetLogLevel
+        except ImportError as err:
+            raise SpeechEngineError("vosk is not installed (pip install vosk)") from err
+        SetLogLevel(-1)
+        try:
+            self.model = Model(model_path)  # loaded once, a recognizer per utterance is cheap
+        except Exception as err:
+            raise SpeechEngineError(f"cannot load Vosk model from {model_path}: {err}") from err
+        self.KaldiRecognizer = KaldiRecognizer
+
+    def transcribe(self, pcm, sample_rate):
+        recognizer = self.KaldiRecognizer(self.model, sample_rate)
+        recognizer.AcceptWaveform(pcm)
+        return json.loads(recognizer.FinalResult()).get("text", "")
+
+
+class WhisperEngine:
+    """Offline Whisper on the CPU with int8 weights (pip install faster-whisper; the model downloads on first use)"""
+    name = "whisper"
+
+    def __init__(self, model="base.en", language="en", threads=0):
+        try:
+            from faster_whisper import WhisperModel
+        except ImportError as err:
+            raise SpeechEngineError("faster-whisper is not installed (pip install faster-whisper)") from err
+        self.language = language
+        self.model = WhisperModel(model, device="cpu", compute_type="int8", cpu_threads=threads)
+
+    def transcribe(self, pcm, sample_rate):
+        audio = np.frombuffer(resample(pcm, sample_rate, 16000), dtype=np.int16).astype(np.float32) / 32768
+        segments, _ = self.model.transcribe(audio, language=self.language, beam_size=1, vad_filter=False)
+        return " ".join(segment.text.strip() for segment in segments).strip()
+
+
+class FallbackEngine:
+    """Uses primary and switches to fallback (for retry_after seconds) whenever primary cannot run"""
+
+    def __init__(self, primary, fallback, retry_after=60):
+        self.primary = primary
+        self.fallback = fallback
+        self.retry_after = retry_after
+        self.failed_at = None
+        self.name = f"{primary.name}+{fallback.name}"
+
+    def transcribe(self, pcm, sample_rate):
+        if self.failed_at is None or time.monotonic() - self.failed_at > self.retry_after:
+            try:
+                text = self.primary.transcribe(pcm, sample_rate)
+                self.failed_at = None
+                return text
+            except SpeechEngineError as err:
+                print(f"⚠️ {self.primary.name} failed, using {self.fallback.name} =>", err)
+                self.failed_at = time.monotonic()
+        return self.fallback.transcribe(pcm, sample_rate)
+
+
+ENGINES = ("google", "vosk", "whisper")
+
+
+def make_engine(name="google", fallback="", language="en-US", vosk_model="model", whisper_model="base.en"):
+    """Engine by name, optionally backed by a second engine for when the first cannot run"""
+    def build(engine_name):
+        if engine_name == "google":
+            return GoogleEngine(language)
+        if engine_name == "vosk":
+            return VoskEngine(vosk_model)  # the language comes with the model
+        if engine_name == "whisper":
+            return WhisperEngine(whisper_model, language.split("-")[0])
+        raise SpeechEngineError(f"unknown speech engine {engine_name!r}, expected one of {', '.join(ENGINES)}")
+
+    engine = build(name)
+    return FallbackEngine(engine, build(fallback)) if fallback and fallback != name else engine
+
+
+def _words(text):
+    return re.sub(r"[^\w\s']", " ", text.lower()).split()
+
+
+def word_errors(reference, hypothesis):
+    """(substitutions + deletions + insertions, reference word count) after lower-casing and dropping punctuation"""
+    ref, hyp = _words(reference), _words(hypothesis)
+    previous = list(range(len(hyp) + 1))
+    for i, ref_word in enumerate(ref, 1):
+        current = [i]
+        for j, hyp_word in enumerate(hyp, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ref_word != hyp_word)))
+        previous = current
+    return previous[-1], len(ref)
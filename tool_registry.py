@@ -0,0 +1,169 @@
+'''tool_registry.py (registry of the tools the LLM can call)'''
+
+import json
+import typing
+import inspect
+from dataclasses import dataclass, field
+
+
+TOOLS = {}
+
+JSON_TYPES = {str: "string", int: "integer", float: "number", bool: "boolean"}
+
+
+@dataclass
+class Tool:
+    """A registered tool: its function, prompt documentation and argument checkers"""
+    name: str
+    func: typing.Callable
+    description: str
+    notes: list
+    example: dict
+    parameters: dict                              # name -> JSON schema of the argument
+    arguments: list = field(default_factory=list)  # (name, coerce, required, default)
+
+
+def _coerce_for(name, annotation):
+    """Build the checker for one argument once, at registration time"""
+    origin = typing.get_origin(annotation)
+    args = typing.get_args(annotation)
+
+    if annotation is bool:
+        def coerce(value):
+            if isinstance(value, bool):
+                return value
+            if isinstance(value, str) and value.lower() in ("true", "false"):
+                return value.lower() == "true"
+            raise ValueError(f"{name} must be true or false")
+    elif annotation in (int, float):
+        def coerce(value):
+            if isinstance(value, bool):
+                raise ValueError(f"{name} must be a number")
+            try:
+                return annotation(value)
+            except (TypeError, ValueError):
+                raise ValueError(f"{name} must be a number") from None
+    elif annotation is str:
+        def coerce(value):
+            if isinstance(value, (dict, list)):
+                raise ValueError(f"{name} must be a string")
+            return value if isinstance(value, str) else str(value)
+    elif annotation is list or origin is list:
+        item = _coerce_for(f"{name}[]", args[0]) if args else None
+        def coerce(value):
+            if not isinstance(value, list):
+                raise ValueError(f"{name} must be a list")
+            return [item(v) for v in value] if item else value
+    elif annotation is dict or origin is dict:
+        def coerce(value):
+            if not isinstance(value, dict):
+                raise ValueError(f"{name} must be an object")
+            return value
+    else:
+        def coerce(value):
+            return value
+    return coerce
+
+
+def _json_schema(annotation):
+    origin = typing.get_origin(annotation)
+    args = typing.get_args(annotation)
+    if annotation in JSON_TYPES:
+        return {"type": JSON_TYPES[annotation]}
+    if annotation is list or origin is list:
+        return {"type": "array", "items": _json_schema(args[0]) if args else {"type": "string"}}
+    return {"type": "string"}
+
+
+def tool(example=None, schema=None):
+    """Register an async tool; its keyword parameters are the input_data fields
+
+    The first docstring line is the tool description for the system prompt and any
+    further lines are extra notes. schema overrides the JSON schema of individual
+    parameters (needed for lists of objects).
+    """
+    def decorator(func):
+        doc = inspect.cleandoc(func.__doc__ or "").splitlines()
+        hints = typing.get_type_hints(func)
+        registered = Tool(func.__name__, func, doc[0] if doc else func.__name__,
+                          [line for line in doc[1:] if line.strip()], example or {}, {})
+        for name, param in inspect.signature(func).parameters.items():
+            annotation = hints.get(name, str)
+            registered.parameters[name] = (schema or {}).get(name) or _json_schema(annotation)
+            registered.arguments.append((name, _coerce_for(name, annotation), param.default is inspect.Parameter.empty, param.default))
+        TOOLS[func.__name__] = registered
+        return func
+    return decorator
+
+
+def validate(registered, input_data):
+    """Check and convert input_data into keyword arguments for the tool; raises ValueError"""
+    if not isinstance(input_data, dict):
+        raise ValueError("input_data must be an object")
+    kwargs = {}
+    for name, coerce, required, default in registered.arguments:
+        if name in input_data:
+            kwargs[name] = coerce(input_data[name])
+        elif required:
+            raise ValueError(f"missing {name}")
+    return kwargs
+
+
+def to_result(name, result):
+    """Shared post-processing: turn a tool's return value into what goes back to the LLM
+
+    Tools return a string, or a dict with "image_base64" (sent as an image part with
+    the screen size, the image size if it was downscaled, an optional "note" and
+    an optional "elements" listing) or "error".
+    """
+    if isinstance(result, dict):
+        if "error" in result:
+            return f"error in tool({name}) => {result['error']}"
+        if "image_base64" in result:
+            image_part = {
+                "inline_data": {
+                    "data": result["image_base64"],
+                    "mime_type": result.get("mime_type", "image/png")
+                }
+            }
+            dimensions = f"Screen width: {result['width']}, height: {result['height']}"
+            if "note" in result:
+                dimensions = f"{result['note']}. {dimensions}, region image {result['image_width']}x{result['image_height']}"
+            elif (result.get("image_width"), result.get("image_height")) not in ((None, None), (result["width"], result["height"])):
+                dimensions += f" (image downscaled to {result['image_width']}x{result['image_height']})"
+            if "elements" in result:
+                dimensions = f"{dimensions}\n{result['elements']}"
+            return [image_part, {"text": dimensions}]
+    return result
+
+
+async def dispatch(name, input_data):
+    """Validate input_data once and call the tool with it directly"""
+    registered = TOOLS.get(name)
+    if registered is None:
+        return f'Error: Unknown tool: {name}'
+    try:
+        kwargs = validate(registered, input_data)
+    except ValueError as err:
+        return f"error in tool({name}) => invalid input_data: {err}"
+    return to_result(name, await registered.func(**kwargs))
+
+
+def schema_parameters():
+    """Union of every tool's input_data fields, for response_parser.action_schema"""
+    parameters = {}
+    for registered in TOOLS.values():
+        for name, schema in registered.parameters.items():
+            parameters.setdefault(name, schema)
+    return parameters
+
+
+def tool_docs():
+    """The AVAILABLE TOOLS section of the system prompt"""
+    blocks = []
+    for registered in TOOLS.values():
+        lines = [f"- {registered.name}(input_data): ", f"    # {registered.description}",
+                 f"    # Example: {json.dumps(registered.example)}"]
+        lines += [f"    # {note}" for note in registered.notes]
+        blocks.append("\n".join(lines))
+    return "\n\n".join(blocks)
@@ -1,175 +1,324 @@
-'''tools.py (tools use by LLM to perform given tasks)'''
-
-import os
-import json
-import subprocess
-import webbrowser
-from pathlib import Path
-from pynput.keyboard import Controller as KeyboardController, Key
-from pynput.mouse import Controller as MouseController, Button
-import asyncio
-import io
-import time
-import base64
-import pyautogui
-from PIL import ImageGrab
-
-
-WORKING_DIR = os.getenv('WORKING_DIRECTORY', os.getcwd())
-
-
-async def execute_cmd_command(input_data): # sample input_data = '{"command": "mkdir D:\temporary\desktop-agent-files\project1"}'
-    try:  
-        data = json.loads(input_data)         
-        command = data["command"]       
-        print("Executing:", command)
-        subprocess.run(command, shell=True, capture_output=True, text=True)
-        return f"{command} has run successfully"
-    except Exception as err: 
-        print("error in tool(execute_cmd_command) =>", err)
-        return f"error in tool(execute_cmd_command) => {err}"
-
-
-async def open_file(input_data):  # sample input_data = '{"file_path": "D:/Coding/All Codes/C++/tempp/A.cpp"}'
-    try:
-        data = json.loads(input_data)
-        file_path = data["file_path"]
-        json_to_send = json.dumps({"command": f'code "{file_path}"'})
-        res = await execute_cmd_command(json_to_send)
-        return f"{file_path} file opened successfully"
-    except Exception as err:
-        print("error in tool(open_file) =>", err)
-        return f"error in tool(open_file) => {err}"
-
-
-async def open_app(input_data):  # sample input_data = '{"app_name":"nodepad"}'
-    try:
-        data = json.loads(input_data)
-        app_to_start = data["app_name"]
-        data = json.dumps({"keys_to_press": ["ctrl","esc"]})
-        res = await press_keyboard_key(data)
-        await asyncio.sleep(0.5)
-        data = json.dumps({"content": app_to_start})
-        res = await write_content(data)
-        await asyncio.sleep(1)
-        data = json.dumps({"keys_to_press": ["enter"]})
-        res = await press_keyboard_key(data)
-        await asyncio.sleep(1)
-        return f"{app_to_start} opened successfully"
-    except Exception as err:
-        print("error in tool(open_app) =>", err)
-        return f"error in tool(open_app) => {err}"
-
-
-async def open_website(input_data): # sample input_data = '{"website":"https://www.youtube.com/"}' 
-    try:
-        data = json.loads(input_data)
-        website_to_open = data["website"]
-        webbrowser.open(website_to_open)
-        return f"{website_to_open} has opened successfully"
-    except Exception as err:
-        print("error in tool(open_website) =>", err)
-        return  f"error in tool(open_website) => {err}"
-
-
-async def press_keyboard_key(input_data): # Using pynput.keyboard | sample input_data = '{"keys_to_press": ["ctrl","shift","esc"]}' 
-    try:
-        keyboard = KeyboardController()
-        data = json.loads(input_data)
-        keys_to_press=data["keys_to_press"]
-        for k in keys_to_press:
-            key_obj = getattr(Key, k, k)
-            keyboard.press(key_obj)
-            await asyncio.sleep(0.05)
-        for k in reversed(keys_to_press):
-            key_obj = getattr(Key, k, k)
-            keyboard.release(key_obj)
-            await asyncio.sleep(0.05)
-        return f"{keys_to_press} pressed successfully"
-    except Exception as err:
-        print("error in tool(press_keyboard_key) =>", err)
-        return  f"error in tool(press_keyboard_key) => {err}"
-
-
-async def write_content(input_data): # sample input_data = '{"content": "any content to write"}'
-    try:
-        keyboard = KeyboardController()
-        data = json.loads(input_data)
-        content = data["content"]
-        keyboard.type(content)
-        return f"content written successfully"
-    except Exception as err:
-        print("error in tool(write_content) =>", err)
-        return  f"error in tool(write_content) => {err}"
-
-
-async def give_screenshot(input_data): # sample input_data = '{}'
-    try:
-        screenshot = ImageGrab.grab()
-        width, height = screenshot.size
-        with io.BytesIO() as buffer:
-            screenshot.save(buffer, format="PNG")
-            buffer.seek(0)
-            base64_string = base64.b64encode(buffer.read()).decode("utf-8")
-        return {
-            "image_base64": base64_string,
-            "width": width,
-            "height": height
-        }
-    except Exception as err:
-        print("❌ error in tool(give_screenshot) =>", err)
-        return {"error": str(err)}
-
-
-async def move_mouse_pointer(input_data):  # sample input_data = '{"x": 0.15, "y": 0.9}'
-    try:
-        data = json.loads(input_data)
-        x_per = data["x"]
-        y_per = data["y"]
-        width, height = pyautogui.size()
-
-        x = int(width * x_per)
-        y = int(height * y_per)
-        pyautogui.moveTo(x, y, duration=0.5)
-        print(f"mouse is successfully moved to position ({x}, {y})") 
-        return f"mouse is successfully moved to given position"
-    except Exception as err:
-        print("❌ error in tool(move_mouse_pointer) =>", err)
-        return f"error in tool(move_mouse_pointer) => {err}"
-
-
-async def click_mouse_buttons(input_data):  # sample input_data = '{"button": "left","clicks": 2 }'
-    try:
-        mouse = MouseController()
-        data = json.loads(input_data)
-
-        button_name = data.get("button", "left").lower()
-        clicks = int(data.get("clicks", 1))
-
-        if button_name == "left":
-            button = Button.left
-        elif button_name == "right":
-            button = Button.right
-        elif button_name == "middle":
-            button = Button.middle
-        else:
-            return f"Invalid button name: {button_name}"
-
-        for _ in range(clicks):
-            mouse.click(button)
-            await asyncio.sleep(0.1)
-
-        current_pos = mouse.position
-        return f"Clicked {button_name} button {clicks} times at {current_pos}"
-
-    except Exception as err:
-        print("❌ error in tool(click_mouse_buttons) =>", err)
-        return f"error in tool(click_mouse_buttons) => {err}"
-
-
-
-
-
-
-
-
+'''tools.py (tools use by LLM to perform given tasks)'''
+
+import os
+import sys
+import webbrowser
+import asyncio
+import pyautogui  # screen size only (cached in screen_geometry); all input goes through input_service
+from tool_registry import tool
+from shell import CommandRunner, ShellSession
+from screen import ScreenCapture, ScreenGeometry
+import waits
+from input_service import InputService
+import clipboard
+import file_writer
+from ui_elements import ElementIndex
+
+
+WORKING_DIR = os.getenv('WORKING_DIRECTORY', os.getcwd())
+CMD_TIMEOUT = float(os.getenv('CMD_TIMEOUT', '60'))
+CMD_MAX_OUTPUT = int(os.getenv('CMD_MAX_OUTPUT', '8000'))
+CMD_MAX_CONCURRENT = int(os.getenv('CMD_MAX_CONCURRENT', '2'))
+SHELL_SESSION = os.getenv('SHELL_SESSION', '1') != '0'
+SCREENSHOT_MAX_EDGE = int(os.getenv('SCREENSHOT_MAX_EDGE', '1920'))
+SCREENSHOT_FORMAT = os.getenv('SCREENSHOT_FORMAT', 'JPEG')
+SCREENSHOT_QUALITY = int(os.getenv('SCREENSHOT_QUALITY', '80'))
+SCREENSHOT_DELTA = os.getenv('SCREENSHOT_DELTA', '1') != '0'
+PASTE_THRESHOLD = int(os.getenv('PASTE_THRESHOLD', '200'))  # characters; shorter content is typed (0 always types)
+PASTE_CHUNK = int(os.getenv('PASTE_CHUNK', '4000'))
+PASTE_TIMEOUT = float(os.getenv('PASTE_TIMEOUT', '5'))
+MOUSE_MOVE_DURATION = float(os.getenv('MOUSE_MOVE_DURATION', '0'))  # seconds; 0 jumps straight to the target
+UI_ELEMENTS = os.getenv('UI_ELEMENTS', '1') != '0'
+UI_ELEMENTS_MAX = int(os.getenv('UI_ELEMENTS_MAX', '60'))
+UI_OCR = os.getenv('UI_OCR', '0') != '0'  # needs pytesseract and the tesseract binary
+
+command_runner = CommandRunner(cwd=WORKING_DIR, timeout=CMD_TIMEOUT, max_output=CMD_MAX_OUTPUT,
+                               max_concurrent=CMD_MAX_CONCURRENT)
+shell_session = ShellSession(cwd=WORKING_DIR, timeout=CMD_TIMEOUT, max_output=CMD_MAX_OUTPUT)
+input_service = InputService()
+screen_geometry = ScreenGeometry(pyautogui.size)
+element_index = ElementIndex(max_elements=UI_ELEMENTS_MAX, ocr=UI_OCR) if UI_ELEMENTS else None
+screen_capture = ScreenCapture(max_edge=SCREENSHOT_MAX_EDGE, format=SCREENSHOT_FORMAT, quality=SCREENSHOT_QUALITY,
+                               delta=SCREENSHOT_DELTA, geometry=screen_geometry, elements=element_index)
+
+
+class CommandOutput(str):
+    """Result text of execute_cmd_command; failed comes from the exit code, so LLM.is_error_result need not read the text"""
+    failed = False
+
+
+@tool(example={"command": 'mkdir "D:/temporary/desktop-agent-files/project1"'})
+async def execute_cmd_command(command: str, timeout: float = 0):
+    """Run a command in CMD
+    Commands share one CMD session: cd and set carry over to later commands.
+    You receive its exit code and output (long output is cut in the middle).
+    Optional "timeout" in seconds for long commands such as builds or installs; it is killed after that.
+    """
+    try:
+        print("Executing:", command)
+        runner = shell_session if SHELL_SESSION else command_runner
+        result = await runner.run(command, timeout=timeout or None)
+        if result.timed_out:
+            return f"error in tool(execute_cmd_command) => {result.summary()}"
+        output = CommandOutput(result.summary())
+        output.failed = result.returncode != 0
+        return output
+    except Exception as err:
+        print("error in tool(execute_cmd_command) =>", err)
+        return f"error in tool(execute_cmd_command) => {err}"
+
+
+@tool(example={"file_path": "D:/Coding/All Codes/C++/tempp/A.cpp", "content": "any content to write in the file."})
+async def write_into_file(file_path: str, content: str):
+    """Write content into a file (created with its folders, or replaced)"""
+    try:
+        await asyncio.to_thread(file_writer.write_files, {file_path: content}, WORKING_DIR)
+        return f"provided content is successfully written to file {file_path}"
+    except Exception as err:
+        print("error in tool(write_into_file) => ",err)
+        return f"error in tool(write_into_file) => {err}"
+
+
+@tool(example={"base_dir": "D:/temporary/desktop-agent-files/shop",
+               "files": [{"path": "index.html", "content": "<!DOCTYPE html>..."},
+                         {"path": "css/style.css", "content": "body { margin: 0; }"},
+                         {"path": "js/app.js", "content": "console.log('ready');"}]},
+      schema={"files": {"type": "array", "items": {"type": "object", "properties": {
+          "path": {"type": "string"}, "content": {"type": "string"}}, "required": ["path", "content"]}}})
+async def write_files(files: list, base_dir: str = ""):
+    """Create a whole set of files (e.g. a project) in one step; either all are written or none
+    Paths are relative to base_dir (or absolute); missing folders are created.
+    """
+    try:
+        contents = []
+        for item in files:
+            if not isinstance(item, dict) or not isinstance(item.get("path"), str) or not isinstance(item.get("content"), str):
+                return f"error in tool(write_files) => every file needs a \"path\" and a \"content\" string"
+            contents.append((item["path"], item["content"]))
+        written = await asyncio.to_thread(file_writer.write_files, contents, os.path.join(WORKING_DIR, base_dir))
+        return f"{len(written)} files written: " + ", ".join(written)
+    except Exception as err:
+        print("error in tool(write_files) => ",err)
+        return f"error in tool(write_files) => {err}"
+
+
+@tool(example={"file_path": "D:/Coding/All Codes/C++/tempp/A.cpp"})
+async def open_file(file_path: str):
+    """Open a file using its default app"""
+    try:
+        res = await execute_cmd_command(f'code "{file_path}"')  # runs in the shared shell session
+        if res.startswith("error in tool"):
+            return res
+        return f"{file_path} file opened successfully"
+    except Exception as err:
+        print("error in tool(open_file) =>", err)
+        return f"error in tool(open_file) => {err}"
+
+
+@tool(example={"app_name": "notepad"})
+async def open_app(app_name: str):
+    """Open an application by name"""
+    try:
+        baseline = await waits.screen_signature()
+        res = await press_keyboard_key(["ctrl","esc"])
+        await waits.screen_changed(baseline, timeout=2)  # start menu is open
+        res = await write_content(app_name)
+        await waits.screen_stable(timeout=3)  # search results have settled
+        baseline = await waits.screen_signature()
+        res = await press_keyboard_key(["enter"])
+        opened, waited = await waits.screen_changed(baseline, timeout=5)
+        if opened:
+            await waits.screen_stable(timeout=5)
+        return f"{app_name} opened successfully"
+    except Exception as err:
+        print("error in tool(open_app) =>", err)
+        return f"error in tool(open_app) => {err}"
+
+
+@tool(example={"website": "https://www.youtube.com/"})
+async def open_website(website: str):
+    """Open a website"""
+    try:
+        webbrowser.open(website)
+        return f"{website} has opened successfully"
+    except Exception as err:
+        print("error in tool(open_website) =>", err)
+        return  f"error in tool(open_website) => {err}"
+
+
+@tool(example={"keys_to_press": ["ctrl", "shift", "esc"]})
+async def press_keyboard_key(keys_to_press: list[str]): # Using pynput.keyboard
+    """Press one or more keyboard keys using pynput"""
+    try:
+        events = [("press", k) for k in keys_to_press] + [("release", k) for k in reversed(keys_to_press)]
+        await input_service.send(events)
+        return f"{keys_to_press} pressed successfully"
+    except Exception as err:
+        print("error in tool(press_keyboard_key) =>", err)
+        return  f"error in tool(press_keyboard_key) => {err}"
+
+
+async def _paste_content(content):
+    """Paste long content through the clipboard in chunks, then put the user's clipboard text back
+
+    Each chunk is checked on the clipboard before it is pasted, and the next one
+    waits until the screen has taken the paste and settled (editors that throttle
+    paste). Non-text clipboard contents are not restored.
+    """
+    saved = await asyncio.to_thread(clipboard.get_text)
+    paste = ["cmd", "v"] if sys.platform == "darwin" else ["ctrl", "v"]
+    chunks = [content[i:i + PASTE_CHUNK] for i in range(0, len(content), PASTE_CHUNK)]
+    written = 0
+    try:
+        for i, chunk in enumerate(chunks):
+            try:
+                await asyncio.to_thread(clipboard.set_text, chunk)
+            except clipboard.ClipboardError as err:
+                if not written:
+                    raise  # nothing pasted yet, write_content types it instead
+                return f"error in tool(write_content) => {err}; {written} of {len(content)} characters written"
+            baseline = await waits.screen_signature()
+            await input_service.send([("press", k) for k in paste] + [("release", k) for k in reversed(paste)])
+            landed, _ = await waits.screen_changed(baseline, timeout=PASTE_TIMEOUT)
+            if not landed:
+                return (f"error in tool(write_content) => paste {i + 1}/{len(chunks)} did not appear on screen; "
+                        f"{written} of {len(content)} characters written")
+            await waits.screen_stable(timeout=PASTE_TIMEOUT)
+            written += len(chunk)
+    finally:
+        if saved is not None:
+            try:
+                await asyncio.to_thread(clipboard.set_text, saved, False)
+            except clipboard.ClipboardError as err:
+                print("⚠️ could not restore the clipboard =>", err)
+    return f"content written successfully ({len(content)} characters pasted)"
+
+
+@tool(example={"content": "Hello, world!"})
+async def write_content(content: str):
+    """Type text at the current cursor position"""
+    try:
+        if PASTE_THRESHOLD and len(content) >= PASTE_THRESHOLD:
+            try:
+                return await _paste_content(content)
+            except clipboard.ClipboardError as err:
+                print("⚠️ clipboard unavailable, typing instead =>", err)
+        await input_service.send([("type", content)])
+        return f"content written successfully"
+    except Exception as err:
+        print("error in tool(write_content) =>", err)
+        return  f"error in tool(write_content) => {err}"
+
+
+@tool(example={"reason": "to locate a button before clicking"})
+async def give_screenshot(reason: str = "", full: bool = False):
+    """Capture and analyze the screen
+    You will receive a screenshot and its dimensions (width, height).
+    Use this to compute coordinates for mouse actions.
+    If nothing changed since your last screenshot you get "Screen unchanged since the last screenshot" instead;
+    if only part changed you get just that part and its position. Add "full": true to get the whole screen.
+    With each image comes a numbered list of the UI elements found on the screen, for click_element.
+    """
+    try:
+        return await screen_capture.capture(full)
+    except Exception as err:
+        print("❌ error in tool(give_screenshot) =>", err)
+        return {"error": str(err)}
+
+
+@tool(example={"x": 0.98, "y": 0.02})
+async def move_mouse_pointer(x: float, y: float):
+    """Move the mouse pointer based on screen dimensions (percentage coordinates)
+    x, y are percentages of total screen width and height.
+    Example: 0.98 = 98% from left, 0.02 = 2% from top.
+    """
+    try:
+        x_px, y_px = screen_geometry.to_point(x, y)
+        await input_service.send([("move", x_px, y_px, MOUSE_MOVE_DURATION)])
+        print(f"mouse is successfully moved to position ({x_px}, {y_px})")
+        return f"mouse is successfully moved to given position"
+    except Exception as err:
+        print("❌ error in tool(move_mouse_pointer) =>", err)
+        return f"error in tool(move_mouse_pointer) => {err}"
+
+
+@tool(example={"button": "left", "clicks": 2})
+async def click_mouse_buttons(button: str = "left", clicks: int = 1):
+    """Click a mouse button one or multiple times"""
+    try:
+        button_name = button.lower()
+        if button_name not in ("left", "right", "middle"):
+            return f"Invalid button name: {button_name}"
+
+        result = await input_service.send([("click", button_name, clicks)])  # sent together so the OS sees a real double click
+        return f"Clicked {button_name} button {clicks} times at {result.position}"
+
+    except Exception as err:
+        print("❌ error in tool(click_mouse_buttons) =>", err)
+        return f"error in tool(click_mouse_buttons) => {err}"
+
+
+@tool(example={"x": 0.5, "y": 0.3, "button": "left", "clicks": 1})
+async def click_at(x: float, y: float, button: str = "left", clicks: int = 1):
+    """Move the mouse to a point and click it in one action
+    x, y are percentages of total screen width and height, as for move_mouse_pointer.
+    """
+    try:
+        button_name = button.lower()
+        if button_name not in ("left", "right", "middle"):
+            return f"Invalid button name: {button_name}"
+        x_px, y_px = screen_geometry.to_point(x, y)
+        await input_service.send([("move", x_px, y_px, MOUSE_MOVE_DURATION), ("click", button_name, clicks)])
+        return f"Clicked {button_name} button {clicks} times at ({x_px}, {y_px})"
+    except Exception as err:
+        print("❌ error in tool(click_at) =>", err)
+        return f"error in tool(click_at) => {err}"
+
+
+@tool(example={"element": 12, "button": "left", "clicks": 1})
+async def click_element(element: int, button: str = "left", clicks: int = 1):
+    """Click the centre of a UI element by its number in the element list of the last screenshot
+    Numbers are only valid until the next screenshot. Use click_at if the target is not in the list.
+    """
+    try:
+        button_name = button.lower()
+        if button_name not in ("left", "right", "middle"):
+            return f"Invalid button name: {button_name}"
+        point = element_index.point(element) if element_index is not None else None
+        if point is None:
+            return f"error in tool(click_element) => element {element} is not in the last screenshot's element list"
+        x_px, y_px = screen_geometry.to_point(*point)
+        await input_service.send([("move", x_px, y_px, MOUSE_MOVE_DURATION), ("click", button_name, clicks)])
+        return f"Clicked {button_name} button {clicks} times on element {element} at ({x_px}, {y_px})"
+    except Exception as err:
+        print("❌ error in tool(click_element) =>", err)
+        return f"error in tool(click_element) => {err}"
+
+
+@tool(example={"condition": "screen_stable", "timeout": 5})
+async def wait_until(condition: str, target: str = "", timeout: float = 5, region: list[float] = None):
+    """Wait for something to happen instead of guessing a delay
+    condition is one of: "screen_stable" (nothing moves for a moment, e.g. a page finished loading),
+    "screen_changed" (anything changes from now on), "file_exists" (target is a file path),
+    "process_started" (target is a process name such as "notepad").
+    Optional "region" [left, top, right, bottom] as fractions of the screen limits the screen conditions to that area.
+    """
+    try:
+        match condition:
+            case 'screen_stable':
+                happened, waited = await waits.screen_stable(region, timeout=timeout)
+            case 'screen_changed':
+                happened, waited = await waits.screen_changed(region=region, timeout=timeout)
+            case 'file_exists':
+                happened, waited = await waits.file_exists(os.path.join(WORKING_DIR, target), timeout=timeout)
+            case 'process_started':
+                happened, waited = await waits.process_started(target, timeout=timeout)
+            case _:
+                return f"error in tool(wait_until) => unknown condition: {condition}"
+        awaited = f"{condition} {target}".strip()
+        if not happened:
+            return f"error in tool(wait_until) => timed out after {waited:.1f}s waiting for {awaited}"
+        return f"{awaited} after {waited:.1f}s"
+    except Exception as err:
+        print("❌ error in tool(wait_until) =>", err)
+        return f"error in tool(wait_until) => {err}"
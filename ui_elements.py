@@ -0,0 +1,181 @@
+'''ui_elements.py (local detection of clickable regions in a screenshot, for click-by-number)
+
+Edges of a reduced grayscale frame are split into blocks by recursive XY-cut:
+a block is cut wherever a band of rows (then columns) has no edges, or only a
+long border/separator line. The leaves are the candidate elements. Words from
+pytesseract are attached as labels when OCR is on and it is installed.
+'''
+
+import numpy as np
+from dataclasses import dataclass
+
+try:
+    import pytesseract
+except ImportError:
+    pytesseract = None
+
+
+LISTING = "UI elements"  # history_manager drops listings of older screenshots, their numbers no longer apply
+
+
+@dataclass
+class Element:
+    number: int
+    kind: str     # "text", "icon" or "box"
+    box: tuple    # (left, top, right, bottom) in screenshot pixels
+    label: str = ""
+
+
+def _segments(profile, min_gap):
+    """(start, end) runs of True in profile, merging runs separated by fewer than min_gap False entries"""
+    index = np.flatnonzero(profile)
+    if index.size == 0:
+        return []
+    breaks = np.flatnonzero(np.diff(index) > min_gap)
+    starts = np.concatenate(([index[0]], index[breaks + 1]))
+    ends = np.concatenate((index[breaks], [index[-1]])) + 1
+    return list(zip(starts.tolist(), ends.tolist()))
+
+
+def _steps(pixels, axis, threshold):
+    """Edge mask of contrast steps across axis that have flat colour on at least one side
+
+    UI elements are drawn on flat fills; photos and textured wallpapers have no
+    flat runs, so their gradients do not split the screen into false blocks.
+    """
+    pixels = np.moveaxis(pixels, axis, -1)
+    diff = np.abs(np.diff(pixels, axis=-1))
+    flat = (diff[..., :-1] <= 1) & (diff[..., 1:] <= 1)  # flat[i]: pixel i + 1 equals both neighbours
+    # step between pixels s and s + 1 (s from 2), with pixels s - 2..s or s + 1..s + 3 all one colour
+    step = (diff[..., 2:-2] > threshold) & (flat[..., :-3] | flat[..., 3:])
+    edges = np.zeros(pixels.shape, dtype=bool)
+    edges[..., 3:-2] = _runs(step, axis=pixels.ndim - 2)
+    return np.moveaxis(edges, -1, axis)
+
+
+def _runs(steps, axis, length=3):
+    """Steps that are part of a straight run of at least length along axis: borders and strokes, not texture"""
+    steps = np.moveaxis(steps, axis, 0)
+    run = steps[:1 - length] if length > 1 else steps
+    for i in range(1, length):
+        run = run & steps[i:len(steps) - length + 1 + i]
+    kept = np.zeros_like(steps)
+    for i in range(length):
+        kept[i:len(steps) - length + 1 + i] |= run
+    return np.moveaxis(kept, 0, axis)
+
+
+def _xy_cut(mask, left, top, min_gap, line_density, small_area, boxes, depth=0):
+    rows = np.flatnonzero(mask.any(axis=1))
+    cols = np.flatnonzero(mask.any(axis=0))
+    if rows.size == 0:
+        return
+    mask = mask[rows[0]:rows[-1] + 1, cols[0]:cols[-1] + 1]
+    left, top = left + cols[0], top + rows[0]
+    height, width = mask.shape
+    row_density = mask.mean(axis=1)
+    col_density = mask.mean(axis=0)
+    framed = (row_density[0] >= line_density and row_density[-1] >= line_density) or \
+             (col_density[0] >= line_density and col_density[-1] >= line_density)
+    if depth >= 12 or (framed and width * height <= small_area):  # a button, field or tile: one target
+        boxes.append((left, top, left + width, top + height))
+        return
+    large = width * height > small_area
+    for axis, density in ((0, row_density), (1, col_density)):
+        occupied = density > 0
+        if large:  # a row (column) that is one long line separates panes like an empty one
+            occupied &= density < line_density
+        segments = _segments(occupied, min_gap)
+        if len(segments) > 1 or (segments and segments[0] != (0, len(density))):
+            for start, end in segments:
+                part = mask[start:end] if axis == 0 else mask[:, start:end]
+                _xy_cut(part, left + start * (axis == 1), top + start * (axis == 0),
+                        min_gap, line_density, small_area, boxes, depth + 1)
+            return
+    boxes.append((left, top, left + width, top + height))
+
+
+def _kind(width, height):
+    """Rough kind from the size in working pixels (about half of 1080p)"""
+    if width <= 32 and height <= 32 and 0.5 <= width / height <= 2:
+        return "icon"
+    if height <= 14 and width > 2 * height:
+        return "text"
+    return "box"
+
+
+def detect_elements(image, max_elements=60, edge_threshold=8, min_gap=3, ocr=False):
+    """Candidate clickable regions and text boxes of a screenshot, numbered in reading order"""
+    scale = -(-max(image.size) // 1280)  # work on at most 1280 px wide, e.g. half of 1080p, a third of 4K
+    gray = image.convert("L")
+    small = gray.reduce(scale) if scale > 1 else gray
+    pixels = np.asarray(small, dtype=np.int16)
+    edges = _steps(pixels, 1, edge_threshold) | _steps(pixels, 0, edge_threshold)
+
+    height, width = pixels.shape
+    boxes = []
+    _xy_cut(edges, 0, 0, min_gap, 0.8, 0.02 * width * height, boxes)
+
+    boxes = [b for b in boxes if b[2] - b[0] >= 4 and b[3] - b[1] >= 4 and (b[2] - b[0]) * (b[3] - b[1]) <= 0.25 * width * height]
+    if len(boxes) > max_elements:  # keep the largest, they are the likeliest click targets
+        boxes = sorted(boxes, key=lambda b: (b[2] - b[0]) * (b[3] - b[1]), reverse=True)[:max_elements]
+    boxes.sort(key=lambda b: (b[1] // 8, b[0]))  # reading order, tolerant of small vertical offsets
+
+    elements = []
+    for x0, y0, x1, y1 in boxes:
+        box = (int(x0) * scale, int(y0) * scale, min(int(x1) * scale, image.size[0]), min(int(y1) * scale, image.size[1]))
+        elements.append(Element(len(elements) + 1, _kind(x1 - x0, y1 - y0), box))
+    if ocr and pytesseract is not None and elements:
+        _label(image, elements)
+    return elements
+
+
+def _label(image, elements):
+    """Attach OCR words to the element that contains each word's centre"""
+    data = pytesseract.image_to_data(image, output_type=pytesseract.Output.DICT)
+    for text, x, y, w, h in zip(data["text"], data["left"], data["top"], data["width"], data["height"]):
+        if not text.strip():
+            continue
+        cx, cy = x + w / 2, y + h / 2
+        for element in elements:
+            left, top, right, bottom = element.box
+            if left <= cx < right and top <= cy < bottom:
+                element.label = f"{element.label} {text.strip()}".strip()[:40]
+                break
+
+
+class ElementIndex:
+    """Elements of the last screenshot, so the model can click one by number"""
+
+    def __init__(self, max_elements=60, ocr=False):
+        self.max_elements = max_elements
+        self.ocr = ocr
+        self.elements = []
+        self.frame_size = None
+
+    def update(self, image):
+        """Detect the elements of a new frame and return their listing for the model"""
+        self.elements = detect_elements(image, self.max_elements, ocr=self.ocr)
+        self.frame_size = image.size
+        return self.listing()
+
+    def listing(self):
+        if not self.elements:
+            return f"{LISTING}: none detected"
+        width, height = self.frame_size
+        lines = [f"{LISTING} (number: kind at centre x, y as screen fractions, size; click one with click_element):"]
+        for element in self.elements:
+            left, top, right, bottom = element.box
+            line = (f"{element.number}: {element.kind} at {(left + right) / 2 / width:.3f}, {(top + bottom) / 2 / height:.3f} "
+                    f"({(right - left) / width:.3f}x{(bottom - top) / height:.3f})")
+            lines.append(f'{line} "{element.label}"' if element.label else line)
+        return "\n".join(lines)
+
+    def point(self, number):
+        """Centre of element number as screen fractions, or None if it is not in the last listing"""
+        for element in self.elements:
+            if element.number == number:
+                left, top, right, bottom = element.box
+                width, height = self.frame_size
+                return (left + right) / 2 / width, (top + bottom) / 2 / height
+        return None
@@ -0,0 +1,159 @@
+'''vad.py (streaming voice activity detection and utterance endpointing)
+
+Microphone chunks are cut into 20 ms frames; per-frame RMS energy and
+zero-crossing rate are computed with NumPy for a whole chunk at once. A frame
+is speech if it is louder than the noise threshold, or a little quieter but
+with the high zero-crossing rate of a fricative ("s", "f"). An utterance starts
+after a few speech frames in a row (with a short pre-roll kept in a ring buffer
+so its first consonant is not clipped) and ends as soon as end_silence seconds
+of non-speech follow it.
+'''
+
+import time
+import numpy as np
+from dataclasses import dataclass
+
+
+@dataclass
+class Utterance:
+    pcm: bytes           # 16-bit mono
+    sample_rate: int
+    speech_seconds: float
+    ended_at: float      # time.monotonic() when the endpoint was confirmed
+
+
+def frame_features(samples, frame):
+    """(RMS energy, zero-crossing rate) of each whole frame of samples"""
+    frames = samples[:len(samples) // frame * frame].reshape(-1, frame).astype(np.float32)
+    energy = np.sqrt(np.mean(frames * frames, axis=1))
+    signs = np.signbit(frames)
+    zcr = np.mean(signs[:, 1:] != signs[:, :-1], axis=1)
+    return energy, zcr
+
+
+class RingBuffer:
+    """The most recent capacity samples"""
+
+    def __init__(self, capacity):
+        self.data = np.zeros(capacity, dtype=np.int16)
+        self.end = 0       # next write position
+        self.filled = 0
+
+    def write(self, samples):
+        samples = samples[-len(self.data):]
+        first = min(len(samples), len(self.data) - self.end)
+        self.data[self.end:self.end + first] = samples[:first]
+        self.data[:len(samples) - first] = samples[first:]
+        self.end = (self.end + len(samples)) % len(self.data)
+        self.filled = min(len(self.data), self.filled + len(samples))
+
+    def last(self, count):
+        count = min(count, self.filled)
+        start = (self.end - count) % len(self.data)
+        if start + count <= len(self.data):
+            return self.data[start:start + count].copy()
+        return np.concatenate((self.data[start:], self.data[:self.end]))
+
+    def clear(self):
+        self.end = self.filled = 0
+
+
+class Segmenter:
+    """Turns a stream of PCM chunks into utterances
+
+    threshold is the speech energy threshold (RMS), or a function returning the
+    current one (e.g. from microphone.NoiseFloor). feed() returns the utterances
+    completed by a chunk; an utterance longer than max_seconds is cut there.
+    """
+
+    def __init__(self, sample_rate=16000, threshold=300.0, end_silence=0.5, max_seconds=30, frame_ms=20,
+                 start_frames=3, pre_roll=0.3, min_speech=0.15, quiet_ratio=0.8, fricative_zcr=0.3):
+        self.sample_rate = sample_rate
+        self.threshold = threshold if callable(threshold) else (lambda: threshold)
+        self.frame = sample_rate * frame_ms // 1000
+        self.end_frames = max(1, round(end_silence * 1000 / frame_ms))
+        self.max_frames = round(max_seconds * 1000 / frame_ms)
+        self.start_frames = start_frames
+        self.min_speech_frames = round(min_speech * 1000 / frame_ms)
+        self.quiet_ratio = quiet_ratio
+        self.fricative_zcr = fricative_zcr
+        self.history = RingBuffer(int(pre_roll * sample_rate) + start_frames * self.frame)
+        self.pre_roll = int(pre_roll * sample_rate)
+        self.remainder = np.zeros(0, dtype=np.int16)
+        self.reset()
+
+    def reset(self):
+        """Forget any utterance in progress"""
+        self.frames = None   # frames of the current utterance, None while waiting for speech
+        self.length = 0      # its length in frames
+        self.run = 0         # speech frames in a row while waiting, non-speech frames in a row while in speech
+        self.speech = 0
+        self.history.clear()
+
+    @property
+    def in_speech(self):
+        return self.frames is not None
+
+    def is_speech(self, energy, zcr):
+        threshold = self.threshold()
+        return (energy > threshold) | ((energy > threshold * self.quiet_ratio) & (zcr > self.fricative_zcr))
+
+    def feed(self, chunk):
+        samples = np.concatenate((self.remainder, np.frombuffer(chunk, dtype=np.int16)))
+        whole = len(samples) // self.frame * self.frame
+        self.remainder = samples[whole:]
+        if not whole:
+            return []
+        speech = self.is_speech(*frame_features(samples[:whole], self.frame))
+        completed = []
+        for i, voiced in enumerate(speech):
+            frame = samples[i * self.frame:(i + 1) * self.frame]
+            if self.frames is None:
+                self.history.write(frame)
+                self.run = self.run + 1 if voiced else 0
+                if self.run >= self.start_frames:
+                    onset = self.pre_roll + self.start_frames * self.frame
+                    self.frames = [self.history.last(onset)]
+                    self.length = len(self.frames[0]) // self.frame
+                    self.speech, self.run = self.start_frames, 0
+                continue
+            self.frames.append(frame)
+            self.length += 1
+            if voiced:
+                self.speech += 1
+                self.run = 0
+            else:
+                self.run += 1
+            if self.run >= self.end_frames or self.length >= self.max_frames:
+                utterance = self._finish()
+                if utterance is not None:
+                    completed.append(utterance)
+        return completed
+
+    def _finish(self):
+        frames, speech, trailing = self.frames, self.speech, self.run
+        self.reset()
+        if speech < self.min_speech_frames:  # a click or a cough
+            return None
+        keep = len(frames) - max(0, trailing - self.end_frames // 3)  # keep a little of the trailing silence
+        pcm = np.concatenate(frames[:keep]).tobytes()
+        return Utterance(pcm, self.sample_rate, speech * self.frame / self.sample_rate, time.monotonic())
+
+
+def next_utterance(microphone, segmenter, timeout=None):
+    """Feed microphone chunks to segmenter until an utterance is complete
+
+    Returns None if no speech started within timeout seconds, or the stream stopped.
+    """
+    started = time.monotonic()
+    while True:
+        chunk = microphone.read(timeout=1)
+        if chunk is None:
+            if not microphone.running:
+                return None
+        else:
+            utterances = segmenter.feed(chunk)
+            if utterances:
+                return utterances[0]
+        if timeout is not None and not segmenter.in_speech and time.monotonic() - started >= timeout:
+            return None
@@ -0,0 +1,159 @@
+'''voice_pipeline.py (listen -> recognize -> act as concurrent stages joined by queues)
+
+Capture keeps cutting utterances out of the microphone while earlier ones are
+recognized and while the agent works, so nothing said during a task is lost.
+A stop word interrupts the running task and drops the queued commands; any
+other command waits in the queue behind the running one. With a wake word gate
+only utterances that start with the wake phrase (or follow it alone) are
+recognized at all.
+'''
+
+import re
+import time
+import asyncio
+
+from wake_word import strip_phrase
+
+
+STOP_WORDS = ("stop", "cancel", "abort", "stop it", "stop that", "cancel that", "stop the task", "cancel the task")
+
+
+def is_stop_command(text, stop_words=STOP_WORDS):
+    return re.sub(r"[^\w\s]", "", text.lower()).strip() in stop_words
+
+
+class VoicePipeline:
+    """Runs the three stages until cancelled
+
+    capture() blocks until the next utterance (None if there was none for a while, raises if
+    the microphone is gone); transcribe(utterance) blocks and returns its text ("" if not
+    understood). Both run in the default executor. run_command(text) is a coroutine that
+    carries out one command; cancel_command() interrupts it and returns True, or returns
+    False if there was nothing it could interrupt (then the command's task is cancelled).
+
+    wake(utterance), if given, blocks and returns True if the utterance starts with the
+    wake phrase; others are dropped before recognition, except short ones while a command
+    runs, which may still be stop words. wake_phrase is removed from the recognized text; if
+    nothing is left, the next utterance within wake_window seconds needs no wake phrase.
+    """
+
+    def __init__(self, capture, transcribe, run_command, cancel_command, stop_words=STOP_WORDS,
+                 on_status=None, on_result=None, on_error=None, max_utterances=4,
+                 wake=None, wake_phrase="", wake_window=8, stop_seconds=1.5):
+        self.capture = capture
+        self.transcribe = transcribe
+        self.run_command = run_command
+        self.cancel_command = cancel_command
+        self.stop_words = stop_words
+        self.on_status = on_status or (lambda message, color: None)
+        self.on_result = on_result or (lambda text, res: None)
+        self.on_error = on_error or (lambda error: None)
+        self.utterances = asyncio.Queue(maxsize=max_utterances)
+        self.commands = asyncio.Queue()
+        self.wake = wake
+        self.wake_phrase = wake_phrase
+        self.wake_window = wake_window
+        self.stop_seconds = stop_seconds
+        self.awake_until = 0
+        self.ignored = 0          # utterances the wake word gate kept from recognition
+        self.current = None       # task of the running command
+        self.interrupted = False  # the running command was stopped by a stop word
+
+    @property
+    def busy(self):
+        return self.current is not None
+
+    async def run(self):
+        stages = [asyncio.ensure_future(stage) for stage in (self._capture(), self._recognize(), self._act())]
+        try:
+            await asyncio.wait(stages, return_when=asyncio.FIRST_COMPLETED)  # only capture returns (mic lost); the others loop until cancelled
+        finally:
+            for stage in stages:
+                stage.cancel()
+            await asyncio.gather(*stages, return_exceptions=True)
+
+    async def _capture(self):
+        """Stage 1: cut the microphone stream into utterances"""
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                utterance = await loop.run_in_executor(None, self.capture)
+            except Exception as err:
+                self.on_error(f"Error: {str(err)}")
+                return
+            if utterance is None:
+                if not self.busy:
+                    self.on_status("⏱️ No speech detected, still listening...", "#FF9800")
+                continue
+            await self.utterances.put(utterance)  # if recognition falls behind, the microphone buffers meanwhile
+
+    async def _recognize(self):
+        """Stage 2: speech to text; stop words act at once, other commands queue for the agent"""
+        loop = asyncio.get_running_loop()
+        while True:
+            utterance = await self.utterances.get()
+            awake = self.wake is None or time.monotonic() < self.awake_until
+            if not awake:
+                awake = await loop.run_in_executor(None, self.wake, utterance)
+                if not awake and not (self.busy and utterance.speech_seconds <= self.stop_seconds):
+                    self.ignored += 1
+                    continue
+            if not self.busy:
+                self.on_status("🔄 Processing your speech...", "#FF9800")
+            try:
+                text = await loop.run_in_executor(None, self.transcribe, utterance)
+            except Exception as err:  # e.g. the network dropped: keep listening, the next utterance may get through
+                self.on_status(f"⚠️ Speech recognition failed: {str(err)}", "#FF5722")
+                continue
+            if text == "":
+                if not self.busy:
+                    self.on_status("❓ Could not understand, please speak clearly", "#FF5722")
+                continue
+            print(f"Recognized: {text}")
+            if is_stop_command(text, self.stop_words):
+                self.stop(text)
+                continue
+            if not awake:  # a short phrase during a task that was not a stop word
+                self.ignored += 1
+                continue
+            if self.wake is not None:
+                text = strip_phrase(text, self.wake_phrase)
+                if text == "":  # just the wake phrase: the command comes next
+                    self.awake_until = time.monotonic() + self.wake_window
+                    self.on_status("👂 Yes? Say your command...", "#2196F3")
+                    continue
+                self.awake_until = 0
+            self.commands.put_nowait(text)
+            if self.busy:
+                self.on_status(f"📥 Queued: {text} ({self.commands.qsize()} waiting)", "#2196F3")
+
+    def stop(self, text="stop"):
+        """Interrupt the running command and drop the queued ones"""
+        dropped = 0
+        while not self.commands.empty():
+            self.commands.get_nowait()
+            dropped += 1
+        if self.current is not None:
+            self.interrupted = True
+            if not self.cancel_command():
+                self.current.cancel()
+        self.on_status(f"⏹️ {text}: task stopped" + (f", {dropped} queued commands dropped" if dropped else ""), "#757575")
+
+    async def _act(self):
+        """Stage 3: run the queued commands one at a time"""
+        while True:
+            text = await self.commands.get()
+            self.interrupted = False
+            self.current = asyncio.ensure_future(self.run_command(text))
+            try:
+                res = await self.current
+            except asyncio.CancelledError:
+                if not self.interrupted:  # the pipeline itself is shutting down
+                    raise
+                res = 'task cancelled'
+            except Exception as err:  # e.g. the model API failed: report it and take the next command
+                self.on_error(f"Error: {str(err)}")
+                continue
+            finally:
+                self.current = None
+            self.on_result(text, res)
@@ -0,0 +1,99 @@
+'''waits.py (event-driven waits used instead of fixed sleeps)
+
+Every wait returns (happened, seconds waited) and gives up after timeout seconds.
+Screen regions are [left, top, right, bottom] fractions of the screen.
+'''
+
+import os
+import sys
+import asyncio
+from PIL import ImageGrab
+
+from screen import block_signature, changed_box
+
+
+async def poll(check, timeout=5, interval=0.05):
+    """Call check() (plain or async) until it returns something truthy; returns (result or None, seconds waited)"""
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    while True:
+        result = check()
+        if asyncio.iscoroutine(result):
+            result = await result
+        if result:
+            return result, loop.time() - started
+        if loop.time() - started >= timeout:
+            return None, loop.time() - started
+        await asyncio.sleep(interval)
+
+
+def _grab_signature(grab, region, block):
+    image = grab()
+    if region:
+        width, height = image.size
+        image = image.crop((int(region[0] * width), int(region[1] * height), int(region[2] * width), int(region[3] * height)))
+    return block_signature(image, block)
+
+
+async def screen_signature(region=None, grab=None, block=16):
+    """Block signature of the screen (or region) right now, grabbed on a worker thread"""
+    return await asyncio.to_thread(_grab_signature, grab or ImageGrab.grab, region, block)
+
+
+def _differs(previous, current, block, threshold):
+    return previous.shape != current.shape or changed_box(previous, current, block, threshold) is not None
+
+
+async def screen_changed(baseline=None, region=None, timeout=5, interval=0.1, grab=None, block=16, threshold=2):
+    """Wait until the screen (or region) differs from baseline, by default the screen when the wait starts"""
+    if baseline is None:
+        baseline = await screen_signature(region, grab, block)
+
+    async def check():
+        return _differs(baseline, await screen_signature(region, grab, block), block, threshold)
+
+    changed, waited = await poll(check, timeout, interval)
+    return bool(changed), waited
+
+
+async def screen_stable(region=None, stable_for=0.3, timeout=5, interval=0.1, grab=None, block=16, threshold=2):
+    """Wait until the screen (or region) has not changed for stable_for seconds"""
+    loop = asyncio.get_running_loop()
+    last = await screen_signature(region, grab, block)
+    since = loop.time()
+
+    async def check():
+        nonlocal last, since
+        current = await screen_signature(region, grab, block)
+        if _differs(last, current, block, threshold):
+            last, since = current, loop.time()
+            return False
+        return loop.time() - since >= stable_for
+
+    stable, waited = await poll(check, timeout, interval)
+    return bool(stable), waited
+
+
+async def file_exists(path, timeout=5, interval=0.1):
+    """Wait until path exists"""
+    found, waited = await poll(lambda: os.path.exists(path), timeout, interval)
+    return bool(found), waited
+
+
+async def _process_running(name):
+    if sys.platform == "win32":
+        image = name if name.lower().endswith(".exe") else f"{name}.exe"
+        args = ("tasklist", "/FI", f"IMAGENAME eq {image}", "/NH", "/FO", "CSV")
+    else:
+        args = ("pgrep", "-x", name)
+    process = await asyncio.create_subprocess_exec(*args, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.DEVNULL)
+    output, _ = await process.communicate()
+    if sys.platform == "win32":
+        return f'"{image.lower()}"' in output.decode(errors="replace").lower()
+    return process.returncode == 0
+
+
+async def process_started(name, timeout=10, interval=0.25):
+    """Wait until a process called name (e.g. "notepad") is running"""
+    running, waited = await poll(lambda: _process_running(name), timeout, interval)
+    return bool(running), waited
@@ -0,0 +1,130 @@
+'''wake_word.py (on-device wake phrase gate in front of speech recognition)
+
+A few recordings of the wake phrase are the templates. Each utterance's first
+seconds are turned into MFCC frames and matched against every template with
+subsequence DTW; the utterance passes if the best match is close enough.
+All in NumPy, a few milliseconds per utterance.
+'''
+
+import os
+import re
+import glob
+import wave
+import numpy as np
+
+
+def _mel_filterbank(sample_rate, n_fft, n_mels):
+    to_mel = lambda hz: 2595 * np.log10(1 + hz / 700)
+    mels = np.linspace(to_mel(0), to_mel(sample_rate / 2), n_mels + 2)
+    bins = np.floor((n_fft + 1) * 700 * (10 ** (mels / 2595) - 1) / sample_rate).astype(int)
+    bank = np.zeros((n_fft // 2 + 1, n_mels), dtype=np.float32)
+    for m in range(n_mels):
+        left, centre, right = bins[m], bins[m + 1], bins[m + 2]
+        bank[left:centre, m] = (np.arange(left, centre) - left) / max(centre - left, 1)
+        bank[centre:right, m] = (right - np.arange(centre, right)) / max(right - centre, 1)
+    return bank
+
+
+class MFCC:
+    """Mel-frequency cepstral coefficients of 16-bit PCM: 25 ms frames every 10 ms"""
+
+    def __init__(self, sample_rate=16000, frame_ms=25, hop_ms=10, n_fft=512, n_mels=26, n_coeffs=13):
+        self.frame = sample_rate * frame_ms // 1000
+        self.hop = sample_rate * hop_ms // 1000
+        self.n_fft = n_fft
+        self.window = np.hamming(self.frame).astype(np.float32)
+        self.filterbank = _mel_filterbank(sample_rate, n_fft, n_mels)
+        k = np.arange(n_coeffs)[:, None]
+        self.dct = (np.cos(np.pi * k * (2 * np.arange(n_mels) + 1) / (2 * n_mels)) * np.sqrt(2 / n_mels)).T.astype(np.float32)
+
+    def __call__(self, samples):
+        """(frames, n_coeffs) array; column 0 is the log energy"""
+        x = samples.astype(np.float32) / 32768
+        x = np.append(x[:1], x[1:] - 0.97 * x[:-1])  # pre-emphasis
+        if len(x) < self.frame:
+            x = np.pad(x, (0, self.frame - len(x)))
+        count = 1 + (len(x) - self.frame) // self.hop
+        frames = np.lib.stride_tricks.sliding_window_view(x, self.frame)[::self.hop][:count] * self.window
+        power = np.abs(np.fft.rfft(frames, self.n_fft)) ** 2 / self.n_fft
+        return np.log(power @ self.filterbank + 1e-10) @ self.dct
+
+
+def subsequence_dtw(template, features):
+    """Mean frame distance of the best alignment of all of template with some stretch of features
+
+    Every template frame takes one step, to the same feature frame or one or two
+    further on, so the match may be up to twice as slow or any amount faster than
+    the template, and can start and end anywhere in features.
+    """
+    cost = np.sqrt(((template[:, None, :] - features[None, :, :]) ** 2).sum(axis=2))
+    total = cost[0].copy()
+    for row in cost[1:]:
+        best = total.copy()
+        best[1:] = np.minimum(best[1:], total[:-1])
+        best[2:] = np.minimum(best[2:], total[:-2])
+        total = row + best
+    return float(total.min()) / len(template)
+
+
+def read_wav(path):
+    """Samples of a 16-bit mono WAV file as an int16 array"""
+    with wave.open(path, "rb") as f:
+        if f.getsampwidth() != 2 or f.getnchannels() != 1:
+            raise ValueError(f"{path}: expected 16-bit mono, got {f.getsampwidth() * 8}-bit x{f.getnchannels()}")
+        return np.frombuffer(f.readframes(f.getnframes()), dtype=np.int16)
+
+
+class WakeWordDetector:
+    """Passes utterances that start with the wake phrase
+
+    templates are recordings (int16 arrays) of the phrase. Without a threshold,
+    it is calibrated leave-one-out: margin times the largest distance of a
+    template to the others (so at least two templates are needed).
+    """
+
+    def __init__(self, templates, sample_rate=16000, threshold=None, margin=1.5, lead=0.6):
+        self.mfcc = MFCC(sample_rate)
+        self.sample_rate = sample_rate
+        self.templates = [self._trim(self.mfcc(t)) for t in templates]
+        if not self.templates:
+            raise ValueError("no wake phrase recordings")
+        longest = max(len(t) for t in self.templates)
+        # look at most this far into an utterance: pre-roll and lead-in, then the phrase said slowly
+        self.window = int(lead * sample_rate) + 2 * longest * self.mfcc.hop
+        if threshold is None:
+            if len(self.templates) < 2:
+                raise ValueError("record the wake phrase at least twice, or set a threshold")
+            threshold = margin * max(self._distance(self.templates[i], self.templates[:i] + self.templates[i + 1:])
+                                     for i in range(len(self.templates)))
+        self.threshold = threshold
+
+    @classmethod
+    def from_folder(cls, folder, sample_rate=16000, threshold=None):
+        return cls([read_wav(path) for path in sorted(glob.glob(os.path.join(folder, "*.wav")))], sample_rate, threshold)
+
+    @staticmethod
+    def _trim(features, floor=3.0):
+        """Drop leading and trailing frames more than floor (log energy) below the loudest one"""
+        loud = np.flatnonzero(features[:, 0] > features[:, 0].max() - floor)
+        return features[loud[0]:loud[-1] + 1, 1:]  # column 0 (loudness) is not matched
+
+    @staticmethod
+    def _distance(features, templates):
+        return min(subsequence_dtw(template, features) for template in templates)
+
+    def distance(self, samples):
+        """Distance of the start of samples (int16) to the closest template"""
+        return self._distance(self.mfcc(samples[:self.window])[:, 1:], self.templates)
+
+    def __call__(self, utterance):
+        """True if a vad.Utterance starts with the wake phrase"""
+        return self.distance(np.frombuffer(utterance.pcm, dtype=np.int16)) <= self.threshold
+
+
+def strip_phrase(text, phrase):
+    """text without a leading phrase (compared word by word, ignoring case and punctuation)"""
+    words = re.sub(r"[^\w\s']", " ", phrase.lower()).split()
+    said = text.split()
+    if words and [re.sub(r"[^\w']", "", w.lower()) for w in said[:len(words)]] == words:
+        return " ".join(said[len(words):]).lstrip(",.!? ")
+    return text